@@ -1,6 +1,7 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.activity import ActivityLog
 from pydantic import BaseModel
@@ -21,23 +22,25 @@ class ActivitySchema(BaseModel):
         orm_mode = True
 
 @router.get("/", response_model=List[ActivitySchema])
-def read_activities(
-    db: Session = Depends(deps.get_db),
+async def read_activities(
+    db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
     current_user = Depends(deps.get_current_active_user),
 ):
-    activities = db.query(ActivityLog).order_by(ActivityLog.created_date.desc()).offset(skip).limit(limit).all()
-    return activities
+    activities = await db.scalars(
+        select(ActivityLog).order_by(ActivityLog.created_date.desc()).offset(skip).limit(limit)
+    )
+    return activities.all()
 
 @router.post("/", response_model=ActivitySchema)
-def create_activity(
+async def create_activity(
     action_type: str,
     description: str,
     entity_type: Optional[str] = None,
     entity_id: Optional[str] = None,
     entity_name: Optional[str] = None,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user),
 ):
     activity = ActivityLog(
@@ -49,6 +52,6 @@ def create_activity(
         created_by=current_user.email
     )
     db.add(activity)
-    db.commit()
-    db.refresh(activity)
+    await db.commit()
+    await db.refresh(activity)
     return activity
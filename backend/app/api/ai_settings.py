@@ -1,7 +1,8 @@
 
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.ai_settings import AISettings as AISettingsModel
 from app.models.user import User
@@ -10,34 +11,34 @@ from app.schemas.ai_settings import AISettings, AISettingsCreate, AISettingsUpda
 router = APIRouter()
 
 @router.get("/", response_model=AISettings)
-def get_ai_settings(
-    db: Session = Depends(deps.get_db),
+async def get_ai_settings(
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get current user's AI settings.
     """
-    settings = db.query(AISettingsModel).filter(AISettingsModel.user_id == current_user.id).first()
+    settings = await db.scalar(select(AISettingsModel).where(AISettingsModel.user_id == current_user.id))
     
     if not settings:
         # Create default settings if none exist
         settings = AISettingsModel(user_id=current_user.id)
         db.add(settings)
-        db.commit()
-        db.refresh(settings)
+        await db.commit()
+        await db.refresh(settings)
     
     return settings
 
 @router.post("/", response_model=AISettings)
-def create_or_update_ai_settings(
+async def create_or_update_ai_settings(
     settings_in: AISettingsCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Create or update AI settings for current user.
     """
-    settings = db.query(AISettingsModel).filter(AISettingsModel.user_id == current_user.id).first()
+    settings = await db.scalar(select(AISettingsModel).where(AISettingsModel.user_id == current_user.id))
     
     if settings:
         # Update existing
@@ -53,24 +54,24 @@ def create_or_update_ai_settings(
         )
         db.add(settings)
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
     return settings
 
 @router.put("/{settings_id}", response_model=AISettings)
-def update_ai_settings(
+async def update_ai_settings(
     settings_id: int,
     settings_in: AISettingsUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Update specific AI settings.
     """
-    settings = db.query(AISettingsModel).filter(
+    settings = await db.scalar(select(AISettingsModel).where(
         AISettingsModel.id == settings_id,
         AISettingsModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not settings:
         raise HTTPException(status_code=404, detail="AI Settings not found")
@@ -79,6 +80,6 @@ def update_ai_settings(
     for field, value in update_data.items():
         setattr(settings, field, value)
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
     return settings
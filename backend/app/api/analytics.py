@@ -1,55 +1,49 @@
 
-from typing import Any, List
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app.models.candidate import Candidate
-from app.models.vacancy import Vacancy
+from app.core.config import settings
+from app.models.analytics import OwnerStats
 from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import analytics_engine, analytics_rollup, candidate_export
 
 router = APIRouter()
 
 @router.get("/")
-def get_analytics(
-    db: Session = Depends(deps.get_db),
+async def get_analytics(
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    # try:
-    
-    # Initialize defaults
-    total_vacancies = db.query(Vacancy).filter(Vacancy.owner_id == current_user.id).count()
-    
-    # Get all vacancies for user
-    vacancies = db.query(Vacancy.id).filter(Vacancy.owner_id == current_user.id).all()
-    vacancy_ids = [v.id for v in vacancies]
-    
-    total_candidates = 0
-    avg_score = 0.0
-    status_breakdown = {}
-    hh_candidates = 0
-    manual_candidates = 0
-    
-    if vacancy_ids:
-        total_candidates = db.query(Candidate).filter(Candidate.vacancy_id.in_(vacancy_ids)).count()
-        avg_score_query = db.query(func.avg(Candidate.score)).filter(Candidate.vacancy_id.in_(vacancy_ids)).scalar()
-        if avg_score_query:
-            avg_score = round(avg_score_query, 2)
-            
-        candidate_stats = db.query(
-            Candidate.status, 
-            func.count(Candidate.id)
-        ).filter(Candidate.vacancy_id.in_(vacancy_ids)).group_by(Candidate.status).all()
-        
-        status_breakdown = {str(status) if status else "Unknown": count for status, count in candidate_stats}
-        
-        # Calculate sources
-        hh_candidates = db.query(Candidate).filter(
-            Candidate.vacancy_id.in_(vacancy_ids),
-            Candidate.hh_resume_id.isnot(None)
-        ).count()
-        
-        manual_candidates = total_candidates - hh_candidates
+    """
+    Dashboard totals over the current user's vacancies and their candidates,
+    read from the owner_stats rollup (a few rows, however many candidates).
+    Funnel, time-to-hire and the other derived metrics come from the
+    analytics engine, cached until the owner's rollup version changes.
+    """
+    rows = (await db.execute(
+        select(OwnerStats.metric, OwnerStats.key, OwnerStats.value).where(
+            OwnerStats.owner_id == current_user.id,
+            OwnerStats.metric != "skill",
+        )
+    )).all()
+    metrics = analytics_rollup.owner_metrics(rows)
+
+    total_vacancies = int(metrics["vacancies"].get("", 0))
+    total_candidates = int(metrics["candidates"].get("", 0))
+    scored = metrics["score_count"].get("", 0)
+    avg_score = round(metrics["score_sum"].get("", 0.0) / scored, 2) if scored else 0.0
+    status_breakdown = {
+        status or "Unknown": int(count) for status, count in metrics["status"].items() if count
+    }
+    hh_candidates = int(metrics["source"].get("hh", 0))
+    manual_candidates = int(metrics["source"].get("manual", 0))
+    derived = await analytics_engine.owner_metrics(
+        db, current_user.id, current_user.subscription_tier, metrics["version"].get("", 0)
+    )
 
     return {
         "active_vacancies": total_vacancies,
@@ -60,29 +54,66 @@ def get_analytics(
             "hh_ru": hh_candidates,
             "manual": manual_candidates
         },
-        "top_skills": ["Python", "FastAPI", "React", "AI Integration"],
-        "metrics": {
-            "time_to_hire": 14, # Placeholder: Avg days to close vacancy (mocked)
-            "funnel_conversion": {
-                "new_to_screened": 85,
-                "screened_to_interview": 40,
-                "interview_to_offer": 15
-            },
-            "response_rate": 65, # Mock: % of candidates who replied
-            "cost_per_hire": 50000 # Mock: Estimated cost
-        }
+        "top_skills": derived["top_skills"],
+        "metrics": derived["metrics"]
     }
-    # except Exception as e:
-    #     import traceback
-    #     traceback.print_exc()
-    #     raise e
+
+def export_response(owner_id: int, fmt: str, vacancy_id: Optional[int] = None) -> StreamingResponse:
+    """Streaming download of the owner's candidates; shared with /candidates/export."""
+    if fmt not in candidate_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(candidate_export.FORMATS)}")
+    if not candidate_export.is_available(fmt):
+        raise HTTPException(status_code=501, detail=f"{fmt} export is not installed on this server")
+
+    writer = candidate_export.FORMATS[fmt]
+    return StreamingResponse(
+        candidate_export.stream_export(owner_id, fmt, vacancy_id),
+        media_type=writer.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{candidate_export.filename(fmt, vacancy_id)}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
 
 @router.get("/export")
-def export_analytics(
-    db: Session = Depends(deps.get_db),
+async def export_analytics(
+    fmt: str = Query("csv", alias="format"),
+    vacancy_id: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Mock export function.
+    Download the current user's candidates with scores, skills and statuses
+    (all vacancies, or one with `vacancy_id`) as csv, xlsx or parquet.
+    Streamed in constant memory, whatever the number of candidates.
     """
-    return {"message": "CSV Export feature - check console or download mock"}
+    if vacancy_id is not None:
+        vacancy = await db.scalar(select(Vacancy.id).where(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id))
+        if not vacancy:
+            raise HTTPException(status_code=404, detail="Vacancy not found")
+    return export_response(current_user.id, fmt, vacancy_id)
+
+@router.get("/analysis-cache")
+def get_analysis_cache_stats(
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Hit/miss counters and size of the LLM analysis cache.
+    The cache has its own sync sessions, so this stays on the threadpool.
+    """
+    from app.services.analysis_cache import analysis_cache
+    return analysis_cache.stats()
+
+@router.get("/prompt-budget")
+async def get_prompt_budget_stats(
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Estimated prompt tokens before and after trimming to the configured
+    budgets, per call site (analysis, chat, hr_ask), since the process started.
+    """
+    from app.services.prompt_builder import prompt_metrics
+    return {
+        "analysis_token_budget": settings.PROMPT_ANALYSIS_TOKEN_BUDGET,
+        "calls": prompt_metrics.stats(),
+    }
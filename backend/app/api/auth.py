@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.core import security
 from app.core.config import settings
@@ -12,20 +14,30 @@ from app.schemas.user import Token, UserCreate, User as UserSchema
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    db: AsyncSession = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    valid, new_hash = False, None
+    if user:
+        # bcrypt is CPU-bound; it runs on its own thread pool
+        valid, new_hash = await security.password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=400, detail="Incorrect email or password"
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    
+    if new_hash:
+        # Stored with another BCRYPT_ROUNDS: upgrade it while we have the password
+        user.hashed_password = new_hash
+        await db.commit()
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
@@ -35,15 +47,15 @@ def login_access_token(
     }
 
 @router.post("/register", response_model=UserSchema)
-def register_user(
+async def register_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_in: UserCreate,
 ) -> Any:
     """
     Create new user.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await db.scalar(select(User).where(User.email == user_in.email))
     if user:
         raise HTTPException(
             status_code=400,
@@ -51,21 +63,21 @@ def register_user(
         )
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.password_hasher.hash(user_in.password),
         full_name=user_in.full_name,
         is_active=True,
         trial_start_date=datetime.utcnow(),
         subscription_tier="FREE",
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 # HH.ru OAuth Endpoints
 
 @router.get("/hh/authorize")
-def authorize_hh(
+async def authorize_hh(
     current_user: User = Depends(deps.get_current_user),
 ):
     """Returns the authorization URL for HH.ru with state for security."""
@@ -76,14 +88,14 @@ def authorize_hh(
     return {"url": auth_url}
 
 @router.get("/hh/callback")
-def callback_hh(
+async def callback_hh(
     code: str,
     state: str = None,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
 ):
     """Handles callback, exchanges code, and saves token to user matching state."""
     from app.services.hh import hh_service
-    token_data = hh_service.get_token(code)
+    token_data = await run_in_threadpool(hh_service.get_token, code)
     
     if "error" in token_data:
         raise HTTPException(status_code=400, detail=f"HH.ru Error: {token_data['error']}")
@@ -92,14 +104,14 @@ def callback_hh(
         raise HTTPException(status_code=400, detail="Missing state parameter")
     
     # Update user in DB
-    user = db.query(User).filter(User.id == int(state)).first()
+    user = await db.get(User, int(state))
     if not user:
          raise HTTPException(status_code=404, detail="User in state not found")
          
     user.hh_access_token = token_data.get("access_token")
     user.hh_refresh_token = token_data.get("refresh_token")
     db.add(user)
-    db.commit()
+    await db.commit()
     
     # Redirect back to frontend settings or dashboard
     from fastapi.responses import RedirectResponse
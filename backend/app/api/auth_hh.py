@@ -2,8 +2,10 @@
 import requests
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.core.config import settings
 from app.core import security
@@ -16,7 +18,7 @@ HH_TOKEN_URL = "https://hh.ru/oauth/token"
 HH_USER_INFO_URL = "https://api.hh.ru/me"
 
 @router.get("/login")
-def login_hh():
+async def login_hh():
     """
     Redirects user to HH.ru for authentication.
     """
@@ -28,12 +30,13 @@ def login_hh():
     )
 
 @router.get("/callback")
-def callback_hh(code: str, db: Session = Depends(deps.get_db)):
+async def callback_hh(code: str, db: AsyncSession = Depends(deps.get_db)):
     """
     Callback from HH.ru. Exchanges code for token and logs in/creates user.
     """
     # 1. Exchange code for token
-    token_resp = requests.post(
+    token_resp = await run_in_threadpool(
+        requests.post,
         HH_TOKEN_URL,
         data={
             "grant_type": "authorization_code",
@@ -51,7 +54,8 @@ def callback_hh(code: str, db: Session = Depends(deps.get_db)):
     access_token = token_data.get("access_token")
     
     # 2. Get User Info
-    user_resp = requests.get(
+    user_resp = await run_in_threadpool(
+        requests.get,
         HH_USER_INFO_URL,
         headers={"Authorization": f"Bearer {access_token}", "User-Agent": "NexusAi/1.0"}
     )
@@ -69,7 +73,7 @@ def callback_hh(code: str, db: Session = Depends(deps.get_db)):
         email = f"hh_{hh_id}@example.com"
         
     # 3. Find or Create User
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         # Create new user
         # Generate random password since they use OAuth
@@ -77,12 +81,12 @@ def callback_hh(code: str, db: Session = Depends(deps.get_db)):
         random_password = secrets.token_urlsafe(16)
         user = User(
             email=email,
-            hashed_password=security.get_password_hash(random_password),
+            hashed_password=await security.password_hasher.hash(random_password),
             is_active=True
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
     # 4. Create JWT Token for our app
     from datetime import timedelta
@@ -1,14 +1,23 @@
 
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from sqlalchemy.orm import Session
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, File, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app.models.candidate import Candidate
+from app.api.analytics import export_response
+from app.core.config import settings
+from app.models.candidate import Candidate, CANDIDATE_STATUSES
 from app.models.vacancy import Vacancy
 from app.models.user import User
-from app.schemas.candidate import Candidate as CandidateSchema
-# from app.services.gemini import analyze_resume
-from app.services.openrouter import analyze_resume
+from app.schemas.candidate import Candidate as CandidateSchema, CandidatePage, CandidateStatusUpdate, BulkUploadResult
+from app.schemas.job import AnalysisJob as AnalysisJobSchema
+from app.services import bulk_upload, hh_sync, resume_store
+from app.services.job_queue import analysis_job_queue
+from app.services.resume_parser import ResumeParseError, resume_parser_pool
 from app.services.subscription import subscription_service
 
 router = APIRouter()
@@ -17,18 +26,19 @@ router = APIRouter()
 async def upload_candidate(
     vacancy_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Upload a resume file and create a candidate entry.
     Supports PDF, DOCX, and TXT formats.
     """
-    vacancy = db.query(Vacancy).filter(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=404, detail="Vacancy not found")
 
     # Check subscription limits
+    await deps.refresh_quota(db, current_user)
     if not subscription_service.can_upload_resume(current_user):
         status = subscription_service.get_subscription_status(current_user)
         raise HTTPException(
@@ -41,133 +51,213 @@ async def upload_candidate(
         )
 
     content_bytes = await file.read()
-    
-    # Use resume parser for proper text extraction
-    from app.services.resume_parser import parse_resume
-    content_text = parse_resume(file.filename, content_bytes)
+    if len(content_bytes) > settings.RESUME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File is too large (limit {settings.RESUME_MAX_BYTES} bytes)")
+
+    # Identical files are parsed once and shared through resume_blob
+    resume_hash = resume_store.content_hash(content_bytes)
+    if not await resume_store.get_hashes(db, [resume_hash]):
+        # Use resume parser for proper text extraction (off the event loop)
+        try:
+            content_text = await resume_parser_pool.parse(file.filename, content_bytes)
+        except ResumeParseError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        await resume_store.save_texts(db, {resume_hash: {"content": content_text, "size_bytes": len(content_bytes)}})
 
     candidate = Candidate(
         vacancy_id=vacancy_id,
         filename=file.filename,
-        content=content_text
+        resume_hash=resume_hash
     )
+    # Take the quota slot in the same transaction as the candidate; a
+    # concurrent upload may have used the last one since the check above
+    if not await subscription_service.reserve_resumes(db, current_user):
+        status = subscription_service.get_subscription_status(current_user)
+        raise HTTPException(
+            status_code=402,
+            detail={
+                "error": "SUBSCRIPTION_LIMIT_REACHED",
+                "current_tier": status["tier"],
+                "limit": status["limit"]
+            }
+        )
     db.add(candidate)
-    
-    # Record resume usage
-    subscription_service.record_resume_usage(current_user)
-    
-    db.commit()
-    db.refresh(candidate)
+    await db.commit()
+    await db.refresh(candidate, ["resume_blob"])
     return candidate
 
-@router.post("/{candidate_id}/analyze", response_model=CandidateSchema)
-def analyze_candidate(
+@router.post("/upload-bulk", response_model=BulkUploadResult)
+async def upload_candidates_bulk(
+    vacancy_id: int,
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Upload many resumes at once: ZIP archives and/or several PDF, DOCX and
+    TXT files. Duplicate files are imported once; files beyond the
+    subscription quota are skipped and reported.
+    """
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id))
+    if not vacancy:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
+
+    # Check subscription limits once for the whole batch
+    await deps.refresh_quota(db, current_user)
+    if not subscription_service.can_upload_resume(current_user):
+        status = subscription_service.get_subscription_status(current_user)
+        raise HTTPException(
+            status_code=402,
+            detail={
+                "error": "SUBSCRIPTION_LIMIT_REACHED",
+                "current_tier": status["tier"],
+                "limit": status["limit"]
+            }
+        )
+
+    try:
+        return await bulk_upload.import_resumes(db, vacancy, current_user, files)
+    except bulk_upload.BulkUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{candidate_id}/analyze", response_model=AnalysisJobSchema, status_code=202)
+async def analyze_candidate(
     candidate_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Trigger AI analysis for a candidate.
+    Queue AI analysis for a candidate.
+    Returns the background job; poll GET /jobs/{id} or stream /jobs/{id}/events.
     """
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    candidate = await db.get(Candidate, candidate_id)
     if not candidate:
          raise HTTPException(status_code=404, detail="Candidate not found")
     
     # Verify ownership through vacancy
-    vacancy = db.query(Vacancy).filter(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Fetch AI Settings
-    from app.models.ai_settings import AISettings
-    from app.core.config import settings as app_settings
-    ai_settings = db.query(AISettings).filter(AISettings.user_id == current_user.id).first()
-    
-    # Use settings if available, otherwise defaults
-    system_prompt = ai_settings.system_prompt if ai_settings else None
-    model = ai_settings.model_name if ai_settings else app_settings.AI_MODEL_NAME
-    temperature = ai_settings.temperature if ai_settings else 0.7
-
-    # Call AI Service
-    result = analyze_resume(
-        vacancy_description=vacancy.description, 
-        resume_text=candidate.content,
-        system_prompt=system_prompt,
-        model=model,
-        temperature=temperature
+    ai_config = await deps.get_ai_config(db, current_user.id)
+    return await analysis_job_queue.enqueue(db, candidate, vacancy, current_user.id, ai_config)
+
+LIST_COLUMNS = (
+    Candidate.id, Candidate.vacancy_id, Candidate.filename, Candidate.score, Candidate.status, Candidate.summary,
+    Candidate.recommendation, Candidate.skills_match, Candidate.missing_skills, Candidate.hh_resume_id,
+)
+
+def _encode_cursor(candidate: Candidate) -> str:
+    return base64.urlsafe_b64encode(json.dumps([candidate.score, candidate.id]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[float], int]:
+    try:
+        score, candidate_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (None if score is None else float(score)), int(candidate_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/", response_model=CandidatePage)
+async def read_candidates(
+    vacancy_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    List candidates for a vacancy, sorted by AI score descending, a page at
+    a time: pass `next_cursor` back as `cursor` for the next page. Rows
+    leave out the resume text and screening questions; see /candidates/{id}.
+    Candidates without a score come last.
+    """
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id))
+    if not vacancy:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
+
+    query = select(Candidate).where(Candidate.vacancy_id == vacancy_id).options(
+        load_only(*LIST_COLUMNS), raiseload(Candidate.resume_blob)
     )
-    
-    candidate.score = result.score
-    candidate.skills_match = result.skills_match
-    candidate.missing_skills = result.missing_skills
-    candidate.summary = result.summary
-    candidate.recommendation = result.recommendation
-    candidate.screening_questions = result.screening_questions
-    
-    # Automatically post the first screening question to candidate's chat
-    if result.screening_questions and len(result.screening_questions) > 0:
-        from app.models.chat import ChatMessage
-        # Check if we already have messages to avoid duplicate greetings
-        existing_msg = db.query(ChatMessage).filter(ChatMessage.candidate_id == candidate.id).first()
-        if not existing_msg:
-            # HR Agent Intro + First Question
-            intro = f"Здравствуйте! Я ваш ИИ-рекрутер. Я ознакомился с вашим резюме на позицию '{vacancy.title}'. У меня есть несколько уточняющих вопросов:\n\n"
-            full_msg = intro + result.screening_questions[0]
-            db.add(ChatMessage(candidate_id=candidate.id, role="assistant", content=full_msg))
-
-    db.commit()
-    db.refresh(candidate)
-    return candidate
+    if status is not None:
+        query = query.where(Candidate.status == status)
+    if min_score is not None:
+        query = query.where(Candidate.score >= min_score)
+    if max_score is not None:
+        query = query.where(Candidate.score <= max_score)
+    after_score, after_id = _decode_cursor(cursor) if cursor else (None, None)
+
+    # Scored candidates in (score, id) order, then the unscored ones by id:
+    # both parts are range scans of ix_candidates_vacancy_id_score_id
+    items = []
+    if after_id is None or after_score is not None:
+        scored = query.where(Candidate.score.isnot(None))
+        if after_id is not None:
+            scored = scored.where(or_(
+                Candidate.score < after_score,
+                and_(Candidate.score == after_score, Candidate.id < after_id),
+            ))
+        items = list(await db.scalars(scored.order_by(Candidate.score.desc(), Candidate.id.desc()).limit(limit + 1)))
+    if len(items) <= limit and min_score is None and max_score is None:
+        unscored = query.where(Candidate.score.is_(None))
+        if after_id is not None and after_score is None:
+            unscored = unscored.where(Candidate.id < after_id)
+        items += list(await db.scalars(unscored.order_by(Candidate.id.desc()).limit(limit + 1 - len(items))))
+
+    next_cursor = _encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return {"items": items[:limit], "next_cursor": next_cursor}
 
-@router.get("/", response_model=List[CandidateSchema])
-def read_candidates(
+@router.get("/export")
+async def export_candidates(
     vacancy_id: int,
-    db: Session = Depends(deps.get_db),
+    fmt: str = Query("csv", alias="format"),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    List candidates for a vacancy, sorted by AI score descending.
+    Download a vacancy's candidate list as csv, xlsx or parquet (streamed).
     """
-    vacancy = db.query(Vacancy).filter(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy.id).where(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=404, detail="Vacancy not found")
-    
-    return db.query(Candidate).filter(Candidate.vacancy_id == vacancy_id).order_by(Candidate.score.desc()).all()
+    return export_response(current_user.id, fmt, vacancy_id)
 
 @router.get("/{candidate_id}", response_model=CandidateSchema)
-def read_candidate_detail(
+async def read_candidate_detail(
     candidate_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    vacancy = db.query(Vacancy).join(Candidate).filter(Candidate.id == candidate_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(
+        select(Vacancy).join(Candidate).where(Candidate.id == candidate_id, Vacancy.owner_id == current_user.id)
+    )
     if not vacancy:
          raise HTTPException(status_code=404, detail="Candidate not found")
     
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
-    return candidate
+    return await db.get(Candidate, candidate_id, options=[joinedload(Candidate.resume_blob)])
 
 @router.post("/sync-hh", response_model=List[CandidateSchema])
-def sync_candidates_hh(
+async def sync_candidates_hh(
     vacancy_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Sync candidates from HH.ru for a specific vacancy.
     """
-    vacancy = db.query(Vacancy).filter(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == vacancy_id, Vacancy.owner_id == current_user.id))
     if not vacancy or not vacancy.hh_id:
         raise HTTPException(status_code=400, detail="Vacancy not published to HH.ru or not found")
 
     if not current_user.hh_access_token:
         raise HTTPException(status_code=401, detail="HH.ru account not connected. Please authorize.")
 
-    from app.services.hh import hh_service
-    
     # Check subscription limits for HH sync
     # We briefly check if they can upload AT LEAST ONE. 
     # In a full impl, we'd check how many they are syncing vs how many left.
+    await deps.refresh_quota(db, current_user)
     if not subscription_service.can_upload_resume(current_user):
         status = subscription_service.get_subscription_status(current_user)
         raise HTTPException(
@@ -179,72 +269,63 @@ def sync_candidates_hh(
             }
         )
 
-    responses = hh_service.get_responses(vacancy.hh_id, token=current_user.hh_access_token)
-    
-    new_candidates = []
-    for resp in responses:
-        # Check if already exists
-        existing = db.query(Candidate).filter(Candidate.hh_resume_id == resp["hh_resume_id"]).first()
-        if not existing:
-            new_candidates.append(Candidate(
-                vacancy_id=vacancy_id,
-                filename=f"HH_Resume_{resp['hh_resume_id']}.txt",
-                content=resp["content"],
-                hh_resume_id=resp["hh_resume_id"],
-                status="NEW"
-            ))
-    
-    if new_candidates:
-        # Check if we exceeded limit during sync
-        # Process only as many as the limit allows
-        status = subscription_service.get_subscription_status(current_user)
-        remaining = status["limit"] - status["used"]
-        
-        to_process = new_candidates[:remaining]
-        
-        # Re-verify the list to process
-        actual_new = []
-        for c in to_process:
-            db.add(c)
-            subscription_service.record_resume_usage(current_user)
-            actual_new.append(c)
-
-        db.commit()
-        for c in actual_new:
-            db.refresh(c)
-        
-        if len(new_candidates) > remaining:
-            # Maybe return a partial success?
-            pass
-            
+    await hh_sync.sync_vacancy(db, vacancy, current_user)
+
     # Return all candidates for this vacancy, sorted
-    return db.query(Candidate).filter(Candidate.vacancy_id == vacancy_id).order_by(Candidate.score.desc()).all()
+    candidates = await db.scalars(
+        select(Candidate).where(Candidate.vacancy_id == vacancy_id)
+        .options(selectinload(Candidate.resume_blob)).order_by(Candidate.score.desc())
+    )
+    return candidates.all()
+
+@router.patch("/{candidate_id}/status", response_model=CandidateSchema)
+async def update_candidate_status(
+    candidate_id: int,
+    status_in: CandidateStatusUpdate,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Move a candidate through the pipeline (NEW, SHORTLIST, APPROVED, REJECTED).
+    Every change is recorded in the status history used by the analytics funnel.
+    """
+    if status_in.status not in CANDIDATE_STATUSES:
+        raise HTTPException(status_code=422, detail=f"Status must be one of: {', '.join(CANDIDATE_STATUSES)}")
+
+    candidate = await db.get(Candidate, candidate_id, options=[joinedload(Candidate.resume_blob)])
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id))
+    if not vacancy:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    candidate.status = status_in.status
+    await db.commit()
+    return candidate
 
 @router.post("/{candidate_id}/generate_outreach")
-def generate_outreach(
+async def generate_outreach(
     candidate_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Generate an AI outreach message for the candidate.
     """
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    candidate = await db.get(Candidate, candidate_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
         
-    vacancy = db.query(Vacancy).filter(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     from app.services.ai_outreach import ai_outreach_service
-    # Fetch AI Settings
-    from app.models.ai_settings import AISettings
-    from app.core.config import settings as app_settings
-    ai_settings = db.query(AISettings).filter(AISettings.user_id == current_user.id).first()
-    model = ai_settings.model_name if ai_settings else app_settings.AI_MODEL_NAME
+    # AI Settings (usually cached with the user)
+    model = (await deps.get_ai_config(db, current_user.id))["model"]
 
-    message = ai_outreach_service.generate_message(
+    message = await ai_outreach_service.generate_message(
         candidate_name=candidate.filename.replace(".txt", "").replace("HH_Resume_", "Candidate"),
         vacancy_title=vacancy.title,
         skills=candidate.skills_match,
@@ -254,16 +335,16 @@ def generate_outreach(
     return {"message": message}
 
 @router.post("/{candidate_id}/send_outreach")
-def send_outreach(
+async def send_outreach(
     candidate_id: int,
     message_data: dict, # {"message": "..."}
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Send the outreach message via HH.ru service.
     """
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    candidate = await db.get(Candidate, candidate_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
     
@@ -271,10 +352,11 @@ def send_outreach(
         # Mock send for local files
         return {"status": "sent", "mock": True, "note": "Local candidate, message logged."}
 
-    vacancy = db.query(Vacancy).filter(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == candidate.vacancy_id, Vacancy.owner_id == current_user.id))
     
     from app.services.hh import hh_service
-    result = hh_service.send_message(
+    result = await run_in_threadpool(
+        hh_service.send_message,
         hh_resume_id=candidate.hh_resume_id,
         message=message_data["message"],
         vacancy_id=vacancy.hh_id if vacancy and vacancy.hh_id else "test",
@@ -284,7 +366,7 @@ def send_outreach(
     return result
 
 @router.get("/subscription/status")
-def get_subscription_status(
+async def get_subscription_status(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
@@ -1,8 +1,18 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.api import deps
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
 from app.models.chat import ChatMessage
+from app.models.candidate import Candidate
+from app.models.vacancy import Vacancy
+from app.services.prompt_builder import fit_chat_context
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -23,29 +33,190 @@ class ChatMessageCreate(BaseModel):
     role: str
     content: str
 
+CHAT_SYSTEM_MESSAGE = """Вы - экспертный HR AI ассистент.
+Ваши цели в этом чате:
+1. Уточнить готовность кандидата к конкретным условиям вакансии (з/п, график, задачи).
+2. Провести "Technical/Skill Check" - задайте точечный вопрос по одному из навыков, заявленных в резюме, чтобы убедиться в компетенции.
+3. Оцените мотивацию.
+
+Будьте вежливы, но профессионально-критичны. Ориентируйтесь на веса навыков (Skill Weights) - чем выше вес, тем важнее этот навык проверить. Общайтесь только на русском языке."""
+
+HR_SYSTEM_MESSAGE = "Вы - эксперт HR-аналитик. Рекрутер задает вам вопросы о кандидате. Дайте честный, развернутый и полезный ответ на русском языке. Используйте метрики и факты из резюме."
+
+async def _candidate_chat_prompt(db: AsyncSession, candidate: Candidate, message_text: str,
+                                 model: Optional[str] = None) -> str:
+    """Контекст кандидата и вакансии + сообщение кандидата для AI рекрутера."""
+    vacancy = await db.get(Vacancy, candidate.vacancy_id)
+    # Описание и резюме сокращаются до бюджета токенов (PROMPT_CHAT_*)
+    description, resume = fit_chat_context(
+        vacancy.description if vacancy else None,
+        None if candidate.summary else candidate.resume_text,
+        "chat",
+        model,
+    )
+
+    # Построить контекст для AI
+    context = f"""Вакансия: {vacancy.title if vacancy else 'N/A'}
+Описание: {description if vacancy else 'N/A'}
+Зарплата: {vacancy.salary_range if vacancy and vacancy.salary_range else 'Не указана'}
+Веса навыков (Skill Weights): {vacancy.skill_weights if vacancy and vacancy.skill_weights else 'Standard'}
+
+Резюме кандидата: {candidate.summary or resume}
+
+Ранее заданные вопросы скрининга:
+"""
+    if candidate.screening_questions:
+        for i, q in enumerate(candidate.screening_questions[:3], 1):
+            context += f"{i}. {q}\n"
+
+    return f"""{context}
+
+Сообщение от кандидата: {message_text}
+
+Действуйте как HR AI. Проанализируйте ответ. Если это начало чата - поприветствуйте и уточните готовность к требованиям вакансии. Если чат продолжается - проведите мини-проверку заявленных навыков. Дайте лаконичный, человечный ответ."""
+
+async def _hr_ask_prompt(db: AsyncSession, candidate: Candidate, question: str,
+                         model: Optional[str] = None) -> str:
+    """Контекст кандидата и вопрос рекрутера для HR-аналитика."""
+    vacancy = await db.get(Vacancy, candidate.vacancy_id)
+    description, resume = fit_chat_context(
+        vacancy.description if vacancy else None,
+        None if candidate.summary else candidate.resume_text,
+        "hr_ask",
+        model,
+    )
+
+    context = f"""Вакансия: {vacancy.title if vacancy else 'N/A'}
+Описание: {description if vacancy else 'N/A'}
+Зарплата: {vacancy.salary_range if vacancy and vacancy.salary_range else 'Не указана'}
+Требуемые навыки: {vacancy.required_skills if vacancy else 'N/A'}
+
+Кандидат: {candidate.filename}
+Резюме: {candidate.summary or resume}
+Skills Match: {candidate.skills_match}
+Missing Skills: {candidate.missing_skills}
+"""
+
+    return f"""Контекст:
+{context}
+
+Вопрос рекрутера: {question}
+
+Ответ:"""
+
+async def _user_model(db: AsyncSession, user_id: int) -> Tuple[str, float]:
+    """Модель и температура из AI Settings пользователя (обычно из кэша пользователя)."""
+    ai_config = await deps.get_ai_config(db, user_id)
+    return ai_config["model"], ai_config["temperature"]
+
+async def _stream_ai_reply(
+    system_message: str,
+    user_prompt: str,
+    model: str,
+    temperature: float,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Потоковый ответ AI: GigaChat, если выбран, иначе (или при ошибке до первого
+    фрагмента) OpenRouter.
+    """
+    messages = [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": user_prompt}
+    ]
+
+    if (model == "GigaChat" or settings.USE_GIGACHAT) and settings.GIGACHAT_API_KEY:
+        produced = False
+        try:
+            from app.services.gigachat import gigachat_service
+            async for delta in gigachat_service.stream_chat_completion(messages, temperature=temperature):
+                produced = True
+                yield delta
+        except Exception as e:
+            if produced:
+                raise
+            print(f"⚠️ GigaChat stream error, fallback to OpenRouter: {e}")
+        if produced:
+            return
+
+    if settings.OPENROUTER_API_KEY:
+        from app.services.llm_client import llm_gateway
+        fallback_model = model if model != "GigaChat" else settings.AI_MODEL_NAME
+        async for delta in llm_gateway.openrouter_stream(
+            messages, model=fallback_model, temperature=temperature, timeout=timeout
+        ):
+            yield delta
+
+AI_UNAVAILABLE = "Извините, AI сейчас недоступен."
+AI_INTERRUPTED = "Ответ AI прервался, попробуйте ещё раз."
+
+# How often a stream waiting on the model checks whether the client is still there
+DISCONNECT_POLL_SECONDS = 1.0
+
+class ClientDisconnected(Exception):
+    pass
+
+async def _relay_reply(deltas: AsyncIterator[str], request: Request, reply: List[str]) -> AsyncIterator[str]:
+    """
+    Пересылает фрагменты ответа AI как SSE-события `delta`, собирая их в `reply`.
+    Отключение клиента проверяется и пока модель молчит: тогда поток к модели
+    закрывается и поднимается ClientDisconnected. Ошибки модели пробрасываются.
+    """
+    pending = None
+    try:
+        while True:
+            pending = asyncio.ensure_future(deltas.__anext__())
+            while not (await asyncio.wait({pending}, timeout=DISCONNECT_POLL_SECONDS))[0]:
+                if await request.is_disconnected():
+                    raise ClientDisconnected()
+            try:
+                delta = pending.result()
+            except StopAsyncIteration:
+                return
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+            reply.append(delta)
+            yield _sse("delta", {"content": delta})
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        # Closes the upstream response, which cancels generation on the provider side
+        await deltas.aclose()
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def _sse_response(stream: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/{candidate_id}", response_model=List[ChatMessageSchema])
-def get_chat_history(
+async def get_chat_history(
     candidate_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user),
 ):
     """Получить историю чата с кандидатом (хранится в БД)"""
-    messages = db.query(ChatMessage).filter(
+    messages = await db.scalars(select(ChatMessage).where(
         ChatMessage.candidate_id == candidate_id
-    ).order_by(ChatMessage.created_at.asc()).all()
-    return messages
+    ).order_by(ChatMessage.created_at.asc()))
+    return messages.all()
 
 @router.post("/", response_model=ChatMessageSchema)
-def create_chat_message(
+async def create_chat_message(
     msg: ChatMessageCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user),
 ):
     """
     Отправить сообщение в чат.
     """
     is_init = msg.content == "AI_START"
-    
+
     if not is_init:
         # Сохранить сообщение (пользователя или ассистента)
         db_msg = ChatMessage(
@@ -54,112 +225,63 @@ def create_chat_message(
             content=msg.content
         )
         db.add(db_msg)
-        db.commit()
-        db.refresh(db_msg)
+        await db.commit()
+        await db.refresh(db_msg)
     else:
-        # Если это инициация, создаем фиктивное сообщение для возврата, 
+        # Если это инициация, создаем фиктивное сообщение для возврата,
         # но оно будет перезаписано ответом AI ниже
         db_msg = ChatMessage(id=0, candidate_id=msg.candidate_id, role='assistant', content='AI thinking...', created_at=datetime.utcnow())
 
     # Генерировать ответ AI если роль user или это инициация
     if msg.role == 'user' or is_init:
-        from app.models.candidate import Candidate
-        from app.models.vacancy import Vacancy
-        from app.core.config import settings
-        
         # Получить контекст кандидата и вакансии
-        candidate = db.query(Candidate).filter(Candidate.id == msg.candidate_id).first()
+        candidate = await db.get(Candidate, msg.candidate_id, options=[joinedload(Candidate.resume_blob)])
         if candidate:
-            vacancy = db.query(Vacancy).filter(Vacancy.id == candidate.vacancy_id).first()
-            
-            # Построить контекст для AI
-            context = f"""Вакансия: {vacancy.title if vacancy else 'N/A'}
-Описание: {vacancy.description[:300] if vacancy else 'N/A'}...
-Зарплата: {vacancy.salary_range if vacancy and vacancy.salary_range else 'Не указана'}
-Веса навыков (Skill Weights): {vacancy.skill_weights if vacancy and vacancy.skill_weights else 'Standard'}
-
-Резюме кандидата: {candidate.summary or candidate.content[:500]}...
-
-Ранее заданные вопросы скрининга:
-"""
-            if candidate.screening_questions:
-                for i, q in enumerate(candidate.screening_questions[:3], 1):
-                    context += f"{i}. {q}\n"
-            
-            # Подготовить сообщения для AI
-            system_message = """Вы - экспертный HR AI ассистент. 
-Ваши цели в этом чате:
-1. Уточнить готовность кандидата к конкретным условиям вакансии (з/п, график, задачи).
-2. Провести "Technical/Skill Check" - задайте точечный вопрос по одному из навыков, заявленных в резюме, чтобы убедиться в компетенции.
-3. Оцените мотивацию.
-
-Будьте вежливы, но профессионально-критичны. Ориентируйтесь на веса навыков (Skill Weights) - чем выше вес, тем важнее этот навык проверить. Общайтесь только на русском языке."""
+            system_message = CHAT_SYSTEM_MESSAGE
 
-            user_prompt = f"""{context}
-
-Сообщение от кандидата: {msg.content}
-
-Действуйте как HR AI. Проанализируйте ответ. Если это начало чата - поприветствуйте и уточните готовность к требованиям вакансии. Если чат продолжается - проведите мини-проверку заявленных навыков. Дайте лаконичный, человечный ответ."""
-            
             # Fetch AI Settings for current user
-            from app.models.ai_settings import AISettings
-            ai_settings = db.query(AISettings).filter(AISettings.user_id == current_user.id).first()
-            
-            selected_model = ai_settings.model_name if ai_settings else settings.AI_MODEL_NAME
-            ai_temp = ai_settings.temperature if ai_settings else 0.7
-            
+            selected_model, ai_temp = await _user_model(db, current_user.id)
+            user_prompt = await _candidate_chat_prompt(db, candidate, msg.content, selected_model)
+
             ai_content = None
-            
+
             # Try GigaChat if explicitly selected or if global toggle is ON
             if (selected_model == "GigaChat" or settings.USE_GIGACHAT) and settings.GIGACHAT_API_KEY:
                 try:
                     from app.services.gigachat import get_gigachat_response
-                    
+
                     messages = [
                         {"role": "system", "content": system_message},
                         {"role": "user", "content": user_prompt}
                     ]
-                    
-                    ai_content = get_gigachat_response(messages, temperature=ai_temp)
-                    
+
+                    ai_content = await get_gigachat_response(messages, temperature=ai_temp)
+
                     if ai_content:
                         print(f"✅ Использован GigaChat для ответа (модель: {selected_model})")
                 except Exception as e:
                     print(f"⚠️ GigaChat error, fallback to OpenRouter: {e}")
-            
+
             # Fallback to OpenRouter or default model
             if not ai_content and settings.OPENROUTER_API_KEY:
                 # If GigaChat was failed but selected, we fallback to DeepSeek
                 fallback_model = selected_model if selected_model != "GigaChat" else settings.AI_MODEL_NAME
                 try:
-                    import requests
-                    
-                    response = requests.post(
-                        "https://openrouter.ai/api/v1/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": fallback_model,
-                            "messages": [
-                                {"role": "system", "content": system_message},
-                                {"role": "user", "content": user_prompt}
-                            ],
-                            "temperature": ai_temp
-                        },
-                        timeout=30
+                    from app.services.llm_client import llm_gateway
+
+                    ai_content = await llm_gateway.openrouter_chat(
+                        [
+                            {"role": "system", "content": system_message},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        model=fallback_model,
+                        temperature=ai_temp
                     )
-                    
-                    if response.status_code == 200:
-                        ai_content = response.json()["choices"][0]["message"]["content"]
-                        print("✅ Использован OpenRouter для ответа")
-                    else:
-                        print(f"❌ OpenRouter error: {response.status_code}")
-                        
+                    print("✅ Использован OpenRouter для ответа")
+
                 except Exception as e:
                     print(f"❌ OpenRouter exception: {e}")
-            
+
             # Сохранить ответ AI если сгенерирован
             if ai_content:
                 ai_msg = ChatMessage(
@@ -168,64 +290,114 @@ def create_chat_message(
                     content=ai_content
                 )
                 db.add(ai_msg)
-                db.commit()
+                await db.commit()
+                await db.refresh(ai_msg)
                 if is_init:
                     db_msg = ai_msg
                 print(f"💾 История чата сохранена в БД (candidate_id={msg.candidate_id})")
-    
+
     return db_msg
 
+@router.post("/stream")
+async def stream_chat_message(
+    msg: ChatMessageCreate,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_active_user),
+):
+    """
+    Потоковый вариант POST /chat/ (Server-Sent Events).
+    События: `delta` {"content": фрагмент}, `done` (сохранённое сообщение AI или
+    сообщение пользователя, если ответ AI не требуется), `error`.
+    Ответ AI сохраняется в БД после завершения потока; если поток модели
+    оборвался, приходит `error`, а неполный ответ не сохраняется. При
+    отключении клиента запрос к модели отменяется.
+    """
+    candidate = await db.get(Candidate, msg.candidate_id, options=[joinedload(Candidate.resume_blob)])
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    is_init = msg.content == "AI_START"
+    user_msg_payload = None
+    if not is_init:
+        db_msg = ChatMessage(
+            candidate_id=msg.candidate_id,
+            role=msg.role,
+            content=msg.content
+        )
+        db.add(db_msg)
+        await db.commit()
+        await db.refresh(db_msg)
+        user_msg_payload = ChatMessageSchema.model_validate(db_msg, from_attributes=True).model_dump()
+
+    needs_reply = msg.role == 'user' or is_init
+    if needs_reply:
+        model, temperature = await _user_model(db, current_user.id)
+        user_prompt = await _candidate_chat_prompt(db, candidate, msg.content, model)
+    candidate_id = candidate.id
+
+    async def event_stream():
+        if not needs_reply:
+            yield _sse("done", user_msg_payload)
+            return
+
+        parts = []
+        try:
+            async for event in _relay_reply(
+                _stream_ai_reply(CHAT_SYSTEM_MESSAGE, user_prompt, model, temperature), request, parts
+            ):
+                yield event
+        except ClientDisconnected:
+            return
+        except Exception as e:
+            # A reply cut off mid-way is not saved to the history
+            print(f"❌ Chat stream exception: {e}")
+            yield _sse("error", {"detail": AI_INTERRUPTED if parts else AI_UNAVAILABLE})
+            return
+
+        ai_content = "".join(parts)
+        if not ai_content:
+            yield _sse("error", {"detail": AI_UNAVAILABLE})
+            return
+
+        async with AsyncSessionLocal() as save_db:
+            ai_msg = ChatMessage(candidate_id=candidate_id, role='assistant', content=ai_content)
+            save_db.add(ai_msg)
+            await save_db.commit()
+            await save_db.refresh(ai_msg)
+            payload = ChatMessageSchema.model_validate(ai_msg, from_attributes=True).model_dump()
+        print(f"💾 История чата сохранена в БД (candidate_id={candidate_id})")
+        yield _sse("done", payload)
+
+    return _sse_response(event_stream())
+
 
 class HRAskSchema(BaseModel):
     candidate_id: int
     question: str
 
 @router.post("/hr_ask", response_model=str)
-def ask_hr_helper(
+async def ask_hr_helper(
     req: HRAskSchema,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user),
 ):
     """
     HR спрашивает AI о кандидате или навыках.
     Ответ возвращается строкой (не сохраняется в основной истории чата, чтобы не смешивать).
     """
-    from app.models.candidate import Candidate
-    from app.models.vacancy import Vacancy
-    from app.core.config import settings
-
-    candidate = db.query(Candidate).filter(Candidate.id == req.candidate_id).first()
+    candidate = await db.get(Candidate, req.candidate_id, options=[joinedload(Candidate.resume_blob)])
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    vacancy = db.query(Vacancy).filter(Vacancy.id == candidate.vacancy_id).first()
-
-    context = f"""Вакансия: {vacancy.title if vacancy else 'N/A'}
-Описание: {vacancy.description[:500] if vacancy else 'N/A'}...
-Зарплата: {vacancy.salary_range if vacancy and vacancy.salary_range else 'Не указана'}
-Требуемые навыки: {vacancy.required_skills if vacancy else 'N/A'}
-
-Кандидат: {candidate.filename}
-Резюме: {candidate.summary or candidate.content[:1000]}...
-Skills Match: {candidate.skills_match}
-Missing Skills: {candidate.missing_skills}
-"""
-
-    system_message = "Вы - эксперт HR-аналитик. Рекрутер задает вам вопросы о кандидате. Дайте честный, развернутый и полезный ответ на русском языке. Используйте метрики и факты из резюме."
-    user_prompt = f"""Контекст:
-{context}
 
-Вопрос рекрутера: {req.question}
-
-Ответ:"""
+    system_message = HR_SYSTEM_MESSAGE
 
     # Model selection (reuse logic or simplify for this endpoint)
     # Using simple openrouter fallback logic for brevity/consistency
-    from app.models.ai_settings import AISettings
-    import requests
+    from app.services.llm_client import llm_gateway
 
-    ai_settings = db.query(AISettings).filter(AISettings.user_id == current_user.id).first()
-    model = ai_settings.model_name if ai_settings else settings.AI_MODEL_NAME
+    model, _ = await _user_model(db, current_user.id)
+    user_prompt = await _hr_ask_prompt(db, candidate, req.question, model)
     temp = 0.7
 
     content = "Извините, AI сейчас недоступен."
@@ -235,26 +407,59 @@ Missing Skills: {candidate.missing_skills}
         try:
             from app.services.gigachat import get_gigachat_response
             msgs = [{"role": "system", "content": system_message}, {"role": "user", "content": user_prompt}]
-            content = get_gigachat_response(msgs, temperature=temp) or content
+            content = await get_gigachat_response(msgs, temperature=temp) or content
         except Exception as e:
             print(f"HR GigaChat fail: {e}")
 
     # Fallback OpenRouter
     if content == "Извините, AI сейчас недоступен." and settings.OPENROUTER_API_KEY:
         try:
-             response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={"Authorization": f"Bearer {settings.OPENROUTER_API_KEY}"},
-                json={
-                    "model": model if model != "GigaChat" else settings.AI_MODEL_NAME,
-                    "messages": [{"role": "system", "content": system_message}, {"role": "user", "content": user_prompt}],
-                    "temperature": temp
-                },
+            content = await llm_gateway.openrouter_chat(
+                [{"role": "system", "content": system_message}, {"role": "user", "content": user_prompt}],
+                model=model if model != "GigaChat" else settings.AI_MODEL_NAME,
+                temperature=temp,
                 timeout=45
             )
-             if response.status_code == 200:
-                 content = response.json()["choices"][0]["message"]["content"]
         except Exception as e:
             print(f"HR OpenRouter fail: {e}")
 
     return content
+
+@router.post("/hr_ask/stream")
+async def stream_hr_helper(
+    req: HRAskSchema,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_active_user),
+):
+    """
+    Потоковый вариант /chat/hr_ask (Server-Sent Events).
+    События: `delta` {"content": фрагмент}, `done` {"content": полный ответ}, `error`.
+    """
+    candidate = await db.get(Candidate, req.candidate_id, options=[joinedload(Candidate.resume_blob)])
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    model, _ = await _user_model(db, current_user.id)
+    user_prompt = await _hr_ask_prompt(db, candidate, req.question, model)
+
+    async def event_stream():
+        parts = []
+        try:
+            async for event in _relay_reply(
+                _stream_ai_reply(HR_SYSTEM_MESSAGE, user_prompt, model, 0.7, timeout=45), request, parts
+            ):
+                yield event
+        except ClientDisconnected:
+            return
+        except Exception as e:
+            print(f"HR stream fail: {e}")
+            yield _sse("error", {"detail": AI_INTERRUPTED if parts else AI_UNAVAILABLE})
+            return
+
+        if parts:
+            yield _sse("done", {"content": "".join(parts)})
+        else:
+            yield _sse("error", {"detail": AI_UNAVAILABLE})
+
+    return _sse_response(event_stream())
@@ -1,26 +1,28 @@
 
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from app.core import security
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
+from app.models.ai_settings import AISettings
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.services import analysis
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,15 +44,38 @@ def get_current_user(
         # print(f"DEBUG: JWT Error: {e}")
         raise credentials_exception
     
+    cached = user_cache.get(token_data.email)
+    if cached is not None:
+        # Attach the snapshot to this session as a loaded row: no SELECT
+        user = User(**cached[0])
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
     # print("DEBUG: Querying user DB...")
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
+    row = (await db.execute(
+        select(User, AISettings).outerjoin(AISettings, AISettings.user_id == User.id).where(User.email == token_data.email)
+    )).first()
+    if row is None:
         # print("DEBUG: User not found in DB")
         raise credentials_exception
-    # print(f"DEBUG: User found: {user.email}")
+    user, ai_settings = row
+    user_cache.put(token_data.email, user, analysis.ai_config_from(ai_settings))
     return user
 
-def get_current_active_user(
+async def get_ai_config(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+    """The user's AI config, from the user cache when get_current_user filled it."""
+    config = user_cache.ai_config(user_id)
+    if config is None:
+        config = await db.run_sync(analysis.get_ai_config, user_id)
+    return config
+
+QUOTA_FIELDS = ("subscription_tier", "subscription_end_date", "trial_start_date", "resumes_used_current_period")
+
+async def refresh_quota(db: AsyncSession, user: User):
+    """Re-reads the subscription counters, which the user cache may hold stale."""
+    await db.refresh(user, QUOTA_FIELDS)
+
+async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_active:
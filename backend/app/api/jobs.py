@@ -0,0 +1,78 @@
+import asyncio
+import json
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.db.session import AsyncSessionLocal
+from app.models.job import AnalysisJob
+from app.models.user import User
+from app.schemas.job import AnalysisJob as AnalysisJobSchema
+
+router = APIRouter()
+
+FINAL_STATUSES = ("done", "failed")
+
+async def _get_owned_job(db: AsyncSession, job_id: int, user_id: int) -> AnalysisJob:
+    job = await db.scalar(select(AnalysisJob).where(AnalysisJob.id == job_id, AnalysisJob.user_id == user_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}", response_model=AnalysisJobSchema)
+async def read_job(
+    job_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get the state of a background analysis job.
+    """
+    return await _get_owned_job(db, job_id, current_user.id)
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Server-Sent Events stream of job progress. Emits a `progress` event on every
+    state change and closes after the job is done or failed, or with an `error`
+    event if the job is deleted meanwhile.
+    """
+    await _get_owned_job(db, job_id, current_user.id)
+    user_id = current_user.id
+
+    async def event_stream():
+        last_payload = None
+        while True:
+            if await request.is_disconnected():
+                break
+
+            async with AsyncSessionLocal() as poll_db:
+                # The response has started: a missing job can no longer be a 404
+                job = await poll_db.scalar(
+                    select(AnalysisJob).where(AnalysisJob.id == job_id, AnalysisJob.user_id == user_id)
+                )
+                if not job:
+                    yield f"event: error\ndata: {json.dumps({'detail': 'Job not found'})}\n\n"
+                    break
+                payload = AnalysisJobSchema.model_validate(job).model_dump(mode="json")
+
+            if payload != last_payload:
+                last_payload = payload
+                yield f"event: progress\ndata: {json.dumps(payload)}\n\n"
+
+            if payload["status"] in FINAL_STATUSES:
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import auth, vacancies, candidates, analytics, auth_hh, activities, chat, ai_settings
+from app.api import auth, vacancies, candidates, analytics, auth_hh, activities, chat, ai_settings, jobs
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -10,3 +10,4 @@ api_router.include_router(analytics.router, prefix="/analytics", tags=["analytic
 api_router.include_router(activities.router, prefix="/activities", tags=["activities"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(ai_settings.router, prefix="/ai-settings", tags=["ai-settings"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
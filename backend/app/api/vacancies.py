@@ -1,21 +1,25 @@
 
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.api import deps
 from app.models.vacancy import Vacancy
 from app.models.user import User
 from app.models.candidate import Candidate
 from app.schemas.vacancy import VacancyCreate, Vacancy as VacancySchema
+from app.services.analysis import batch_analysis_runner
 from app.services.mock_data import generate_mock_resume, get_random_name
 import random
 
 router = APIRouter()
 
 @router.post("/", response_model=VacancySchema)
-def create_vacancy(
+async def create_vacancy(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     vacancy_in: VacancyCreate,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
@@ -32,13 +36,13 @@ def create_vacancy(
         owner_id=current_user.id,
     )
     db.add(vacancy)
-    db.commit()
-    db.refresh(vacancy)
+    await db.commit()
+    await db.refresh(vacancy)
     return vacancy
 
 @router.get("/", response_model=List[VacancySchema])
-def read_vacancies(
-    db: Session = Depends(deps.get_db),
+async def read_vacancies(
+    db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(deps.get_current_user),
@@ -46,34 +50,36 @@ def read_vacancies(
     """
     Retrieve vacancies.
     """
-    vacancies = db.query(Vacancy).filter(Vacancy.owner_id == current_user.id).offset(skip).limit(limit).all()
-    return vacancies
+    vacancies = await db.scalars(
+        select(Vacancy).where(Vacancy.owner_id == current_user.id).offset(skip).limit(limit)
+    )
+    return vacancies.all()
 
 @router.get("/{id}", response_model=VacancySchema)
-def read_vacancy(
+async def read_vacancy(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get vacancy by ID.
     """
-    vacancy = db.query(Vacancy).filter(Vacancy.id == id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=404, detail="Vacancy not found")
     return vacancy
 @router.post("/{id}/publish-hh", response_model=VacancySchema)
-def publish_vacancy_hh(
+async def publish_vacancy_hh(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Publish vacancy to HH.ru.
     """
-    vacancy = db.query(Vacancy).filter(Vacancy.id == id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=404, detail="Vacancy not found")
     
@@ -87,7 +93,7 @@ def publish_vacancy_hh(
     if not token and not hh_service.mock_mode:
         raise HTTPException(status_code=401, detail="HH.ru account not connected. Please authorize.")
     
-    result = hh_service.publish_vacancy({
+    result = await run_in_threadpool(hh_service.publish_vacancy, {
         "id": vacancy.id,
         "title": vacancy.title,
         "description": vacancy.description
@@ -99,21 +105,21 @@ def publish_vacancy_hh(
     vacancy.hh_id = result.get("id")
     vacancy.hh_status = result.get("status")
     db.add(vacancy)
-    db.commit()
-    db.refresh(vacancy)
+    await db.commit()
+    await db.refresh(vacancy)
     return vacancy
 
 @router.post("/{id}/publish-demo", response_model=VacancySchema)
-def publish_vacancy_demo(
+async def publish_vacancy_demo(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Publish vacancy in demo mode and generate mock candidates.
     """
-    vacancy = db.query(Vacancy).filter(Vacancy.id == id, Vacancy.owner_id == current_user.id).first()
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == id, Vacancy.owner_id == current_user.id))
     if not vacancy:
         raise HTTPException(status_code=404, detail="Vacancy not found")
     
@@ -142,6 +148,53 @@ def publish_vacancy_demo(
     
     vacancy.hh_status = "PUBLISHED" # Mock status
     db.add(vacancy)
-    db.commit()
-    db.refresh(vacancy)
+    await db.commit()
+    await db.refresh(vacancy)
     return vacancy
+
+@router.post("/{id}/analyze-all", status_code=202)
+async def analyze_all_candidates(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: int,
+    concurrency: int = Query(settings.ANALYZE_ALL_CONCURRENCY, ge=1, le=settings.ANALYZE_ALL_MAX_CONCURRENCY),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Start AI analysis of every not yet scored candidate of a vacancy.
+    Runs in the background: model calls run concurrently (capped by
+    `concurrency`) and results are committed in batches. Poll
+    GET /vacancies/{id}/analyze-all for the outcome.
+    """
+    vacancy = await db.scalar(select(Vacancy).where(Vacancy.id == id, Vacancy.owner_id == current_user.id))
+    if not vacancy:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
+    if batch_analysis_runner.is_running(id):
+        raise HTTPException(status_code=409, detail="Bulk analysis is already running for this vacancy")
+
+    ai_config = await deps.get_ai_config(db, current_user.id)
+    candidate_ids = (await db.scalars(select(Candidate.id).where(
+        Candidate.vacancy_id == id,
+        or_(Candidate.score.is_(None), Candidate.score == 0)
+    ))).all()
+
+    return batch_analysis_runner.start(id, list(candidate_ids), ai_config, concurrency)
+
+@router.get("/{id}/analyze-all")
+async def read_analyze_all_status(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: int,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    State of the latest bulk analysis of a vacancy: `running`, then `done`
+    with counts and throughput (or `failed`).
+    """
+    vacancy = await db.scalar(select(Vacancy.id).where(Vacancy.id == id, Vacancy.owner_id == current_user.id))
+    if not vacancy:
+        raise HTTPException(status_code=404, detail="Vacancy not found")
+    status = batch_analysis_runner.status(id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No bulk analysis for this vacancy")
+    return status
@@ -10,6 +10,22 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./sql_app.db"
+
+    # Connection pool for server databases (PostgreSQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # SQLite connection profile (ignored for other databases)
+    SQLITE_TUNING_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000 # negative = KiB, i.e. 64 MB per connection
+    SQLITE_TEMP_STORE: str = "MEMORY"
     
     # AI (OpenRouter & GigaChat)
     OPENROUTER_API_KEY: str = ""
@@ -21,11 +37,83 @@ class Settings(BaseSettings):
     USE_GIGACHAT: bool = False  # Переключатель между OpenRouter и GigaChat
     giga_chat_client_id: Optional[str] = None
     giga_chat_cient_secret: Optional[str] = None
-    
+
+    # Shared LLM HTTP pool (app/services/llm_client.py)
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    LLM_HTTP2: bool = True
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    OPENROUTER_MAX_CONNECTIONS: int = 200
+    GIGACHAT_MAX_CONNECTIONS: int = 50
+    # Requests per minute per provider, 0 disables the limit
+    OPENROUTER_RATE_LIMIT_PER_MINUTE: int = 0
+    GIGACHAT_RATE_LIMIT_PER_MINUTE: int = 0
+
+    # Background analysis jobs (app/services/job_queue.py)
+    ANALYSIS_WORKERS: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_STALE_AFTER_SECONDS: int = 600
+
+    # Analysis cache (app/services/analysis_cache.py)
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 50000
+    # Evict expired / over-cap entries once per this many puts
+    ANALYSIS_CACHE_EVICT_EVERY: int = 100
+
+    # Dashboard metrics (funnel, time to hire, ...) cached per owner; any
+    # candidate write bumps the owner's rollup and invalidates the entry
+    ANALYTICS_METRICS_CACHE_TTL_SECONDS: int = 300
+    ANALYTICS_TOP_SKILLS: int = 10
+
+    # Authenticated user cache (app/services/user_cache.py); 0 disables it
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing: bcrypt cost (2^rounds iterations) and the threads of
+    # its dedicated executor (0 = one per CPU core). Changing the rounds
+    # rehashes each password at the user's next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0
+
+    # Candidate export (/analytics/export, /candidates/export): rows per fetch
+    EXPORT_BATCH_SIZE: int = 5000
+
+    # Prompt budgets in estimated tokens (app/services/prompt_builder.py).
+    # Analysis: the whole prompt, of which the vacancy takes at most
+    # PROMPT_VACANCY_MAX_TOKENS; a budget of 0 disables trimming (vacancy and
+    # resume are sent whole). Chat: context excerpts.
+    PROMPT_ANALYSIS_TOKEN_BUDGET: int = 6000
+    PROMPT_VACANCY_MAX_TOKENS: int = 1500
+    PROMPT_MIN_RESUME_TOKENS: int = 500
+    PROMPT_CHAT_VACANCY_TOKENS: int = 150
+    PROMPT_CHAT_RESUME_TOKENS: int = 400
+
+    # Bulk analysis (POST /vacancies/{id}/analyze-all)
+    ANALYZE_ALL_CONCURRENCY: int = 8
+    ANALYZE_ALL_MAX_CONCURRENCY: int = 32
+    ANALYZE_ALL_COMMIT_BATCH: int = 25
+
+    # Resume parsing (0 workers = one per CPU core)
+    RESUME_PARSE_WORKERS: int = 0
+    RESUME_PARSE_TIMEOUT_SECONDS: float = 30.0
+    RESUME_MAX_BYTES: int = 10 * 1024 * 1024
+    RESUME_MAX_PAGES: int = 50
+    BULK_UPLOAD_MAX_FILES: int = 2000
+
     # HH.ru Integration
     HH_CLIENT_ID: Optional[str] = None
     HH_CLIENT_SECRET: Optional[str] = None
     HH_REDIRECT_URI: Optional[str] = "http://localhost:8000/api/auth/hh/callback"
+    HH_MAX_CONCURRENCY: int = 8
+    HH_RATE_LIMIT_PER_SECOND: float = 5.0
+    HH_RATE_LIMIT_BURST: float = 10.0
+    HH_MAX_RETRIES: int = 3
+    HH_PAGE_SIZE: int = 100
+    HH_BACKOFF_MAX_SECONDS: float = 300.0
+    HH_SYNC_ENABLED: bool = False
+    HH_SYNC_INTERVAL_SECONDS: int = 900
     
     # Automated HH.ru Auth
     EMAIL: Optional[str] = None
@@ -1,25 +1,86 @@
-
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 
+
+def make_pwd_context(rounds: int) -> CryptContext:
+    # min == max == default: a hash made with any other cost needs an update
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+class PasswordHasher:
+    """
+    bcrypt on a dedicated bounded thread pool. bcrypt releases the GIL, so
+    hashes run in parallel without holding the event loop, and a login burst
+    queues here instead of taking the threads shared by sync endpoints.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._context: Optional[CryptContext] = None
+        self._rounds: Optional[int] = None
+
+    @property
+    def workers(self) -> int:
+        return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+    @property
+    def context(self) -> CryptContext:
+        if self._rounds != settings.BCRYPT_ROUNDS:
+            self._context = make_pwd_context(settings.BCRYPT_ROUNDS)
+            self._rounds = settings.BCRYPT_ROUNDS
+        return self._context
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash); the new hash is set when the stored one uses another cost."""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher()
+
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.context.hash(password)
@@ -3,6 +3,16 @@ from app.db.base_class import Base
 from app.models.user import User
 from app.models.vacancy import Vacancy
 from app.models.candidate import Candidate
+from app.models.resume_blob import ResumeBlob
 from app.models.activity import ActivityLog
 from app.models.chat import ChatMessage
 from app.models.ai_settings import AISettings
+from app.models.job import AnalysisJob
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.hh_sync import HHSyncState, HHSyncRun
+from app.models.scheduler import SchedulerLock
+from app.models.analytics import VacancyStats, OwnerStats
+from app.models.candidate_history import CandidateStatusChange
+# Keep the analytics rollup and status history in step with candidate writes
+import app.services.analytics_rollup  # noqa: F401
+import app.services.analytics_engine  # noqa: F401
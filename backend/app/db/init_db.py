@@ -1,11 +1,26 @@
 
-from app.db.session import engine
-from app.db.base import Base
+import os
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+from alembic import command
+from alembic.config import Config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def init_db(connection=None):
+    """Applies all schema migrations (same as `alembic upgrade head`)."""
+    command.upgrade(alembic_config(connection), "head")
 
 if __name__ == "__main__":
-    print("Creating database tables...")
+    print("Applying database migrations...")
     init_db()
-    print("Tables created.")
+    print("Database is up to date.")
@@ -1,9 +1,96 @@
-
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+SQLITE_TEMP_STORE = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def sqlite_pragmas() -> dict:
+    """Connection pragmas of the configured SQLite profile."""
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    temp_store = settings.SQLITE_TEMP_STORE.upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLITE_JOURNAL_MODE: {settings.SQLITE_JOURNAL_MODE}")
+    if synchronous not in SQLITE_SYNCHRONOUS:
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS: {settings.SQLITE_SYNCHRONOUS}")
+    if temp_store not in SQLITE_TEMP_STORE:
+        raise ValueError(f"Unsupported SQLITE_TEMP_STORE: {settings.SQLITE_TEMP_STORE}")
+    return {
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "busy_timeout": int(settings.SQLITE_BUSY_TIMEOUT_MS),
+        "mmap_size": int(settings.SQLITE_MMAP_SIZE),
+        "cache_size": int(settings.SQLITE_CACHE_SIZE),
+        "temp_store": temp_store,
+    }
+
+
+def configure_sqlite(engine, pragmas: dict = None):
+    """Applies the SQLite profile to every new connection of `engine`."""
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def engine_options(url: str) -> dict:
+    """create_engine() arguments for the dialect of `url`."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # One file, many threads; pooling settings do not apply
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """`url` with its driver swapped for the asyncio one (aiosqlite / asyncpg)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def async_engine_options(url: str) -> dict:
+    """create_async_engine() arguments for the dialect of `url`."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # aiosqlite runs each connection on its own thread already
+        return {}
+    return engine_options(url)
+
+
+# Sync sessions serve the background workers and scripts; API routers use the
+# async engine so DB waits share the event loop with the LLM calls
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+if engine.dialect.name == "sqlite" and settings.SQLITE_TUNING_ENABLED:
+    configure_sqlite(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL), **async_engine_options(settings.DATABASE_URL)
+)
+if async_engine.dialect.name == "sqlite" and settings.SQLITE_TUNING_ENABLED:
+    configure_sqlite(async_engine.sync_engine)
+# Objects stay readable after commit: expired attributes cannot lazy-load under asyncio
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
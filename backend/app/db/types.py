@@ -0,0 +1,5 @@
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSON everywhere, stored as binary JSONB (indexable, no reparsing) on PostgreSQL
+JSONType = JSON().with_variant(JSONB(), "postgresql")
@@ -1,13 +1,39 @@
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.security import password_hasher
 from app.api import routes
+from app.db.session import async_engine
+from app.services.llm_client import llm_gateway
+from app.services.analysis import batch_analysis_runner
+from app.services.job_queue import analysis_job_queue
+from app.services.hh import hh_service
+from app.services.hh_scheduler import hh_sync_scheduler
+from app.services.resume_parser import resume_parser_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    analysis_job_queue.start()
+    if settings.HH_SYNC_ENABLED:
+        hh_sync_scheduler.start()
+    yield
+    await hh_sync_scheduler.stop()
+    await analysis_job_queue.stop()
+    await batch_analysis_runner.stop()
+    # Release pooled LLM connections on shutdown
+    await llm_gateway.aclose()
+    await hh_service.aclose()
+    resume_parser_pool.shutdown()
+    password_hasher.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME, 
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    debug=True
+    debug=True,
+    lifespan=lifespan
 )
 
 # Set all CORS enabled origins
@@ -25,7 +51,5 @@ app.include_router(routes.api_router, prefix=settings.API_V1_STR)
 def root():
     return {"message": "Welcome to Nexus AI API"}
 
-# Create tables on startup
-from app.db.base import Base
-from app.db.session import engine
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic migrations: run `alembic upgrade head`
+# (or app.db.init_db) before starting the workers.
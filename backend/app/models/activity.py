@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
@@ -12,5 +12,9 @@ class ActivityLog(Base):
     entity_id = Column(String, nullable=True)
     entity_name = Column(String, nullable=True)
     metadata_info = Column(JSON, nullable=True) # Renamed to avoid reserved word
-    created_date = Column(DateTime(timezone=True), server_default=func.now())
+    created_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     created_by = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_activity_logs_created_by_created_date", created_by, created_date),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.db.base_class import Base
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    # sha256 of the normalized analysis inputs
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=True)
+    result = Column(JSON, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, nullable=False)
+    last_accessed_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from app.db.base_class import Base
+
+# Rollup counters maintained by app.services.analytics_rollup. One row per
+# (scope, metric, key), e.g. ("status", "SHORTLIST") or ("skill", "Python");
+# scalar metrics such as "candidates" or "score_sum" use an empty key.
+
+class VacancyStats(Base):
+    __tablename__ = "vacancy_stats"
+
+    vacancy_id = Column(Integer, ForeignKey("vacancy.id"), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    key = Column(String(255), primary_key=True, default="")
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    value = Column(Float, nullable=False, default=0.0)
+
+class OwnerStats(Base):
+    __tablename__ = "owner_stats"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    key = Column(String(255), primary_key=True, default="")
+    value = Column(Float, nullable=False, default=0.0)
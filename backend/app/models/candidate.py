@@ -1,7 +1,11 @@
 
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.db.types import JSONType
+
+# Pipeline order; REJECTED can follow any stage
+CANDIDATE_STATUSES = ("NEW", "SHORTLIST", "APPROVED", "REJECTED")
 
 class Candidate(Base):
     __tablename__ = "candidates"
@@ -9,16 +13,36 @@ class Candidate(Base):
     id = Column(Integer, primary_key=True, index=True)
     vacancy_id = Column(Integer, ForeignKey("vacancy.id"))
     filename = Column(String)
-    content = Column(Text) # Extracted text
+    content = Column(Text) # Extracted text (HH.ru candidates; uploads reference resume_blob)
+    resume_hash = Column(String(64), ForeignKey("resume_blob.sha256"), index=True, nullable=True)
     
     # AI Analysis Results
     score = Column(Float, default=0.0)
-    skills_match = Column(JSON)
-    missing_skills = Column(JSON)
+    skills_match = Column(JSONType)
+    missing_skills = Column(JSONType)
     summary = Column(Text)
     recommendation = Column(String)
     status = Column(String, default="NEW") # NEW, SHORTLIST, REJECTED, APPROVED
     hh_resume_id = Column(String, index=True, nullable=True)
-    screening_questions = Column(JSON, nullable=True)
+    screening_questions = Column(JSONType, nullable=True)
+
+    __table_args__ = (
+        # read_candidates: filter by vacancy, keyset pages ordered by (score, id)
+        Index("ix_candidates_vacancy_id_score_id", vacancy_id, score.desc(), id.desc()),
+        # analytics: status breakdown per vacancy
+        Index("ix_candidates_vacancy_id_status", vacancy_id, status),
+    )
 
     vacancy = relationship("app.models.vacancy.Vacancy", backref="candidates")
+    # Not loaded by default: the text is large and most queries don't need it.
+    # Queries that read resume_text add selectinload/joinedload(Candidate.resume_blob)
+    resume_blob = relationship("app.models.resume_blob.ResumeBlob", lazy="raise")
+
+    @property
+    def resume_text(self):
+        """Resume text, whether stored inline or in a shared resume_blob."""
+        if self.resume_hash is None:
+            return self.content
+        if self.resume_blob is not None:
+            return self.resume_blob.content
+        return self.content
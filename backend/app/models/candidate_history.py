@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from app.db.base_class import Base
+
+class CandidateStatusChange(Base):
+    __tablename__ = "candidate_status_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False)
+    vacancy_id = Column(Integer, ForeignKey("vacancy.id"), nullable=False)
+    from_status = Column(String, nullable=True) # NULL when the candidate was created
+    to_status = Column(String, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # analytics: per-vacancy scans partitioned by candidate, in time order
+        Index("ix_candidate_status_history_vacancy_id_candidate_id", vacancy_id, candidate_id, changed_at),
+        Index("ix_candidate_status_history_candidate_id", candidate_id),
+    )
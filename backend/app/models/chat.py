@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Index
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
@@ -11,3 +11,8 @@ class ChatMessage(Base):
     content = Column(Text)
     metadata_info = Column(JSON, nullable=True) # Renamed from metadata to avoid conflict with Base.metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # get_chat_history: filter by candidate, order by time
+        Index("ix_chat_messages_candidate_id_created_at", candidate_id, created_at),
+    )
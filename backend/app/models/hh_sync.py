@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON
+from app.db.base_class import Base
+
+class HHSyncState(Base):
+    __tablename__ = "hh_sync_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vacancy_id = Column(Integer, ForeignKey("vacancy.id"), unique=True, index=True, nullable=False)
+    # Newest negotiation already imported; older ones are not re-read
+    last_negotiation_updated_at = Column(DateTime, nullable=True)
+    last_negotiation_id = Column(String, nullable=True)
+    # hh_resume_id -> ETag or updated_at of the imported resume version
+    resume_versions = Column(JSON, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+
+class HHSyncRun(Base):
+    __tablename__ = "hh_sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    vacancies_total = Column(Integer, default=0)
+    vacancies_synced = Column(Integer, default=0)
+    vacancies_skipped = Column(Integer, default=0) # token backed off after 429
+    new_candidates = Column(Integer, default=0)
+    api_calls = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
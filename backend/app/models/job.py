@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), index=True)
+    vacancy_id = Column(Integer, ForeignKey("vacancy.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    # sha256(candidate + vacancy + prompt hash); one job per distinct analysis
+    idempotency_key = Column(String, unique=True, index=True, nullable=False)
+    status = Column(String, default="queued", index=True) # queued, running, done, failed
+    progress = Column(Integer, default=0) # 0-100
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
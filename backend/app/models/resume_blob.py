@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class ResumeBlob(Base):
+    __tablename__ = "resume_blob"
+
+    # SHA-256 of the uploaded file bytes; identical files share one row
+    sha256 = Column(String(64), primary_key=True)
+    content = Column(Text) # Extracted text
+    size_bytes = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
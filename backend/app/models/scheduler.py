@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime
+from app.db.base_class import Base
+
+class SchedulerLock(Base):
+    __tablename__ = "scheduler_locks"
+
+    # One row per periodic task; the holder is its leader until the lease expires
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
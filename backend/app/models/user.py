@@ -18,7 +18,9 @@ class User(Base):
     resumes_used_current_period = Column(Integer, default=0)
 
     # HH.ru OAuth
-    
+    hh_access_token = Column(String, nullable=True)
+    hh_refresh_token = Column(String, nullable=True)
+
     # Relationships
     ai_settings = relationship("AISettings", back_populates="user", uselist=False)
 
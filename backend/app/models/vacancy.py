@@ -14,7 +14,7 @@ class Vacancy(Base):
     experience_level = Column(String)
     salary_range = Column(String)
     skill_weights = Column(Text, nullable=True) # JSON string of skill weights
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
     
     # HH.ru Integration
     hh_id = Column(String, index=True, nullable=True)
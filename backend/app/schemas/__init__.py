@@ -1,4 +1,5 @@
 
 from .user import User, UserCreate, Token, TokenData
 from .vacancy import Vacancy, VacancyCreate
-from .candidate import Candidate, CandidateAnalysisResult
+from .candidate import Candidate, CandidateAnalysisResult, BulkUploadResult
+from .job import AnalysisJob
@@ -1,10 +1,11 @@
 
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 
 class CandidateBase(BaseModel):
     filename: str
-    content: Optional[str] = None
+    # Uploaded resumes keep their text in resume_blob; read it via resume_text
+    content: Optional[str] = Field(None, validation_alias=AliasChoices("resume_text", "content"))
     summary: Optional[str] = None
     recommendation: Optional[str] = None
     score: Optional[float] = 0.0
@@ -15,6 +16,9 @@ class CandidateCreate(BaseModel):
     # content and filename usually come from file upload, but for manually adding maybe needed
     pass
 
+class CandidateStatusUpdate(BaseModel):
+    status: str
+
 class Candidate(CandidateBase):
     id: int
     vacancy_id: int
@@ -26,6 +30,39 @@ class Candidate(CandidateBase):
     class Config:
         from_attributes = True
 
+class CandidateListItem(BaseModel):
+    """Row of the candidate list: no resume text or screening questions."""
+    id: int
+    vacancy_id: int
+    filename: str
+    score: Optional[float] = None
+    status: Optional[str] = "NEW"
+    summary: Optional[str] = None
+    recommendation: Optional[str] = None
+    skills_match: Optional[List[str]] = []
+    missing_skills: Optional[List[str]] = []
+    hh_resume_id: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class CandidatePage(BaseModel):
+    items: List[CandidateListItem]
+    # Pass back as `cursor` for the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+class BulkUploadFailure(BaseModel):
+    filename: str
+    error: str
+
+class BulkUploadResult(BaseModel):
+    vacancy_id: int
+    created: int
+    duplicates: int
+    skipped_quota: int
+    failed: List[BulkUploadFailure] = []
+    elapsed_seconds: float
+
 class CandidateAnalysisResult(BaseModel):
     score: float
     skills_match: List[str]
@@ -0,0 +1,18 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class AnalysisJob(BaseModel):
+    id: int
+    candidate_id: int
+    vacancy_id: int
+    status: str
+    progress: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -3,7 +3,7 @@ from app.services.openrouter import analyze_resume
 from app.core.config import settings
 
 class AIOutreachService:
-    def generate_message(self, candidate_name: str, vacancy_title: str, skills: list, model: str = None) -> str:
+    async def generate_message(self, candidate_name: str, vacancy_title: str, skills: list, model: str = None) -> str:
         """
         Generates a personalized outreach message using AI.
         """
@@ -30,7 +30,7 @@ class AIOutreachService:
         from app.services.openrouter import generate_completion
         
         try:
-            message = generate_completion(
+            message = await generate_completion(
                 prompt=prompt,
                 system_prompt="You are a professional HR assistant helping to recruit candidates.",
                 model=model,
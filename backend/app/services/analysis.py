@@ -0,0 +1,233 @@
+"""
+Resume Analysis Service
+
+Shared helpers for running AI analysis of a candidate against its vacancy,
+used by the analyze endpoint and the background job workers.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.ai_settings import AISettings
+from app.models.candidate import Candidate
+from app.models.chat import ChatMessage
+from app.models.vacancy import Vacancy
+from app.schemas.candidate import CandidateAnalysisResult
+from app.services.openrouter import analyze_resume_checked
+
+logger = logging.getLogger(__name__)
+
+
+def get_ai_config(db: Session, user_id: int) -> Dict[str, Any]:
+    """Returns the user's AI settings (or app defaults) as plain values."""
+    return ai_config_from(db.query(AISettings).filter(AISettings.user_id == user_id).first())
+
+
+def ai_config_from(ai_settings: Optional[AISettings]) -> Dict[str, Any]:
+    return {
+        "system_prompt": ai_settings.system_prompt if ai_settings else None,
+        "model": ai_settings.model_name if ai_settings else settings.AI_MODEL_NAME,
+        "temperature": ai_settings.temperature if ai_settings else 0.7,
+    }
+
+
+def prompt_hash(vacancy_description: Optional[str], ai_config: Dict[str, Any]) -> str:
+    """Hash of everything besides the resume that shapes the analysis prompt."""
+    digest = hashlib.sha256()
+    for part in (
+        ai_config.get("model"),
+        ai_config.get("system_prompt"),
+        ai_config.get("temperature"),
+        vacancy_description,
+    ):
+        digest.update(str(part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AnalysisUnavailable(Exception):
+    """The model call failed and only a placeholder result was produced."""
+
+
+async def run_analysis(vacancy_description: str, resume_text: str, ai_config: Dict[str, Any],
+                       resume_hash: Optional[str] = None, allow_fallback: bool = True) -> CandidateAnalysisResult:
+    """
+    Analyzes one resume with the given AI config. With `allow_fallback=False`
+    a placeholder result (model unreachable) raises AnalysisUnavailable
+    instead of being returned as if it were a real score.
+    """
+    result, is_real = await analyze_resume_checked(
+        vacancy_description=vacancy_description,
+        resume_text=resume_text,
+        system_prompt=ai_config["system_prompt"],
+        model=ai_config["model"],
+        temperature=ai_config["temperature"],
+        resume_hash=resume_hash
+    )
+    if not is_real and not allow_fallback:
+        raise AnalysisUnavailable("AI analysis unavailable, placeholder result discarded")
+    return result
+
+
+def apply_analysis_result(db: Session, candidate: Candidate, vacancy: Vacancy, result: CandidateAnalysisResult,
+                          has_messages: Optional[bool] = None):
+    """
+    Stores the analysis on the candidate and posts the first screening question
+    to the candidate's chat. Does not commit.
+    `has_messages` lets batch callers skip the per-candidate chat lookup; it
+    is required when `db` is an AsyncSession.
+    """
+    candidate.score = result.score
+    candidate.skills_match = result.skills_match
+    candidate.missing_skills = result.missing_skills
+    candidate.summary = result.summary
+    candidate.recommendation = result.recommendation
+    candidate.screening_questions = result.screening_questions
+
+    # Automatically post the first screening question to candidate's chat
+    if result.screening_questions and len(result.screening_questions) > 0:
+        # Check if we already have messages to avoid duplicate greetings
+        if has_messages is None:
+            has_messages = db.query(ChatMessage.id).filter(ChatMessage.candidate_id == candidate.id).first() is not None
+        if not has_messages:
+            # HR Agent Intro + First Question
+            intro = f"Здравствуйте! Я ваш ИИ-рекрутер. Я ознакомился с вашим резюме на позицию '{vacancy.title}'. У меня есть несколько уточняющих вопросов:\n\n"
+            full_msg = intro + result.screening_questions[0]
+            db.add(ChatMessage(candidate_id=candidate.id, role="assistant", content=full_msg))
+
+
+async def analyze_batch(
+    db: AsyncSession,
+    vacancy: Vacancy,
+    candidates: List[Candidate],
+    ai_config: Dict[str, Any],
+    concurrency: int,
+    commit_batch: int,
+) -> Dict[str, Any]:
+    """
+    Analyzes `candidates` against one vacancy with at most `concurrency` model
+    calls in flight, committing results every `commit_batch` candidates.
+    Candidates whose analysis failed (including placeholder results when the
+    model is unreachable) keep their old score and count as `failed`.
+    Returns counts and throughput.
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    candidate_ids = [c.id for c in candidates]
+    with_messages = set()
+    if candidate_ids:
+        with_messages = set(await db.scalars(
+            select(ChatMessage.candidate_id).where(ChatMessage.candidate_id.in_(candidate_ids)).distinct()
+        ))
+
+    # Read inputs up front: batched commits expire ORM attributes
+    vacancy_description = vacancy.description
+    resume_texts = {c.id: (c.resume_text, c.resume_hash) for c in candidates}
+
+    async def analyze_one(candidate: Candidate):
+        async with semaphore:
+            try:
+                resume_text, resume_hash = resume_texts[candidate.id]
+                return candidate, await run_analysis(
+                    vacancy_description, resume_text, ai_config, resume_hash, allow_fallback=False
+                )
+            except Exception as e:
+                logger.error(f"Bulk analysis failed for candidate {candidate.id}: {e}")
+                return candidate, None
+
+    analyzed = 0
+    failed = 0
+    pending = 0
+    for next_done in asyncio.as_completed([analyze_one(c) for c in candidates]):
+        candidate, result = await next_done
+        if result is None:
+            failed += 1
+            continue
+        apply_analysis_result(db, candidate, vacancy, result, has_messages=candidate.id in with_messages)
+        analyzed += 1
+        pending += 1
+        if pending >= commit_batch:
+            await db.commit()
+            pending = 0
+    if pending:
+        await db.commit()
+
+    elapsed = time.monotonic() - started
+    return {
+        "vacancy_id": vacancy.id,
+        "selected": len(candidates),
+        "analyzed": analyzed,
+        "failed": failed,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "candidates_per_minute": round(analyzed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+    }
+
+
+class BatchAnalysisRunner:
+    """
+    Runs analyze_batch() in the background, at most once per vacancy at a
+    time in this process, and keeps the latest stats of each vacancy for
+    polling.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._stats: Dict[int, Dict[str, Any]] = {}
+
+    def is_running(self, vacancy_id: int) -> bool:
+        return vacancy_id in self._tasks
+
+    def status(self, vacancy_id: int) -> Optional[Dict[str, Any]]:
+        return self._stats.get(vacancy_id)
+
+    def start(self, vacancy_id: int, candidate_ids: List[int], ai_config: Dict[str, Any],
+              concurrency: int) -> Dict[str, Any]:
+        """Starts analyzing `candidate_ids` and returns the initial status."""
+        self._stats[vacancy_id] = {
+            "vacancy_id": vacancy_id,
+            "status": "running",
+            "selected": len(candidate_ids),
+            "concurrency": concurrency,
+        }
+        task = asyncio.create_task(self._run(vacancy_id, candidate_ids, ai_config, concurrency))
+        self._tasks[vacancy_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(vacancy_id, None))
+        return self._stats[vacancy_id]
+
+    async def _run(self, vacancy_id: int, candidate_ids: List[int], ai_config: Dict[str, Any], concurrency: int):
+        try:
+            async with self.session_factory() as db:
+                vacancy = await db.get(Vacancy, vacancy_id)
+                candidates = list(await db.scalars(
+                    select(Candidate).where(Candidate.id.in_(candidate_ids)).options(selectinload(Candidate.resume_blob))
+                ))
+                stats = await analyze_batch(
+                    db, vacancy, candidates, ai_config,
+                    concurrency=concurrency, commit_batch=settings.ANALYZE_ALL_COMMIT_BATCH,
+                )
+            self._stats[vacancy_id] = {**stats, "status": "done"}
+        except Exception as e:
+            logger.error(f"Bulk analysis of vacancy {vacancy_id} failed: {e}")
+            self._stats[vacancy_id] = {**self._stats[vacancy_id], "status": "failed", "error": str(e)}
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+batch_analysis_runner = BatchAnalysisRunner()
@@ -0,0 +1,180 @@
+"""
+Analysis Cache Service
+
+Persistent, content-addressed cache of LLM resume analyses. Entries are keyed
+by a hash of the normalized inputs (model, prompt, vacancy text, resume text,
+temperature), expire after a TTL and are evicted least-recently-used once the
+table grows past its size cap. The cache has its own sync sessions: get() and
+put() run them on the threadpool so lookups never block the event loop, and
+eviction runs every ANALYSIS_CACHE_EVICT_EVERY puts rather than on each one.
+"""
+
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.schemas.candidate import CandidateAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: Optional[str]) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class AnalysisCache:
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_evict = 0
+
+    @staticmethod
+    def make_key(model: Optional[str], system_prompt: Optional[str], vacancy_text: Optional[str],
+                 resume_text: Optional[str], temperature: Optional[float],
+                 resume_hash: Optional[str] = None, prompt_version: str = "") -> str:
+        """
+        `resume_hash` (a resume_blob key) stands in for the resume text when
+        given. `prompt_version` identifies how the inputs are trimmed before
+        they reach the model (prompt_builder.analysis_prompt_version()).
+        """
+        digest = hashlib.sha256()
+        for part in (
+            model or "",
+            _normalize(system_prompt),
+            _normalize(vacancy_text),
+            f"blob:{resume_hash}" if resume_hash else _normalize(resume_text),
+            f"{float(temperature or 0.0):.2f}",
+            prompt_version,
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[CandidateAnalysisResult]:
+        if not settings.ANALYSIS_CACHE_ENABLED:
+            return None
+        return await run_in_threadpool(self._get, key)
+
+    async def put(self, key: str, result: CandidateAnalysisResult, model: Optional[str] = None):
+        if not settings.ANALYSIS_CACHE_ENABLED:
+            return
+        # Counted on the event loop, so exactly one put in N evicts
+        self._puts_since_evict += 1
+        evict = self._puts_since_evict >= settings.ANALYSIS_CACHE_EVICT_EVERY
+        if evict:
+            self._puts_since_evict = 0
+        try:
+            await run_in_threadpool(self._put, key, result, model, evict)
+        except Exception as e:
+            # The analysis itself succeeded; losing its cache entry is harmless
+            logger.warning(f"Analysis cache write failed: {e}")
+
+    def _get(self, key: str) -> Optional[CandidateAnalysisResult]:
+        db = self.session_factory()
+        try:
+            entry = db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.key == key).first()
+            now = datetime.utcnow()
+            if entry is not None and entry.created_at < now - timedelta(seconds=settings.ANALYSIS_CACHE_TTL_SECONDS):
+                db.delete(entry)
+                db.commit()
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_accessed_at = now
+            result = CandidateAnalysisResult(**entry.result)
+            db.commit()
+            self.hits += 1
+            return result
+        finally:
+            db.close()
+
+    def _put(self, key: str, result: CandidateAnalysisResult, model: Optional[str], evict: bool):
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            values = {"model": model, "result": result.model_dump(), "created_at": now, "last_accessed_at": now}
+            try:
+                db.execute(self._upsert(db, values), [{"key": key, "hits": 0, **values}])
+                db.commit()
+            except IntegrityError:
+                # Dialects without an upsert: a concurrent put stored the key first
+                db.rollback()
+            if evict:
+                self._evict(db, now)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _upsert(db: Session, values: Dict[str, object]):
+        # Concurrent puts of one key (e.g. resumes sharing a resume_hash) overwrite each other
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            stmt = sqlite_insert(AnalysisCacheEntry)
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+            stmt = pg_insert(AnalysisCacheEntry)
+        else:
+            return insert(AnalysisCacheEntry)
+        return stmt.on_conflict_do_update(
+            index_elements=["key"], set_={name: stmt.excluded[name] for name in values}
+        )
+
+    def _evict(self, db: Session, now: datetime):
+        """
+        Drops expired entries, then the least recently used ones above the
+        size cap. Between runs the table may exceed the cap by up to
+        ANALYSIS_CACHE_EVICT_EVERY entries.
+        """
+        expired_before = now - timedelta(seconds=settings.ANALYSIS_CACHE_TTL_SECONDS)
+        db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.created_at < expired_before
+        ).delete(synchronize_session=False)
+
+        excess = db.query(AnalysisCacheEntry).count() - settings.ANALYSIS_CACHE_MAX_ENTRIES
+        if excess > 0:
+            oldest = db.query(AnalysisCacheEntry.key).order_by(
+                AnalysisCacheEntry.last_accessed_at.asc()
+            ).limit(excess).subquery()
+            db.query(AnalysisCacheEntry).filter(
+                AnalysisCacheEntry.key.in_(oldest.select())
+            ).delete(synchronize_session=False)
+        db.commit()
+
+    def stats(self) -> Dict[str, object]:
+        db = self.session_factory()
+        try:
+            entries = db.query(AnalysisCacheEntry).count()
+        finally:
+            db.close()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.ANALYSIS_CACHE_ENABLED,
+            "entries": entries,
+            "max_entries": settings.ANALYSIS_CACHE_MAX_ENTRIES,
+            "ttl_seconds": settings.ANALYSIS_CACHE_TTL_SECONDS,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+analysis_cache = AnalysisCache()
@@ -0,0 +1,251 @@
+"""
+Analytics Engine
+
+Dashboard metrics computed from recorded events rather than counters:
+
+    funnel_conversion   from candidate_status_history, one row per candidate
+    time_to_hire        window functions over the same history
+    cost_per_hire       subscription price / hires in the last 30 days
+    response_rate       candidates who answered the recruiter's chat
+    top_skills          skill counters of the owner_stats rollup
+
+Status changes are recorded by ORM flush events (Core bulk inserts call
+`initial_history`). Results are cached in-process per owner under the
+owner's rollup version, which every candidate or chat write bumps, so a
+cached entry is never served after a write, from any process.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, distinct, event, func, insert, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.analytics import OwnerStats
+from app.models.candidate import Candidate
+from app.models.candidate_history import CandidateStatusChange
+from app.models.chat import ChatMessage
+from app.models.vacancy import Vacancy
+from app.services import analytics_rollup
+
+HISTORY_KEY = "analytics_status_history_pending"
+CHAT_KEY = "analytics_chat_candidates_pending"
+HIRE_WINDOW_DAYS = 30
+
+History = CandidateStatusChange
+
+
+# Recording
+
+def initial_history(candidate_ids: Iterable[int], rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """History rows for candidates inserted with a Core bulk INSERT."""
+    now = datetime.utcnow()
+    return [
+        {"candidate_id": candidate_id, "vacancy_id": row["vacancy_id"], "from_status": None,
+         "to_status": row.get("status") or "NEW", "changed_at": now}
+        for candidate_id, row in zip(candidate_ids, rows)
+        if row.get("vacancy_id") is not None
+    ]
+
+
+def _stage_history(target: Candidate, from_status: Optional[str]):
+    session = object_session(target)
+    if session is None or target.vacancy_id is None:
+        return
+    session.info.setdefault(HISTORY_KEY, []).append({
+        "candidate_id": target.id,
+        "vacancy_id": target.vacancy_id,
+        "from_status": from_status,
+        "to_status": target.status or "NEW",
+        "changed_at": datetime.utcnow(),
+    })
+
+
+@event.listens_for(Candidate, "after_insert")
+def _candidate_inserted(mapper, connection, target):
+    _stage_history(target, None)
+
+
+@event.listens_for(Candidate, "after_update")
+def _candidate_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if history.deleted and history.deleted[0] != target.status:
+        _stage_history(target, history.deleted[0])
+
+
+@event.listens_for(Candidate, "before_delete")
+def _candidate_deleting(mapper, connection, target):
+    connection.execute(delete(History).where(History.candidate_id == target.id))
+
+
+@event.listens_for(ChatMessage, "after_insert")
+def _chat_message_inserted(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.candidate_id is not None:
+        session.info.setdefault(CHAT_KEY, set()).add(target.candidate_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_after_flush(session, flush_context):
+    connection = session.connection()
+    history_rows = session.info.pop(HISTORY_KEY, None)
+    if history_rows:
+        connection.execute(insert(History), history_rows)
+    chat_candidates = session.info.pop(CHAT_KEY, None)
+    if chat_candidates:
+        # Response rate depends on chats: invalidate the owners' cached metrics
+        vacancy_ids = connection.execute(
+            select(Candidate.vacancy_id).where(Candidate.id.in_(chat_candidates)).distinct()
+        ).scalars().all()
+        analytics_rollup.touch(
+            connection, [v for v in vacancy_ids if v is not None], bumped=analytics_rollup.bumped_owners(session)
+        )
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(HISTORY_KEY, None)
+    session.info.pop(CHAT_KEY, None)
+
+
+# Metrics
+
+def _percent(part: float, whole: float) -> int:
+    return round(100 * part / whole) if whole else 0
+
+
+def _owned(stmt, vacancy_column, owner_id: int):
+    return stmt.join(Vacancy, Vacancy.id == vacancy_column).where(Vacancy.owner_id == owner_id)
+
+
+def funnel_conversion(db: Session, owner_id: int) -> Dict[str, int]:
+    """Stage-to-stage conversion (%) over every candidate's status history."""
+    reached = _owned(
+        select(
+            History.candidate_id,
+            func.max(case((History.to_status != "NEW", 1), else_=0)).label("screened"),
+            func.max(case((History.to_status.in_(("SHORTLIST", "APPROVED")), 1), else_=0)).label("shortlisted"),
+            func.max(case((History.to_status == "APPROVED", 1), else_=0)).label("approved"),
+        ),
+        History.vacancy_id, owner_id,
+    ).group_by(History.candidate_id).subquery()
+
+    total, screened, shortlisted, approved = db.execute(select(
+        func.count(),
+        func.coalesce(func.sum(reached.c.screened), 0),
+        func.coalesce(func.sum(reached.c.shortlisted), 0),
+        func.coalesce(func.sum(reached.c.approved), 0),
+    ).select_from(reached)).one()
+    return {
+        "new_to_screened": _percent(screened, total),
+        "screened_to_interview": _percent(shortlisted, screened),
+        "interview_to_offer": _percent(approved, shortlisted),
+    }
+
+
+def hires(db: Session, owner_id: int) -> List[Tuple[datetime, datetime]]:
+    """
+    (first seen, first approved) for every hired candidate of the owner.
+    Candidates created as APPROVED (including backfilled ones) are not hires
+    that happened in the app and are left out.
+    """
+    ranked = _owned(
+        select(
+            History.from_status,
+            History.to_status,
+            History.changed_at,
+            func.min(History.changed_at).over(partition_by=History.candidate_id).label("first_seen"),
+            func.row_number().over(
+                partition_by=(History.candidate_id, History.to_status), order_by=(History.changed_at, History.id)
+            ).label("nth"),
+        ),
+        History.vacancy_id, owner_id,
+    ).subquery()
+    return db.execute(
+        select(ranked.c.first_seen, ranked.c.changed_at).where(
+            ranked.c.to_status == "APPROVED", ranked.c.nth == 1, ranked.c.from_status.isnot(None)
+        )
+    ).all()
+
+
+def response_rate(db: Session, owner_id: int) -> int:
+    """Share (%) of candidates the recruiter wrote to who answered."""
+    contacted, replied = db.execute(_owned(
+        select(
+            func.count(distinct(case((ChatMessage.role == "assistant", ChatMessage.candidate_id)))),
+            func.count(distinct(case((ChatMessage.role == "user", ChatMessage.candidate_id)))),
+        ).select_from(ChatMessage).join(Candidate, Candidate.id == ChatMessage.candidate_id),
+        Candidate.vacancy_id, owner_id,
+    )).one()
+    return min(_percent(replied, contacted), 100)
+
+
+def top_skills(db: Session, owner_id: int, limit: int) -> List[str]:
+    return list(db.scalars(
+        select(OwnerStats.key).where(
+            OwnerStats.owner_id == owner_id, OwnerStats.metric == "skill", OwnerStats.value > 0
+        ).order_by(OwnerStats.value.desc(), OwnerStats.key).limit(limit)
+    ))
+
+
+def compute_metrics(db: Session, owner_id: int, subscription_tier: Optional[str]) -> Dict[str, Any]:
+    hired = hires(db, owner_id)
+    days = [(approved - first_seen).total_seconds() / 86400 for first_seen, approved in hired]
+    since = datetime.utcnow() - timedelta(days=HIRE_WINDOW_DAYS)
+    recent_hires = sum(1 for _, approved in hired if approved >= since)
+    tier = settings.SUBSCRIPTION_TIERS.get(subscription_tier or "FREE", {})
+    price = tier.get("price", 0)
+
+    return {
+        "top_skills": top_skills(db, owner_id, settings.ANALYTICS_TOP_SKILLS),
+        "metrics": {
+            "time_to_hire": round(sum(days) / len(days), 1) if days else None,
+            "funnel_conversion": funnel_conversion(db, owner_id),
+            "response_rate": response_rate(db, owner_id),
+            "cost_per_hire": round(price / recent_hires) if recent_hires else None,
+            "hires": len(hired),
+        },
+    }
+
+
+# Per-owner cache
+
+class MetricsCache:
+    """(owner_id, subscription tier) -> (rollup version, expires_at, metrics)."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[int, Optional[str]], Tuple[float, float, Dict[str, Any]]] = {}
+
+    def get(self, key, version: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        cached_version, expires_at, metrics = entry
+        if cached_version != version or expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return metrics
+
+    def put(self, key, version: float, metrics: Dict[str, Any]):
+        self._entries[key] = (version, time.monotonic() + settings.ANALYTICS_METRICS_CACHE_TTL_SECONDS, metrics)
+
+    def clear(self):
+        self._entries.clear()
+
+
+metrics_cache = MetricsCache()
+
+
+async def owner_metrics(db, owner_id: int, subscription_tier: Optional[str], version: float) -> Dict[str, Any]:
+    """
+    Cached `compute_metrics` for an AsyncSession. `version` is the owner's
+    rollup version, read by the caller together with the other counters.
+    """
+    key = (owner_id, subscription_tier)
+    metrics = metrics_cache.get(key, version)
+    if metrics is None:
+        metrics = await db.run_sync(compute_metrics, owner_id, subscription_tier)
+        metrics_cache.put(key, version, metrics)
+    return metrics
@@ -0,0 +1,317 @@
+"""
+Analytics Rollup
+
+Per-vacancy and per-owner counters behind the analytics dashboard. Every
+candidate and vacancy write adds its contribution to `vacancy_stats` and
+`owner_stats` in the same transaction (ORM flush events), so the dashboard
+reads a handful of rows instead of aggregating all candidates. `rebuild()`
+recomputes both tables from scratch.
+
+Metrics, keyed by (metric, key):
+    vacancies, candidates, score_sum, score_count   key ""
+    status                                          key = candidate status
+    source                                          key "hh" or "manual"
+    skill                                           key = entry of skills_match
+    version (owner_stats only)                      key "", bumped once by every
+                                                    transaction that touches the owner
+
+Upserts run in (scope, metric, key) order, so concurrent transactions lock
+shared counter rows in the same order and cannot deadlock each other.
+"""
+
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, object_session
+
+from app.models.analytics import OwnerStats, VacancyStats
+from app.models.candidate import Candidate
+from app.models.vacancy import Vacancy
+
+PENDING_KEY = "analytics_rollup_pending"
+BUMPED_KEY = "analytics_rollup_bumped"
+TRACKED_ATTRIBUTES = ("vacancy_id", "status", "score", "skills_match", "hh_resume_id")
+SKILL_KEY_LENGTH = 255
+REBUILD_BATCH = 5000
+VERSION_METRIC = "version"
+
+
+def _skill_keys(skills_match: Any) -> set:
+    if not isinstance(skills_match, list):
+        return set()
+    return {str(skill).strip()[:SKILL_KEY_LENGTH] for skill in skills_match if skill and str(skill).strip()}
+
+
+def candidate_contribution(status: Optional[str], score: Optional[float], skills_match: Any,
+                           hh_resume_id: Optional[str]) -> Counter:
+    """Counters a single candidate adds to its vacancy and owner."""
+    delta = Counter()
+    delta[("candidates", "")] += 1
+    delta[("status", status or "")] += 1
+    delta[("source", "hh" if hh_resume_id else "manual")] += 1
+    if score is not None:
+        delta[("score_sum", "")] += score
+        delta[("score_count", "")] += 1
+    for skill in _skill_keys(skills_match):
+        delta[("skill", skill)] += 1
+    return delta
+
+
+def _column_default(name: str):
+    default = Candidate.__table__.c[name].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+# Incremental maintenance
+
+def _pending(session: Session) -> Dict[int, Counter]:
+    return session.info.setdefault(PENDING_KEY, defaultdict(Counter))
+
+
+def _stage(session: Optional[Session], vacancy_id: Optional[int], delta: Counter, sign: int = 1):
+    if session is None or vacancy_id is None:
+        return
+    pending = _pending(session)[vacancy_id]
+    for metric_key, value in delta.items():
+        pending[metric_key] += sign * value
+
+
+def _values(target: Candidate) -> Dict[str, Any]:
+    return {name: getattr(target, name) for name in TRACKED_ATTRIBUTES}
+
+
+def _previous_values(target: Candidate) -> Dict[str, Any]:
+    state = inspect(target)
+    values = {}
+    for name in TRACKED_ATTRIBUTES:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            values[name] = getattr(target, name)
+    return values
+
+
+def _contribution(values: Dict[str, Any]) -> Counter:
+    return candidate_contribution(values["status"], values["score"], values["skills_match"], values["hh_resume_id"])
+
+
+@event.listens_for(Candidate, "after_insert")
+def _candidate_inserted(mapper, connection, target):
+    values = _values(target)
+    _stage(object_session(target), values["vacancy_id"], _contribution(values))
+
+
+@event.listens_for(Candidate, "after_update")
+def _candidate_updated(mapper, connection, target):
+    before = _previous_values(target)
+    after = _values(target)
+    if before == after:
+        return
+    session = object_session(target)
+    _stage(session, before["vacancy_id"], _contribution(before), sign=-1)
+    _stage(session, after["vacancy_id"], _contribution(after))
+
+
+@event.listens_for(Candidate, "after_delete")
+def _candidate_deleted(mapper, connection, target):
+    before = _previous_values(target)
+    _stage(object_session(target), before["vacancy_id"], _contribution(before), sign=-1)
+
+
+@event.listens_for(Vacancy, "after_insert")
+def _vacancy_inserted(mapper, connection, target):
+    _stage(object_session(target), target.id, Counter({("vacancies", ""): 1}))
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Old values must be loaded before they are overwritten to be subtracted
+for _name in TRACKED_ATTRIBUTES:
+    event.listen(getattr(Candidate, _name), "set", _load_previous_value, active_history=True)
+
+
+def record_candidate_rows(session: Session, rows: Iterable[Dict[str, Any]]):
+    """
+    Stages counters for candidates inserted with a Core bulk INSERT (no ORM
+    events fire for those). Applied on the next flush or commit.
+    """
+    status_default = _column_default("status")
+    score_default = _column_default("score")
+    for row in rows:
+        _stage(session, row["vacancy_id"], candidate_contribution(
+            row.get("status", status_default),
+            row.get("score", score_default),
+            row.get("skills_match"),
+            row.get("hh_resume_id"),
+        ))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_after_flush(session, flush_context):
+    _apply_pending(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_before_commit(session):
+    _apply_pending(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(BUMPED_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _transaction_done(session):
+    session.info.pop(BUMPED_KEY, None)
+
+
+def bumped_owners(session: Session) -> Set[int]:
+    """Owners whose version the session's current transaction has already bumped."""
+    return session.info.setdefault(BUMPED_KEY, set())
+
+
+def _apply_pending(session: Session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        apply_deltas(session.connection(), pending, bumped=bumped_owners(session))
+
+
+# Storage
+
+def _add_rows(connection: Connection, table, keys: List[str], rows: List[Dict[str, Any]]):
+    """Adds `value` of every row to the stored counter (insert when missing)."""
+    if not rows:
+        return
+    # One lock order for every writer (see the module docstring)
+    rows = sorted(rows, key=lambda row: tuple(row[k] for k in keys))
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_={"value": table.c.value + stmt.excluded.value})
+        connection.execute(stmt, rows)
+        return
+    for row in rows:
+        updated = connection.execute(
+            update(table).where(*[table.c[k] == row[k] for k in keys]).values(value=table.c.value + row["value"])
+        )
+        if not updated.rowcount:
+            connection.execute(insert(table), [row])
+
+
+def apply_deltas(connection: Connection, deltas: Dict[int, Counter], owners: Optional[Dict[int, int]] = None,
+                 bumped: Optional[Set[int]] = None):
+    """
+    Adds {vacancy_id: Counter({(metric, key): change})} to vacancy_stats and
+    to the owners' owner_stats, and bumps the version of every owner whose
+    vacancies appear in `deltas` (an empty Counter only bumps the version).
+    `owners` maps vacancy ids to owner ids; it is looked up when not given.
+    Owners in `bumped` are skipped for the version bump and the rest are
+    added to it, so one transaction bumps each owner once.
+    """
+    if owners is None:
+        owners = dict(connection.execute(
+            select(Vacancy.id, Vacancy.owner_id).where(Vacancy.id.in_(list(deltas)))
+        ).all())
+
+    vacancy_rows = []
+    owner_totals = defaultdict(float)
+    for vacancy_id, delta in deltas.items():
+        owner_id = owners.get(vacancy_id)
+        if owner_id is None:
+            continue
+        if bumped is None or owner_id not in bumped:
+            owner_totals[(owner_id, VERSION_METRIC, "")] = 1
+        for (metric, key), value in delta.items():
+            if not value:
+                continue
+            vacancy_rows.append({
+                "vacancy_id": vacancy_id, "owner_id": owner_id, "metric": metric, "key": key, "value": value,
+            })
+            owner_totals[(owner_id, metric, key)] += value
+    owner_rows = [
+        {"owner_id": owner_id, "metric": metric, "key": key, "value": value}
+        for (owner_id, metric, key), value in owner_totals.items()
+        if value
+    ]
+    _add_rows(connection, VacancyStats.__table__, ["vacancy_id", "metric", "key"], vacancy_rows)
+    _add_rows(connection, OwnerStats.__table__, ["owner_id", "metric", "key"], owner_rows)
+    if bumped is not None:
+        bumped.update(owner_id for owner_id, metric, _ in owner_totals if metric == VERSION_METRIC)
+
+
+def touch(connection: Connection, vacancy_ids: Iterable[int], bumped: Optional[Set[int]] = None):
+    """Bumps the owners' version for writes that change no counter."""
+    apply_deltas(connection, {vacancy_id: Counter() for vacancy_id in vacancy_ids}, bumped=bumped)
+
+
+def rebuild(connection: Connection) -> Dict[str, int]:
+    """Recomputes vacancy_stats and owner_stats from the candidates table."""
+    connection.execute(delete(VacancyStats))
+    # Versions must never go back: a reset one could match a stale cached entry
+    connection.execute(delete(OwnerStats).where(OwnerStats.metric != VERSION_METRIC))
+
+    owners = {}
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+    for vacancy_id, owner_id in connection.execute(select(Vacancy.id, Vacancy.owner_id)):
+        owners[vacancy_id] = owner_id
+        deltas[vacancy_id][("vacancies", "")] += 1
+
+    # Counts and score aggregates in SQL ...
+    totals = select(
+        Candidate.vacancy_id,
+        func.count(Candidate.id),
+        func.count(Candidate.hh_resume_id),
+        func.sum(Candidate.score),
+        func.count(Candidate.score),
+    ).group_by(Candidate.vacancy_id)
+    for vacancy_id, count, hh, score_sum, score_count in connection.execute(totals):
+        delta = deltas[vacancy_id]
+        delta[("candidates", "")] += count
+        delta[("source", "hh")] += hh
+        delta[("source", "manual")] += count - hh
+        delta[("score_sum", "")] += score_sum or 0.0
+        delta[("score_count", "")] += score_count
+
+    by_status = select(Candidate.vacancy_id, Candidate.status, func.count(Candidate.id)).group_by(
+        Candidate.vacancy_id, Candidate.status
+    )
+    for vacancy_id, status, count in connection.execute(by_status):
+        deltas[vacancy_id][("status", status or "")] += count
+
+    # ... skills by streaming the JSON arrays
+    skills = connection.execute(
+        select(Candidate.vacancy_id, Candidate.skills_match)
+        .where(Candidate.skills_match.isnot(None))
+        .execution_options(yield_per=REBUILD_BATCH)
+    )
+    for vacancy_id, skills_match in skills:
+        for skill in _skill_keys(skills_match):
+            deltas[vacancy_id][("skill", skill)] += 1
+
+    apply_deltas(connection, deltas, owners=owners)
+    return {
+        "vacancies": len(owners),
+        "vacancy_rows": connection.execute(select(func.count()).select_from(VacancyStats)).scalar(),
+        "owner_rows": connection.execute(select(func.count()).select_from(OwnerStats)).scalar(),
+    }
+
+
+def owner_metrics(rows: Iterable) -> Dict[str, Dict[str, float]]:
+    """Groups (metric, key, value) rollup rows into {metric: {key: value}}."""
+    metrics: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for metric, key, value in rows:
+        metrics[metric][key] = value
+    return metrics
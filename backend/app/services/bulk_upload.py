@@ -0,0 +1,210 @@
+"""
+Bulk Resume Upload Service
+
+Imports many resumes at once from ZIP archives and/or plain multipart files.
+Archive entries are streamed one at a time (never the whole archive in
+memory), deduplicated by SHA-256 of their bytes, parsed in parallel on the
+resume parser pool (files already in resume_blob are not parsed again) and
+inserted with a single bulk INSERT.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import zipfile
+from typing import Any, Dict, Iterator, List, Tuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.candidate import Candidate
+from app.models.candidate_history import CandidateStatusChange
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import analytics_engine, analytics_rollup, resume_store
+from app.services.resume_parser import ResumeParseError, resume_parser_pool
+from app.services.subscription import subscription_service
+
+logger = logging.getLogger(__name__)
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt', '.rtf')
+
+
+class BulkUploadError(Exception):
+    pass
+
+
+def _read_limited(stream, limit: int) -> bytes:
+    """Reads at most `limit` bytes; raises if the stream holds more."""
+    data = stream.read(limit + 1)
+    if len(data) > limit:
+        raise ResumeParseError(f"File is too large (limit {limit} bytes)")
+    return data
+
+
+def iter_upload_entries(files: List[UploadFile]) -> Iterator[Tuple[str, Any]]:
+    """
+    Yields (filename, read_bytes) for every resume in the upload. ZIP files
+    are expanded lazily; `read_bytes()` reads one entry at a time.
+    """
+    for upload in files:
+        name = upload.filename or "resume"
+        if name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(upload.file)
+            except zipfile.BadZipFile:
+                raise BulkUploadError(f"{name} is not a valid ZIP archive")
+            for info in archive.infolist():
+                entry_name = os.path.basename(info.filename)
+                if info.is_dir() or not entry_name or entry_name.startswith(".") or "__MACOSX" in info.filename:
+                    continue
+                if not entry_name.lower().endswith(RESUME_EXTENSIONS):
+                    continue
+
+                def read_entry(archive=archive, info=info):
+                    # file_size comes from the archive header; the limited read guards zip bombs
+                    if info.file_size > settings.RESUME_MAX_BYTES:
+                        raise ResumeParseError(f"File is too large (limit {settings.RESUME_MAX_BYTES} bytes)")
+                    with archive.open(info) as entry:
+                        return _read_limited(entry, settings.RESUME_MAX_BYTES)
+
+                yield entry_name, read_entry
+        else:
+            yield name, lambda upload=upload: _read_limited(upload.file, settings.RESUME_MAX_BYTES)
+
+
+async def import_resumes(db: AsyncSession, vacancy: Vacancy, user: User, files: List[UploadFile]) -> Dict[str, Any]:
+    """
+    Parses and stores every resume in `files` as a candidate of `vacancy`.
+    The subscription quota is checked once for the whole batch and reserved
+    atomically before the insert; resumes beyond it are skipped. Files that
+    fail to parse do not use up quota.
+    """
+    started = time.monotonic()
+    status = subscription_service.get_subscription_status(user)
+    remaining = max(0, status["limit"] - status["used"]) if status["can_upload"] else 0
+
+    # Bounds both parallel parses and the number of raw files held in memory
+    in_flight = max(1, resume_parser_pool.workers * 2)
+    semaphore = asyncio.Semaphore(in_flight)
+    seen_hashes = set()
+    duplicates = 0
+    skipped_quota = 0
+    parse_failures = 0
+    failed: List[Dict[str, str]] = []
+    accepted: List[Tuple[str, str]] = []  # (filename, sha256)
+    batch: List[Tuple[str, str, bytes]] = []
+    tasks = []
+
+    async def parse_one(filename: str, digest: str, data: bytes):
+        nonlocal parse_failures
+        try:
+            return filename, digest, len(data), await resume_parser_pool.parse(filename, data), None
+        except ResumeParseError as e:
+            parse_failures += 1
+            return filename, digest, len(data), None, str(e)
+        finally:
+            semaphore.release()
+
+    async def flush():
+        # Files already in resume_blob are not parsed again (one IN query per batch)
+        known = await resume_store.get_hashes(db, [digest for _, digest, _ in batch])
+        for filename, digest, data in batch:
+            if digest in known:
+                semaphore.release()
+            else:
+                tasks.append(asyncio.create_task(parse_one(filename, digest, data)))
+        batch.clear()
+
+    def quota_full() -> bool:
+        return len(accepted) - parse_failures >= remaining
+
+    # ZIP directories and spooled uploads may live on disk: read them off the loop
+    entries = iter_upload_entries(files)
+    try:
+        count = 0
+        while True:
+            entry = await run_in_threadpool(next, entries, None)
+            if entry is None:
+                break
+            filename, read_bytes = entry
+            if count >= settings.BULK_UPLOAD_MAX_FILES:
+                raise BulkUploadError(f"Too many files (limit {settings.BULK_UPLOAD_MAX_FILES})")
+            count += 1
+            await semaphore.acquire()
+            try:
+                data = await run_in_threadpool(read_bytes)
+            except ResumeParseError as e:
+                semaphore.release()
+                failed.append({"filename": filename, "error": str(e)})
+                continue
+
+            digest = resume_store.content_hash(data)
+            if digest in seen_hashes:
+                semaphore.release()
+                duplicates += 1
+                continue
+            seen_hashes.add(digest)
+
+            if quota_full() and (batch or any(not task.done() for task in tasks)):
+                # Parses still running may fail and free their slots
+                await flush()
+                await asyncio.wait(tasks)
+            if quota_full():
+                semaphore.release()
+                skipped_quota += 1
+                continue
+            accepted.append((filename, digest))
+            batch.append((filename, digest, data))
+            # Flush before the next acquire could wait on slots held by the batch
+            if len(batch) >= in_flight:
+                await flush()
+        await flush()
+        outcomes = await asyncio.gather(*tasks)
+    finally:
+        # On errors (e.g. too many files) no parse is left running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    parsed = {}
+    failed_hashes = set()
+    for filename, digest, size, text, error in outcomes:
+        if error is not None:
+            failed.append({"filename": filename, "error": error})
+            failed_hashes.add(digest)
+        else:
+            parsed[digest] = {"content": text, "size_bytes": size}
+    await resume_store.save_texts(db, parsed)
+
+    rows = [
+        {"vacancy_id": vacancy.id, "filename": filename, "resume_hash": digest, "status": "NEW"}
+        for filename, digest in accepted
+        if digest not in failed_hashes
+    ]
+    # Concurrent uploads may have used part of the quota counted above
+    granted = await subscription_service.reserve_resumes(db, user, len(rows)) if rows else 0
+    skipped_quota += len(rows) - granted
+    rows = rows[:granted]
+    if rows:
+        candidate_ids = (await db.scalars(
+            insert(Candidate).returning(Candidate.id, sort_by_parameter_order=True), rows
+        )).all()
+        await db.execute(insert(CandidateStatusChange), analytics_engine.initial_history(candidate_ids, rows))
+        await db.run_sync(analytics_rollup.record_candidate_rows, rows)
+    await db.commit()
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Bulk upload for vacancy {vacancy.id}: {len(rows)} created in {elapsed:.2f}s")
+    return {
+        "vacancy_id": vacancy.id,
+        "created": len(rows),
+        "duplicates": duplicates,
+        "skipped_quota": skipped_quota,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 2),
+    }
@@ -0,0 +1,326 @@
+"""
+Candidate Export Service
+
+Streams an owner's candidates (optionally one vacancy) as CSV, XLSX or
+Parquet. Rows are read with a server-side cursor in batches of
+EXPORT_BATCH_SIZE and every batch is encoded and sent before the next one
+is fetched, so memory use does not depend on the number of rows and the
+first bytes go out before the query has finished.
+
+XLSX is written as a streamed zip (no seeking back), with a new sheet every
+1,048,575 rows, Excel's sheet limit. Parquet is written with `pyarrow`;
+every batch becomes a row group.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.candidate import Candidate
+from app.models.vacancy import Vacancy
+
+COLUMNS = (
+    "id", "vacancy_id", "vacancy", "filename", "status", "score",
+    "recommendation", "skills_match", "missing_skills", "source",
+)
+LIST_COLUMNS = ("skills_match", "missing_skills")
+LIST_SEPARATOR = "; "
+
+
+def export_query(owner_id: int, vacancy_id: Optional[int] = None):
+    stmt = select(
+        Candidate.id,
+        Candidate.vacancy_id,
+        Vacancy.title,
+        Candidate.filename,
+        Candidate.status,
+        Candidate.score,
+        Candidate.recommendation,
+        Candidate.skills_match,
+        Candidate.missing_skills,
+        Candidate.hh_resume_id,
+    ).join(Vacancy, Vacancy.id == Candidate.vacancy_id).where(Vacancy.owner_id == owner_id)
+    if vacancy_id is not None:
+        stmt = stmt.where(Candidate.vacancy_id == vacancy_id)
+    return stmt.order_by(Candidate.vacancy_id, Candidate.id)
+
+
+def export_row(row) -> Dict[str, Any]:
+    values = dict(zip(COLUMNS, row))
+    for name in LIST_COLUMNS:
+        value = values[name]
+        values[name] = [str(item) for item in value] if isinstance(value, list) else []
+    values["source"] = "hh" if values["source"] else "manual"
+    return values
+
+
+class _Chunks:
+    """Write-only file object whose written bytes are collected with `drain()`."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+# Spreadsheet apps run CSV cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value: Any) -> Any:
+    """Quotes text that a spreadsheet would evaluate (e.g. a filename "=HYPERLINK(...)")."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+# Writers: begin() / write(rows) / finish() each return the bytes to send
+
+class CsvWriter:
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def _encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def begin(self) -> bytes:
+        # BOM: Excel otherwise opens UTF-8 (Cyrillic) as the local code page
+        return "\ufeff".encode("utf-8") + self._encode([COLUMNS])
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        return self._encode([
+            [_csv_cell(LIST_SEPARATOR.join(row[c]) if c in LIST_COLUMNS else row[c]) for c in COLUMNS]
+            for row in rows
+        ])
+
+    def finish(self) -> bytes:
+        return b""
+
+
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_DOCUMENT_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class XlsxWriter:
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+    max_sheet_rows = 1048576
+
+    def __init__(self):
+        self._out = _Chunks()
+        self._zip = zipfile.ZipFile(self._out, "w", compression=zipfile.ZIP_DEFLATED)
+        self._letters = [_column_letter(i) for i in range(len(COLUMNS))]
+        self._sheets = 0
+        self._sheet = None
+        self._sheet_rows = 0
+
+    def _cell(self, ref: str, value: Any) -> str:
+        if value is None or value == "":
+            return ""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        text = escape(_XML_INVALID.sub("", str(value)))
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def _row(self, values: Sequence[Any]) -> str:
+        self._sheet_rows += 1
+        number = self._sheet_rows
+        cells = "".join(self._cell(f"{letter}{number}", value) for letter, value in zip(self._letters, values))
+        return f'<row r="{number}">{cells}</row>'
+
+    def _open_sheet(self):
+        self._sheets += 1
+        self._sheet_rows = 0
+        self._sheet = self._zip.open(f"xl/worksheets/sheet{self._sheets}.xml", "w", force_zip64=True)
+        self._sheet.write(
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<worksheet xmlns="{_SPREADSHEET_NS}"><sheetData>{self._row(COLUMNS)}'.encode("utf-8")
+        )
+
+    def _close_sheet(self):
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._sheet = None
+
+    def begin(self) -> bytes:
+        self._open_sheet()
+        return self._out.drain()
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        parts = []
+        for row in rows:
+            if self._sheet_rows >= self.max_sheet_rows:
+                self._sheet.write("".join(parts).encode("utf-8"))
+                parts = []
+                self._close_sheet()
+                self._open_sheet()
+            parts.append(self._row([
+                LIST_SEPARATOR.join(row[c]) if c in LIST_COLUMNS else row[c] for c in COLUMNS
+            ]))
+        self._sheet.write("".join(parts).encode("utf-8"))
+        return self._out.drain()
+
+    def finish(self) -> bytes:
+        self._close_sheet()
+        sheet_numbers = range(1, self._sheets + 1)
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in sheet_numbers
+        )
+        sheets = "".join(
+            f'<sheet name="Candidates {n}" sheetId="{n}" r:id="rId{n}"/>' if n > 1
+            else '<sheet name="Candidates" sheetId="1" r:id="rId1"/>'
+            for n in sheet_numbers
+        )
+        relationships = "".join(
+            f'<Relationship Id="rId{n}" Type="{_DOCUMENT_RELATIONSHIP}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in sheet_numbers
+        )
+        parts = {
+            "[Content_Types].xml": (
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                f'{overrides}</Types>'
+            ),
+            "_rels/.rels": (
+                f'<Relationships xmlns="{_RELATIONSHIPS_NS}">'
+                f'<Relationship Id="rId1" Type="{_DOCUMENT_RELATIONSHIP}/officeDocument" Target="xl/workbook.xml"/>'
+                '</Relationships>'
+            ),
+            "xl/workbook.xml": (
+                f'<workbook xmlns="{_SPREADSHEET_NS}" xmlns:r="{_DOCUMENT_RELATIONSHIP}">'
+                f'<sheets>{sheets}</sheets></workbook>'
+            ),
+            "xl/_rels/workbook.xml.rels": f'<Relationships xmlns="{_RELATIONSHIPS_NS}">{relationships}</Relationships>',
+        }
+        for name, xml in parts.items():
+            self._zip.writestr(name, '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + xml)
+        self._zip.close()
+        return self._out.drain()
+
+
+class ParquetWriter:
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("vacancy_id", pa.int64()),
+            ("vacancy", pa.string()),
+            ("filename", pa.string()),
+            ("status", pa.string()),
+            ("score", pa.float64()),
+            ("recommendation", pa.string()),
+            ("skills_match", pa.list_(pa.string())),
+            ("missing_skills", pa.list_(pa.string())),
+            ("source", pa.string()),
+        ])
+        self._out = _Chunks()
+        self._writer = pq.ParquetWriter(self._out, self._schema, compression="zstd")
+
+    def begin(self) -> bytes:
+        return self._out.drain()
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        if rows:
+            self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+        return self._out.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._out.drain()
+
+
+FORMATS: Dict[str, Callable[[], Any]] = {
+    "csv": CsvWriter,
+    "xlsx": XlsxWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def is_available(fmt: str) -> bool:
+    if fmt != "parquet":
+        return fmt in FORMATS
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def filename(fmt: str, vacancy_id: Optional[int] = None) -> str:
+    scope = f"vacancy_{vacancy_id}" if vacancy_id is not None else "all"
+    return f"candidates_{scope}_{date.today().isoformat()}.{FORMATS[fmt].extension}"
+
+
+async def stream_export(owner_id: int, fmt: str, vacancy_id: Optional[int] = None,
+                        session_factory=AsyncSessionLocal) -> AsyncIterator[bytes]:
+    """
+    Yields the export file chunk by chunk. Opens its own session: it runs
+    while the response is sent, after the request's session is closed.
+    """
+    writer = FORMATS[fmt]()
+    chunk = writer.begin()
+    if chunk:
+        yield chunk
+    async with session_factory() as db:
+        result = await db.stream(
+            export_query(owner_id, vacancy_id).execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            # Encoding a batch is CPU work: keep it off the event loop
+            chunk = await run_in_threadpool(writer.write, [export_row(row) for row in rows])
+            if chunk:
+                yield chunk
+    yield await run_in_threadpool(writer.finish)
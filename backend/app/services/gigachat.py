@@ -3,14 +3,23 @@ GigaChat API Integration Service
 Provides AI chat functionality using Sber's GigaChat
 """
 
-import requests
+import asyncio
+import time
 import uuid
-from typing import List, Dict, Any, Optional
+import weakref
+from typing import AsyncIterator, List, Dict, Any, Optional
+import httpx
 from app.core.config import settings
+from app.services.llm_client import llm_gateway
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tokens are refreshed this long before they expire
+TOKEN_REFRESH_MARGIN_SECONDS = 60
+# GigaChat tokens live 30 minutes; used when the response has no expires_at
+DEFAULT_TOKEN_LIFETIME_SECONDS = 30 * 60
+
 
 class GigaChatService:
     """Service для работы с GigaChat API"""
@@ -19,11 +28,41 @@ class GigaChatService:
         self.oauth_url = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
         self.chat_url = "https://gigachat.devices.sberbank.ru/api/v1/chat/completions"
         self.access_token = None
-        
-    def get_access_token(self) -> Optional[str]:
+        self.token_expires_at = 0.0
+        # asyncio.Lock привязан к своему event loop: отдельный lock на каждый loop
+        self._token_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    def _token_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._token_locks.get(loop)
+        if lock is None:
+            lock = self._token_locks[loop] = asyncio.Lock()
+        return lock
+
+    def _token_usable(self, rejected: Optional[str]) -> bool:
+        return (
+            bool(self.access_token)
+            and self.access_token != rejected
+            and time.time() < self.token_expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+        )
+
+    async def get_access_token(self, rejected: Optional[str] = None) -> Optional[str]:
         """
-        Получение OAuth токена для GigaChat API
+        Получение OAuth токена для GigaChat API (действующий токен переиспользуется).
+
+        Args:
+            rejected: токен, на который API только что ответил 401
         """
+        if self._token_usable(rejected):
+            return self.access_token
+        # Параллельные запросы не должны одновременно обновлять токен
+        async with self._token_lock():
+            # Пока ждали lock, токен мог обновить другой запрос
+            if self._token_usable(rejected):
+                return self.access_token
+            return await self._fetch_access_token()
+
+    async def _fetch_access_token(self) -> Optional[str]:
         try:
             payload = {
                 'scope': settings.GIGACHAT_SCOPE
@@ -36,17 +75,22 @@ class GigaChatService:
                 'Authorization': f'Basic {settings.GIGACHAT_API_KEY}'
             }
             
-            response = requests.post(
+            response = await llm_gateway.post(
+                "gigachat",
                 self.oauth_url,
                 headers=headers,
                 data=payload,
-                verify=False,  # SSL сертификаты Sber
                 timeout=10
             )
             
             if response.status_code == 200:
                 data = response.json()
                 self.access_token = data.get('access_token')
+                # expires_at приходит в миллисекундах
+                expires_at = data.get('expires_at')
+                self.token_expires_at = (
+                    expires_at / 1000 if expires_at else time.time() + DEFAULT_TOKEN_LIFETIME_SECONDS
+                )
                 logger.info("✅ GigaChat: Access token получен")
                 return self.access_token
             else:
@@ -57,7 +101,7 @@ class GigaChatService:
             logger.error(f"❌ GigaChat OAuth exception: {str(e)}")
             return None
     
-    def chat_completion(
+    async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
@@ -75,15 +119,15 @@ class GigaChatService:
             Текст ответа от GigaChat или None при ошибке
         """
         try:
-            # Получаем токен, если его нет
-            if not self.access_token:
-                if not self.get_access_token():
-                    return None
+            # Получаем токен, если его нет или он истекает
+            token = await self.get_access_token()
+            if not token:
+                return None
             
             headers = {
                 'Content-Type': 'application/json',
                 'Accept': 'application/json',
-                'Authorization': f'Bearer {self.access_token}'
+                'Authorization': f'Bearer {token}'
             }
             
             payload = {
@@ -94,12 +138,12 @@ class GigaChatService:
                 'n': 1
             }
             
-            response = requests.post(
+            response = await llm_gateway.post(
+                "gigachat",
                 self.chat_url,
                 headers=headers,
                 json=payload,
-                verify=False,  # SSL сертификаты Sber
-                timeout=30
+                timeout=settings.LLM_TIMEOUT_SECONDS
             )
             
             if response.status_code == 200:
@@ -115,9 +159,8 @@ class GigaChatService:
             elif response.status_code == 401:
                 # Токен истёк, получаем новый и повторяем
                 logger.warning("⚠️ GigaChat: Токен истёк, получаем новый...")
-                self.access_token = None
-                if self.get_access_token():
-                    return self.chat_completion(messages, temperature, max_tokens)
+                if await self.get_access_token(rejected=token):
+                    return await self.chat_completion(messages, temperature, max_tokens)
                 return None
                 
             else:
@@ -128,7 +171,48 @@ class GigaChatService:
             logger.error(f"❌ GigaChat exception: {str(e)}")
             return None
     
-    def analyze_candidate(
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый вариант chat_completion: выдаёт фрагменты ответа по мере генерации.
+        В отличие от chat_completion, ошибки пробрасываются вызывающему коду.
+        """
+        rejected = None
+        for attempt in range(2):
+            token = await self.get_access_token(rejected=rejected)
+            if not token:
+                raise RuntimeError("GigaChat: не удалось получить access token")
+
+            headers = {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+                'Authorization': f'Bearer {token}'
+            }
+            payload = {
+                'model': 'GigaChat',
+                'messages': messages,
+                'temperature': temperature,
+                'max_tokens': max_tokens,
+                'n': 1
+            }
+
+            try:
+                async for delta in llm_gateway.stream_chat("gigachat", self.chat_url, headers, payload):
+                    yield delta
+                return
+            except httpx.HTTPStatusError as e:
+                # Токен истёк до начала ответа: получаем новый и повторяем один раз
+                if e.response.status_code == 401 and attempt == 0:
+                    logger.warning("⚠️ GigaChat: Токен истёк, получаем новый...")
+                    rejected = token
+                    continue
+                raise
+
+    async def analyze_candidate(
         self,
         vacancy_description: str,
         resume_text: str,
@@ -167,7 +251,7 @@ class GigaChatService:
             }
         ]
         
-        response_text = self.chat_completion(messages, temperature=0.7)
+        response_text = await self.chat_completion(messages, temperature=0.7)
         
         if not response_text:
             return {
@@ -203,11 +287,11 @@ class GigaChatService:
 gigachat_service = GigaChatService()
 
 
-def get_gigachat_response(
+async def get_gigachat_response(
     messages: List[Dict[str, str]],
     temperature: float = 0.7
 ) -> Optional[str]:
     """
     Удобная функция для получения ответа от GigaChat
     """
-    return gigachat_service.chat_completion(messages, temperature)
+    return await gigachat_service.chat_completion(messages, temperature)
@@ -1,13 +1,70 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
 import requests
 import json
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+import httpx
 from app.core.config import settings
+from app.services.rate_limit import AsyncTokenBucket
+
+def parse_hh_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parses HH.ru timestamps ("2024-05-01T12:00:00+0300") to naive UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+    except ValueError:
+        return None
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _is_newer(value: Optional[str], since: datetime) -> bool:
+    parsed = parse_hh_datetime(value)
+    # Items without a usable timestamp are never dropped. HH timestamps have
+    # second precision, so the cursor's own second is read again: a negotiation
+    # updated in that second after the last sync would otherwise be lost
+    return parsed is None or parsed >= since
+
+
+class HHAPIError(Exception):
+    """HH.ru answered with an error after all retries, or could not be reached."""
+
+
+class CallCounter:
+    """HH.ru API calls made inside one HHService.count_calls() block."""
+
+    def __init__(self):
+        self.calls = 0
+
+
+# Counter of the sync running in the current task; tasks spawned by
+# asyncio.gather() share it, concurrent syncs each have their own
+_call_counter: contextvars.ContextVar[Optional[CallCounter]] = contextvars.ContextVar("hh_call_counter", default=None)
+
 
 class HHService:
     def __init__(self, mock_mode: bool = False):
         self.mock_mode = mock_mode
         self.base_url = "https://api.hh.ru"
         self.user_agent = f"NexusAI/1.0 ({settings.EMAIL})"
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buckets: Dict[str, AsyncTokenBucket] = {}
+        # Per-token 429 backoff: token -> (monotonic deadline, consecutive 429s)
+        self._backoff: Dict[str, Tuple[float, int]] = {}
+
+    @contextmanager
+    def count_calls(self) -> Iterator[CallCounter]:
+        """Counts the API calls made by the current task (and its children) inside the block."""
+        counter = CallCounter()
+        reset = _call_counter.set(counter)
+        try:
+            yield counter
+        finally:
+            _call_counter.reset(reset)
 
     def _get_headers(self, token: Optional[str] = None):
         headers = {"User-Agent": self.user_agent}
@@ -94,24 +151,85 @@ class HHService:
         except Exception as e:
             return {"error": f"Exception: {str(e)}"}
 
-    def get_responses(self, hh_vacancy_id: str, token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """
-        Fetches responses (candidates) for a vacancy using /negotiations endpoint.
-        """
-        if self.mock_mode or not token:
-            print(f"[HH] Fetching responses for vacancy {hh_vacancy_id} (Mock)...")
-            return [
-                {
-                    "hh_resume_id": "mock_resume_123",
-                    "full_name": "Иван Иванов",
-                    "email": "ivan@example.com",
-                    "content": "Опытный Python разработчик с навыками FastAPI и SQL."
-                }
-            ]
+    def _async_client(self) -> httpx.AsyncClient:
+        """Shared pooled client for HH.ru API calls (one per event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=settings.HH_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.HH_MAX_CONCURRENCY,
+                ),
+                timeout=httpx.Timeout(15.0, connect=5.0),
+            )
+            self._client_loop = loop
+        return self._client
 
-    def get_responses(self, hh_vacancy_id: str, token: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _bucket(self, token: str) -> AsyncTokenBucket:
+        """HH.ru rate limits apply per access token."""
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            bucket = AsyncTokenBucket(
+                rate=settings.HH_RATE_LIMIT_PER_SECOND,
+                capacity=settings.HH_RATE_LIMIT_BURST,
+            )
+            self._buckets[token] = bucket
+        return bucket
+
+    def backoff_remaining(self, token: str) -> float:
+        """Seconds left before `token` may call HH.ru again after a 429."""
+        deadline, _ = self._backoff.get(token, (0.0, 0))
+        return max(0.0, deadline - time.monotonic())
+
+    def _record_rate_limited(self, token: str, retry_after: Optional[str]) -> float:
+        _, strikes = self._backoff.get(token, (0.0, 0))
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = min(settings.HH_BACKOFF_MAX_SECONDS, 2.0 ** strikes)
+        self._backoff[token] = (time.monotonic() + delay, strikes + 1)
+        return delay
+
+    async def _api_get(self, path: str, token: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """Rate-limited GET that backs off the token on 429 honouring Retry-After."""
+        request_headers = {**self._get_headers(token), **(headers or {})}
+        response = None
+        for _ in range(settings.HH_MAX_RETRIES + 1):
+            wait = self.backoff_remaining(token)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._bucket(token).acquire()
+            counter = _call_counter.get()
+            if counter is not None:
+                counter.calls += 1
+            response = await self._async_client().get(path, params=params, headers=request_headers)
+            if response.status_code != 429:
+                self._backoff.pop(token, None)
+                return response
+            delay = self._record_rate_limited(token, response.headers.get("Retry-After"))
+            print(f"[HH] 429 on {path}, backing off {delay}s")
+        return response
+
+    async def get_responses(
+        self,
+        hh_vacancy_id: str,
+        token: Optional[str] = None,
+        since: Optional[datetime] = None,
+        resume_versions: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Fetches responses (candidates) for a vacancy using /negotiations endpoint.
+        Resume details are fetched concurrently (bounded by HH_MAX_CONCURRENCY
+        and the per-token rate limit).
+
+        Incremental mode: with `since`, only negotiations updated at or after
+        it are read; resumes whose version matches `resume_versions[resume_id]` are
+        skipped (conditional request on the stored ETag).
+
+        A resume that cannot be fetched comes back as a `fetch_failed` entry
+        with its negotiation, so the caller can retry it on the next sync.
         """
         if self.mock_mode or not token:
             print(f"[HH] Fetching responses for vacancy {hh_vacancy_id} (Mock because mock_mode={self.mock_mode} or no token)...")
@@ -120,70 +238,171 @@ class HHService:
                     "hh_resume_id": "mock_resume_123",
                     "full_name": "Иван Иванов",
                     "email": "ivan@example.com",
-                    "content": "Опытный Python разработчик с навыками FastAPI и SQL."
+                    "content": "Опытный Python разработчик с навыками FastAPI и SQL.",
+                    "negotiation_id": None,
+                    "negotiation_updated_at": None,
+                    "resume_version": None,
                 }
             ]
 
         # Real implementation
         try:
-            resp = requests.get(
-                f"{self.base_url}/negotiations?vacancy_id={hh_vacancy_id}", 
-                headers=self._get_headers(token)
-            )
-            if resp.status_code == 200:
-                items = resp.json().get("items", [])
-                results = []
-                for item in items:
-                    resume_brief = item.get("resume", {})
-                    resume_id = resume_brief.get("id")
-                    
-                    if not resume_id:
-                        continue
-
-                    # Fetch full resume details if possible
-                    resume_details = self.get_resume_details(resume_id, token)
-                    
-                    full_name = f"{resume_brief.get('first_name', '')} {resume_brief.get('last_name', '')}".strip()
-                    if not full_name and resume_details:
-                        full_name = f"{resume_details.get('first_name', '')} {resume_details.get('last_name', '')}".strip()
-
-                    content = ""
-                    if resume_details:
-                        # Construct content from experience and skills
-                        exp = resume_details.get("experience", [])
-                        skills = ", ".join([s.get("name", "") for s in resume_details.get("skill_set", [])])
-                        content = f"Title: {resume_details.get('title', 'N/A')}\nSkills: {skills}\n"
-                        for e in exp:
-                            content += f"\n- {e.get('company', 'N/A')}: {e.get('position', 'N/A')} ({e.get('description', 'N/A')})"
-                    else:
-                        content = resume_brief.get("title", "No content available")
-
-                    results.append({
-                        "hh_resume_id": resume_id,
-                        "full_name": full_name or "Anonymous",
-                        "email": item.get("email") or resume_brief.get("email"),
-                        "content": content
-                    })
-                return results
-            else:
-                print(f"[HH] Error fetching negotiations: {resp.status_code} - {resp.text}")
-                return []
+            items = await self.get_negotiations(hh_vacancy_id, token, since=since)
         except Exception as e:
             print(f"[HH] Exception fetching negotiations: {str(e)}")
             return []
 
-    def get_resume_details(self, resume_id: str, token: str) -> Optional[Dict[str, Any]]:
-        """Fetches full resume details."""
+        resume_versions = resume_versions or {}
+        semaphore = asyncio.Semaphore(settings.HH_MAX_CONCURRENCY)
+
+        async def fetch_one(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            resume_brief = item.get("resume") or {}
+            resume_id = resume_brief.get("id")
+            if not resume_id:
+                return None
+            known_version = resume_versions.get(resume_id)
+            if known_version and known_version == resume_brief.get("updated_at"):
+                return None
+            async with semaphore:
+                # Fetch full resume details if changed since the last sync
+                try:
+                    changed, resume_details, version = await self.get_resume_if_changed(resume_id, token, known_version)
+                except HHAPIError as e:
+                    print(f"[HH] {e}")
+                    return {
+                        "hh_resume_id": resume_id,
+                        "negotiation_id": item.get("id"),
+                        "negotiation_updated_at": item.get("updated_at"),
+                        "fetch_failed": True,
+                    }
+            if not changed:
+                return None
+            return self._build_response(item, resume_details, version)
+
+        fetched = await asyncio.gather(*(fetch_one(item) for item in items))
+        return [r for r in fetched if r is not None]
+
+    async def get_negotiations(self, hh_vacancy_id: str, token: str, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Reads the pages of /negotiations for a vacancy, newest first.
+        Without `since` all pages are fetched concurrently; with it pages are
+        read in order until one holds nothing as new as `since`.
+        """
+        params = {
+            "vacancy_id": hh_vacancy_id,
+            "page": 0,
+            "per_page": settings.HH_PAGE_SIZE,
+            "order_by": "updated_at",
+            "order": "desc",
+        }
+
+        async def fetch_page(page: int) -> Optional[Dict[str, Any]]:
+            page_resp = await self._api_get("/negotiations", token, {**params, "page": page})
+            if page_resp.status_code != 200:
+                print(f"[HH] Error fetching negotiations page {page}: {page_resp.status_code} - {page_resp.text}")
+                return None
+            return page_resp.json()
+
+        first = await fetch_page(0)
+        if first is None:
+            return []
+        pages = int(first.get("pages") or 1)
+
+        if since is not None:
+            items = []
+            data, page = first, 0
+            while data is not None:
+                fresh = [i for i in data.get("items", []) if _is_newer(i.get("updated_at"), since)]
+                items.extend(fresh)
+                page += 1
+                if not fresh or page >= pages:
+                    break
+                data = await fetch_page(page)
+            return items
+
+        items = list(first.get("items", []))
+        if pages <= 1:
+            return items
+
+        semaphore = asyncio.Semaphore(settings.HH_MAX_CONCURRENCY)
+
+        async def bounded_page(page: int) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await fetch_page(page)
+
+        for data in await asyncio.gather(*(bounded_page(p) for p in range(1, pages))):
+            if data is not None:
+                items.extend(data.get("items", []))
+        return items
+
+    def _build_response(self, item: Dict[str, Any], resume_details: Optional[Dict[str, Any]],
+                        resume_version: Optional[str] = None) -> Dict[str, Any]:
+        resume_brief = item.get("resume") or {}
+        resume_id = resume_brief.get("id")
+
+        full_name = f"{resume_brief.get('first_name', '')} {resume_brief.get('last_name', '')}".strip()
+        if not full_name and resume_details:
+            full_name = f"{resume_details.get('first_name', '')} {resume_details.get('last_name', '')}".strip()
+
+        content = ""
+        if resume_details:
+            # Construct content from experience and skills
+            exp = resume_details.get("experience", [])
+            skills = ", ".join([s.get("name", "") for s in resume_details.get("skill_set", [])])
+            content = f"Title: {resume_details.get('title', 'N/A')}\nSkills: {skills}\n"
+            for e in exp:
+                content += f"\n- {e.get('company', 'N/A')}: {e.get('position', 'N/A')} ({e.get('description', 'N/A')})"
+        else:
+            content = resume_brief.get("title", "No content available")
+
+        return {
+            "hh_resume_id": resume_id,
+            "full_name": full_name or "Anonymous",
+            "email": item.get("email") or resume_brief.get("email"),
+            "content": content,
+            "negotiation_id": item.get("id"),
+            "negotiation_updated_at": item.get("updated_at"),
+            "resume_version": resume_version or resume_brief.get("updated_at"),
+        }
+
+    async def get_resume_details(self, resume_id: str, token: str) -> Optional[Dict[str, Any]]:
+        """Fetches full resume details (None if HH.ru could not return them)."""
         try:
-            resp = requests.get(
-                f"{self.base_url}/resumes/{resume_id}",
-                headers=self._get_headers(token)
-            )
-            if resp.status_code == 200:
-                return resp.json()
-            return None
-        except:
+            _, details, _ = await self.get_resume_if_changed(resume_id, token)
+        except HHAPIError:
             return None
+        return details
+
+    async def get_resume_if_changed(
+        self, resume_id: str, token: str, known_version: Optional[str] = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Fetches a resume unless it still matches `known_version` (an ETag or
+        updated_at value from a previous sync).
+        Returns (changed, details, version); raises HHAPIError when HH.ru
+        keeps failing, so a failed fetch is never taken for a changed resume.
+        """
+        headers = {}
+        if known_version and (known_version.startswith('"') or known_version.startswith("W/")):
+            headers["If-None-Match"] = known_version
+        try:
+            resp = await self._api_get(f"/resumes/{resume_id}", token, headers=headers)
+        except httpx.HTTPError as e:
+            raise HHAPIError(f"Resume {resume_id}: {e}") from e
+        if resp.status_code == 304:
+            return False, None, known_version
+        if resp.status_code != 200:
+            raise HHAPIError(f"Resume {resume_id}: HTTP {resp.status_code}")
+        details = resp.json()
+        version = resp.headers.get("ETag") or details.get("updated_at")
+        if known_version and version == known_version:
+            return False, details, version
+        return True, details, version
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def send_message(self, hh_resume_id: str, message: str, vacancy_id: str, token: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -257,7 +476,6 @@ class HHService:
             return self._get_mock_training_resumes()
         
         try:
-            import httpx
             from bs4 import BeautifulSoup
             
             headers = {
@@ -0,0 +1,175 @@
+"""
+HH.ru Sync Scheduler
+
+Periodically syncs every vacancy published to HH.ru. Runs as an asyncio task
+in each app process; a lease row in `scheduler_locks` elects one leader so
+several uvicorn workers never sync concurrently. Vacancies are spread across
+the interval, tokens backing off after a 429 are skipped for the run, and
+each run is recorded in `hh_sync_runs`.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.hh_sync import HHSyncRun
+from app.models.scheduler import SchedulerLock
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import hh_sync
+from app.services.hh import hh_service
+
+logger = logging.getLogger(__name__)
+
+
+async def acquire_lock(db: AsyncSession, name: str, owner: str, ttl_seconds: float) -> bool:
+    """Takes or renews the `name` lease for `owner`. Returns True if held."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    renewed = await db.execute(update(SchedulerLock).where(
+        SchedulerLock.name == name,
+        or_(SchedulerLock.owner == owner, SchedulerLock.expires_at < now)
+    ).values(owner=owner, expires_at=expires_at).execution_options(synchronize_session=False))
+    await db.commit()
+    if renewed.rowcount:
+        return True
+
+    if await db.scalar(select(SchedulerLock.name).where(SchedulerLock.name == name)) is not None:
+        return False
+    db.add(SchedulerLock(name=name, owner=owner, expires_at=expires_at))
+    try:
+        await db.commit()
+        return True
+    except IntegrityError:
+        # Another process created the lock first
+        await db.rollback()
+        return False
+
+
+async def release_lock(db: AsyncSession, name: str, owner: str):
+    await db.execute(delete(SchedulerLock).where(
+        SchedulerLock.name == name,
+        SchedulerLock.owner == owner
+    ).execution_options(synchronize_session=False))
+    await db.commit()
+
+
+class HHSyncScheduler:
+    LOCK_NAME = "hh_sync"
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lease_seconds(self) -> float:
+        # Outlives one full run so the leader keeps the lock between renewals
+        return settings.HH_SYNC_INTERVAL_SECONDS * 2
+
+    async def _acquire(self) -> bool:
+        async with self.session_factory() as db:
+            return await acquire_lock(db, self.LOCK_NAME, self.owner, self.lease_seconds)
+
+    async def run_once(self, spread_seconds: float = 0.0) -> HHSyncRun:
+        """
+        Syncs all published vacancies whose owner has an HH.ru token, pausing
+        `spread_seconds / n` between vacancies. Returns the recorded run.
+        """
+        started = time.monotonic()
+
+        # Counts only this run's calls, not those of syncs started from the API
+        with hh_service.count_calls() as calls:
+            async with self.session_factory() as db:
+                run = HHSyncRun(started_at=datetime.utcnow())
+                db.add(run)
+                vacancy_ids = (await db.scalars(select(Vacancy.id).join(User, Vacancy.owner_id == User.id).where(
+                    Vacancy.hh_id.isnot(None),
+                    User.hh_access_token.isnot(None)
+                ).order_by(Vacancy.id))).all()
+                run.vacancies_total = len(vacancy_ids)
+                run.vacancies_synced = run.vacancies_skipped = run.new_candidates = run.errors = 0
+                await db.commit()
+
+                pause = spread_seconds / len(vacancy_ids) if vacancy_ids else 0.0
+                for i, vacancy_id in enumerate(vacancy_ids):
+                    if i and pause:
+                        await asyncio.sleep(pause)
+                        # Stop if another process took over while we were waiting
+                        if not await acquire_lock(db, self.LOCK_NAME, self.owner, self.lease_seconds):
+                            logger.warning("HH sync: lost scheduler lock, stopping run")
+                            break
+
+                    vacancy = await db.get(Vacancy, vacancy_id)
+                    owner = await db.get(User, vacancy.owner_id) if vacancy else None
+                    if not vacancy or not vacancy.hh_id or not owner or not owner.hh_access_token:
+                        continue
+                    if hh_service.backoff_remaining(owner.hh_access_token) > 0:
+                        run.vacancies_skipped += 1
+                        continue
+
+                    try:
+                        created = await hh_sync.sync_vacancy(db, vacancy, owner)
+                        run.vacancies_synced += 1
+                        run.new_candidates += len(created)
+                    except Exception as e:
+                        await db.rollback()
+                        # Rollback expires `run`; reload it before touching the counters
+                        await db.refresh(run)
+                        run.errors += 1
+                        logger.error(f"HH sync failed for vacancy {vacancy_id}: {e}")
+
+                run.finished_at = datetime.utcnow()
+                run.duration_seconds = round(time.monotonic() - started, 3)
+                run.api_calls = calls.calls
+                await db.commit()
+                await db.refresh(run)
+                logger.info(
+                    f"HH sync run {run.id}: {run.vacancies_synced}/{run.vacancies_total} vacancies, "
+                    f"{run.new_candidates} new candidates, {run.api_calls} API calls in {run.duration_seconds}s"
+                )
+                return run
+
+    async def _loop(self):
+        interval = settings.HH_SYNC_INTERVAL_SECONDS
+        while True:
+            cycle_started = time.monotonic()
+            try:
+                if await self._acquire():
+                    # Leave headroom so a run finishes before the next tick
+                    await self.run_once(spread_seconds=interval * 0.8)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"HH sync scheduler error: {e}")
+            await asyncio.sleep(max(1.0, interval - (time.monotonic() - cycle_started)))
+
+    def start(self):
+        """Starts the scheduler on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"HH sync scheduler started (every {settings.HH_SYNC_INTERVAL_SECONDS}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        async with self.session_factory() as db:
+            await release_lock(db, self.LOCK_NAME, self.owner)
+
+
+# Singleton instance
+hh_sync_scheduler = HHSyncScheduler()
@@ -0,0 +1,123 @@
+"""
+HH.ru Candidate Sync
+
+Imports HH.ru responses for a vacancy as candidates. A per-vacancy
+`hh_sync_state` row remembers the newest negotiation and the versions of the
+resumes imported as candidates, so repeat syncs only fetch new or changed
+responses.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.candidate import Candidate
+from app.models.hh_sync import HHSyncState
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services.hh import hh_service, parse_hh_datetime
+from app.services.subscription import subscription_service
+
+
+async def get_sync_state(db: AsyncSession, vacancy_id: int) -> HHSyncState:
+    state = await db.scalar(select(HHSyncState).where(HHSyncState.vacancy_id == vacancy_id))
+    if state is None:
+        state = HHSyncState(vacancy_id=vacancy_id, resume_versions={})
+        db.add(state)
+    return state
+
+
+async def sync_vacancy(db: AsyncSession, vacancy: Vacancy, user: User) -> List[Candidate]:
+    """
+    Fetches new/changed HH.ru responses for `vacancy` and stores them.
+    New candidates count against the user's resume quota; resumes of existing
+    candidates are refreshed in place. Returns the newly created candidates.
+    """
+    state = await get_sync_state(db, vacancy.id)
+    responses = await hh_service.get_responses(
+        vacancy.hh_id,
+        token=user.hh_access_token,
+        since=state.last_negotiation_updated_at,
+        resume_versions=state.resume_versions or {},
+    )
+
+    # Resumes HH.ru failed to return are retried on the next sync
+    failed = [resp for resp in responses if resp.get("fetch_failed")]
+
+    # Deduplicate by resume and check existence with one IN query
+    by_resume: Dict[str, dict] = {}
+    for resp in responses:
+        if resp.get("hh_resume_id") and not resp.get("fetch_failed"):
+            by_resume[resp["hh_resume_id"]] = resp
+    existing = {}
+    if by_resume:
+        existing = {
+            c.hh_resume_id: c
+            for c in await db.scalars(select(Candidate).where(Candidate.hh_resume_id.in_(list(by_resume))))
+        }
+
+    versions = dict(state.resume_versions or {})
+    new_candidates = []
+    for resume_id, resp in by_resume.items():
+        candidate = existing.get(resume_id)
+        if candidate is None:
+            new_candidates.append(Candidate(
+                vacancy_id=vacancy.id,
+                filename=f"HH_Resume_{resume_id}.txt",
+                content=resp["content"],
+                hh_resume_id=resume_id,
+                status="NEW"
+            ))
+        elif candidate.vacancy_id == vacancy.id:
+            # Resume changed since the last sync
+            if resp["content"] and candidate.content != resp["content"]:
+                candidate.content = resp["content"]
+            if resp.get("resume_version"):
+                versions[resume_id] = resp["resume_version"]
+
+    # Process only as many as the quota grants
+    granted = await subscription_service.reserve_resumes(db, user, len(new_candidates)) if new_candidates else 0
+    to_process = new_candidates[:granted]
+    for c in to_process:
+        db.add(c)
+        version = by_resume[c.hh_resume_id].get("resume_version")
+        if version:
+            versions[c.hh_resume_id] = version
+
+    # Advance the cursor only when nothing was left behind by the quota or a
+    # failed fetch, otherwise the skipped responses would never be seen again
+    if not failed and len(to_process) == len(new_candidates):
+        newest = _newest_negotiation(responses)
+        if newest is not None:
+            newest_at, newest_id = newest
+            if state.last_negotiation_updated_at is None or newest_at > state.last_negotiation_updated_at:
+                state.last_negotiation_updated_at = newest_at
+                state.last_negotiation_id = newest_id
+
+    # Keep versions only for resumes still imported into this vacancy, so the
+    # map does not grow with every deleted or never-imported candidate
+    if versions:
+        kept = set(await db.scalars(select(Candidate.hh_resume_id).where(
+            Candidate.vacancy_id == vacancy.id,
+            Candidate.hh_resume_id.isnot(None)
+        )))
+        kept.update(c.hh_resume_id for c in to_process)
+        versions = {resume_id: version for resume_id, version in versions.items() if resume_id in kept}
+
+    state.resume_versions = versions
+    state.last_synced_at = datetime.utcnow()
+    await db.commit()
+    for c in to_process:
+        await db.refresh(c)
+    return to_process
+
+
+def _newest_negotiation(responses: List[dict]) -> Optional[tuple]:
+    newest = None
+    for resp in responses:
+        updated_at = parse_hh_datetime(resp.get("negotiation_updated_at"))
+        if updated_at is not None and (newest is None or updated_at > newest[0]):
+            newest = (updated_at, resp.get("negotiation_id"))
+    return newest
@@ -0,0 +1,234 @@
+"""
+Analysis Job Queue
+
+SQLite/SQL-backed queue of resume-analysis jobs processed by a pool of
+in-process async workers. No external broker is needed: jobs are rows in
+`analysis_jobs`, claimed with a conditional UPDATE so that several workers
+(or several uvicorn processes) never run the same job twice.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.candidate import Candidate
+from app.models.chat import ChatMessage
+from app.models.job import AnalysisJob
+from app.models.vacancy import Vacancy
+from app.services import analysis
+
+logger = logging.getLogger(__name__)
+
+# A request for one of these gets the existing job back; finished jobs run again
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def make_idempotency_key(candidate_id: int, vacancy_id: int, prompt_hash: str, resume_hash: str) -> str:
+    return hashlib.sha256(f"{candidate_id}:{vacancy_id}:{prompt_hash}:{resume_hash}".encode("utf-8")).hexdigest()
+
+
+def resume_digest(candidate: Candidate) -> str:
+    """Content hash of the candidate's resume, without loading a shared blob."""
+    if candidate.resume_hash:
+        return candidate.resume_hash
+    return hashlib.sha256((candidate.content or "").encode("utf-8")).hexdigest()
+
+
+class AnalysisJobQueue:
+    """Enqueues analysis jobs and runs them on a pool of asyncio workers."""
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_stale_check = 0.0
+
+    # Producer side
+
+    async def enqueue(self, db: AsyncSession, candidate: Candidate, vacancy: Vacancy, user_id: int,
+                      ai_config: Optional[Dict[str, Any]] = None) -> AnalysisJob:
+        """
+        Returns the job for this candidate/vacancy/prompt/resume combination,
+        creating it if needed. Queued and running jobs are returned as-is;
+        finished and failed ones are queued again, so asking twice never runs
+        two analyses at once but re-analysis always does run (unchanged
+        inputs are answered by the analysis cache). `ai_config` is looked up
+        when not given.
+        """
+        if ai_config is None:
+            ai_config = await db.run_sync(analysis.get_ai_config, user_id)
+        key = make_idempotency_key(
+            candidate.id, vacancy.id, analysis.prompt_hash(vacancy.description, ai_config), resume_digest(candidate)
+        )
+
+        job = await db.scalar(select(AnalysisJob).where(AnalysisJob.idempotency_key == key))
+        if job is None:
+            job = AnalysisJob(
+                candidate_id=candidate.id,
+                vacancy_id=vacancy.id,
+                user_id=user_id,
+                idempotency_key=key,
+                status="queued",
+                progress=0,
+                attempts=0,
+            )
+            db.add(job)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Same job enqueued concurrently by another request
+                await db.rollback()
+                job = await db.scalar(select(AnalysisJob).where(AnalysisJob.idempotency_key == key))
+        elif job.status not in ACTIVE_STATUSES:
+            job.status = "queued"
+            job.progress = 0
+            job.attempts = 0
+            job.error = None
+            job.started_at = None
+            job.finished_at = None
+            await db.commit()
+
+        await db.refresh(job)
+        self.notify()
+        return job
+
+    def notify(self):
+        """Wakes idle workers in this process."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # Consumer side
+
+    async def _claim_next(self, db: AsyncSession) -> Optional[int]:
+        job_ids = await db.scalars(
+            select(AnalysisJob.id).where(AnalysisJob.status == "queued").order_by(AnalysisJob.id.asc()).limit(5)
+        )
+
+        for job_id in job_ids.all():
+            claimed = await db.execute(update(AnalysisJob).where(
+                AnalysisJob.id == job_id,
+                AnalysisJob.status == "queued"
+            ).values(
+                status="running",
+                progress=10,
+                started_at=datetime.utcnow(),
+                attempts=AnalysisJob.attempts + 1,
+            ).execution_options(synchronize_session=False))
+            await db.commit()
+            if claimed.rowcount:
+                return job_id
+        return None
+
+    async def _requeue_stale(self, db: AsyncSession):
+        """
+        Jobs left 'running' by a crashed worker go back to the queue, or fail
+        once they have used up their attempts.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS)
+        stale = (AnalysisJob.status == "running", AnalysisJob.started_at < cutoff)
+        await db.execute(update(AnalysisJob).where(
+            *stale, AnalysisJob.attempts >= settings.JOB_MAX_ATTEMPTS
+        ).values(
+            status="failed", error="Worker stopped while running the job", finished_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False))
+        await db.execute(update(AnalysisJob).where(*stale).values(
+            status="queued", progress=0
+        ).execution_options(synchronize_session=False))
+        await db.commit()
+
+    async def _run_job(self, db: AsyncSession, job_id: int):
+        job = await db.get(AnalysisJob, job_id)
+        candidate = await db.get(Candidate, job.candidate_id, options=[joinedload(Candidate.resume_blob)])
+        vacancy = await db.get(Vacancy, job.vacancy_id)
+        if not candidate or not vacancy:
+            job.status = "failed"
+            job.error = "Candidate or vacancy no longer exists"
+            job.finished_at = datetime.utcnow()
+            await db.commit()
+            return
+
+        try:
+            ai_config = await db.run_sync(analysis.get_ai_config, job.user_id)
+            result = await analysis.run_analysis(
+                vacancy.description, candidate.resume_text, ai_config, candidate.resume_hash
+            )
+            job.progress = 90
+            has_messages = await db.scalar(
+                select(ChatMessage.id).where(ChatMessage.candidate_id == candidate.id).limit(1)
+            ) is not None
+            analysis.apply_analysis_result(db, candidate, vacancy, result, has_messages=has_messages)
+            job.status = "done"
+            job.progress = 100
+            job.error = None
+            job.finished_at = datetime.utcnow()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Analysis job {job_id} failed: {e}")
+            await db.refresh(job)
+            job.error = str(e)
+            if job.attempts < settings.JOB_MAX_ATTEMPTS:
+                job.status = "queued"
+                job.progress = 0
+            else:
+                job.status = "failed"
+                job.finished_at = datetime.utcnow()
+            await db.commit()
+
+    async def _worker(self, worker_no: int):
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    # One worker at a time picks up jobs a crashed process left running
+                    if time.monotonic() >= self._next_stale_check:
+                        self._next_stale_check = time.monotonic() + settings.JOB_STALE_AFTER_SECONDS / 2
+                        await self._requeue_stale(db)
+
+                    job_id = await self._claim_next(db)
+                    if job_id is not None:
+                        await self._run_job(db, job_id)
+                        continue
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis worker {worker_no} error: {e}")
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+    def start(self, workers: Optional[int] = None):
+        """Starts the worker pool on the running event loop."""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        # The first worker iteration re-queues stale jobs
+        self._next_stale_check = 0.0
+
+        count = workers if workers is not None else settings.ANALYSIS_WORKERS
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(count)]
+        logger.info(f"Started {count} analysis workers")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._wakeup = None
+
+
+# Singleton instance
+analysis_job_queue = AnalysisJobQueue()
@@ -0,0 +1,219 @@
+"""
+Shared async LLM gateway.
+
+Keeps one pooled httpx.AsyncClient per provider (OpenRouter, GigaChat) so that
+model calls reuse warm TCP/TLS connections instead of opening a new one per
+request, and so that FastAPI endpoints can await them on the event loop.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.rate_limit import AsyncTokenBucket, per_minute_bucket
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_CHAT_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class LLMGateway:
+    """
+    Lazily created, per-provider pooled async HTTP clients.
+
+    Pooled connections belong to the event loop that opened them, so clients
+    (and the rate limiters, whose locks are loop-bound too) are kept per
+    loop. The app has one loop and closes them in its lifespan; a loop
+    started by asyncio.run() (scripts, tests) gets its own clients, which are
+    closed before that loop is.
+    """
+
+    def __init__(self):
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+        self._loop_guards: Dict[asyncio.AbstractEventLoop, AsyncIterator[None]] = {}
+        self._limiters: Dict[asyncio.AbstractEventLoop, Dict[str, Optional[AsyncTokenBucket]]] = {}
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        if provider == "gigachat":
+            max_connections = settings.GIGACHAT_MAX_CONNECTIONS
+            verify = False  # SSL сертификаты Sber
+        else:
+            max_connections = settings.OPENROUTER_MAX_CONNECTIONS
+            verify = True
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(settings.LLM_MAX_KEEPALIVE_CONNECTIONS, max_connections),
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0),
+            http2=settings.LLM_HTTP2 and _http2_available(),
+            verify=verify,
+        )
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        """Returns the shared client for `provider` ("openrouter" or "gigachat")."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._loop_guards:
+            self._watch_loop(loop)
+        clients = self._clients.setdefault(loop, {})
+        client = clients.get(provider)
+        if client is None or client.is_closed:
+            client = clients[provider] = self._build_client(provider)
+        return client
+
+    def _watch_loop(self, loop: asyncio.AbstractEventLoop):
+        """
+        Parks an async generator on `loop`. Before closing a loop,
+        asyncio.run() closes its open async generators (shutdown_asyncgens),
+        which runs the `finally` below while the loop can still close sockets.
+        """
+        async def guard():
+            try:
+                yield
+            finally:
+                self._loop_guards.pop(loop, None)
+                await self._aclose_loop(loop)
+
+        # Keep a reference: a collected generator would be finalized right away
+        self._loop_guards[loop] = guard()
+        asyncio.ensure_future(self._loop_guards[loop].__anext__())
+
+    async def _aclose_loop(self, loop: asyncio.AbstractEventLoop):
+        self._limiters.pop(loop, None)
+        for client in self._clients.pop(loop, {}).values():
+            await client.aclose()
+
+    def limiter(self, provider: str) -> Optional[AsyncTokenBucket]:
+        """Per-provider request rate limit (None when disabled in settings)."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._loop_guards:
+            self._watch_loop(loop)
+        limiters = self._limiters.setdefault(loop, {})
+        if provider not in limiters:
+            if provider == "gigachat":
+                limit = settings.GIGACHAT_RATE_LIMIT_PER_MINUTE
+            else:
+                limit = settings.OPENROUTER_RATE_LIMIT_PER_MINUTE
+            limiters[provider] = per_minute_bucket(limit)
+        return limiters[provider]
+
+    async def post(self, provider: str, url: str, **kwargs: Any) -> httpx.Response:
+        limiter = self.limiter(provider)
+        if limiter is not None:
+            await limiter.acquire()
+        return await self.client(provider).post(url, **kwargs)
+
+    async def stream_chat(
+        self,
+        provider: str,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streams an OpenAI-compatible chat completion (`stream: true`) and yields
+        the content deltas. Closing the generator early closes the upstream
+        response, which cancels generation on the provider side.
+        """
+        limiter = self.limiter(provider)
+        if limiter is not None:
+            await limiter.acquire()
+
+        async with self.client(provider).stream(
+            "POST",
+            url,
+            headers=headers,
+            json={**payload, "stream": True},
+            timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank lines
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                choices = chunk.get("choices") or []
+                if choices:
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+
+    async def openrouter_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        timeout: Optional[float] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """
+        Sends a chat completion to OpenRouter and returns the message content.
+        Raises httpx.HTTPError on transport or non-2xx responses.
+        """
+        headers = {
+            "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+        }
+        if extra_headers:
+            headers.update(extra_headers)
+
+        response = await self.post(
+            "openrouter",
+            OPENROUTER_CHAT_URL,
+            headers=headers,
+            json={
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+            },
+            timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def openrouter_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Streaming variant of openrouter_chat; yields content deltas."""
+        headers = {
+            "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+        }
+        payload = {"model": model, "messages": messages, "temperature": temperature}
+        async for delta in self.stream_chat("openrouter", OPENROUTER_CHAT_URL, headers, payload, timeout):
+            yield delta
+
+    async def aclose(self):
+        """Closes the pooled connections of the running loop (called from the app lifespan)."""
+        await self._aclose_loop(asyncio.get_running_loop())
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
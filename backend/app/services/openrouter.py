@@ -1,45 +1,17 @@
 
 import json
-import requests
 import re
+from typing import Tuple
 from app.core.config import settings
 from app.schemas.candidate import CandidateAnalysisResult
+from app.services.analysis_cache import analysis_cache
+from app.services.llm_client import llm_gateway
+from app.services.prompt_builder import analysis_prompt_version, estimate_tokens, fit_analysis_inputs
 
-def analyze_resume(vacancy_description: str, resume_text: str, 
-                   system_prompt: str = None, 
-                   model: str = None, 
-                   temperature: float = 0.7) -> CandidateAnalysisResult:
-    """
-    Analyzes resume using OpenRouter API with configurable settings.
-    Default model is DeepSeek v3.1 (nex-agi/deepseek-v3.1-nex-n1:free).
-    """
-    
-    # Handle GigaChat
-    if model == "GigaChat" or (settings.USE_GIGACHAT and settings.GIGACHAT_API_KEY):
-        try:
-            from app.services.gigachat import gigachat_service
-            analysis = gigachat_service.analyze_candidate(vacancy_description, resume_text, system_prompt)
-            
-            # Ensure all required fields are present for CandidateAnalysisResult
-            return CandidateAnalysisResult(
-                score=float(analysis.get("score", 0.7)),
-                skills_match=analysis.get("skills_match", []),
-                missing_skills=analysis.get("missing_skills", []),
-                summary=analysis.get("summary", "Resume analysis completed via GigaChat."),
-                recommendation=analysis.get("recommendation", "Consider for interview"),
-                screening_questions=analysis.get("screening_questions", ["Расскажите подробнее о вашем опыте работы?"])
-            )
-        except Exception as e:
-            print(f"GigaChat Analysis Error: {e}")
-            # Fallback will continue to OpenRouter below
-            model = 'nex-agi/deepseek-v3.1-nex-n1:free'
-    
-    # Default system prompt if none provided
-    if not system_prompt:
-        system_prompt = """You are an expert HR AI assistant specializing in candidate screening and resume analysis. 
+DEFAULT_SYSTEM_PROMPT = """You are an expert HR AI assistant specializing in candidate screening and resume analysis. 
 Your role is to objectively evaluate candidates against job requirements and provide actionable insights."""
-    
-    prompt = f"""
+
+ANALYSIS_PROMPT = """
     You are an expert HR AI assistant. Your job is to screen a candidate's resume against a vacancy description.
     
     Vacancy Description:
@@ -69,33 +41,120 @@ Your role is to objectively evaluate candidates against job requirements and pro
     Do not add markdown formatting, just the raw JSON string.
     """
 
+
+def _uses_gigachat(model: str = None) -> bool:
+    return model == "GigaChat" or bool(settings.USE_GIGACHAT and settings.GIGACHAT_API_KEY)
+
+async def analyze_resume(vacancy_description: str, resume_text: str, 
+                   system_prompt: str = None, 
+                   model: str = None, 
+                   temperature: float = 0.7,
+                   resume_hash: str = None) -> CandidateAnalysisResult:
+    """
+    Analyzes resume using OpenRouter API with configurable settings.
+    Default model is DeepSeek v3.1 (nex-agi/deepseek-v3.1-nex-n1:free).
+    Successful results are cached by their inputs, so repeated analyses
+    of an unchanged resume and vacancy skip the model call. Resumes stored
+    in resume_blob are keyed by `resume_hash` instead of their text.
+    """
+    result, _ = await analyze_resume_checked(
+        vacancy_description, resume_text, system_prompt, model, temperature, resume_hash
+    )
+    return result
+
+async def analyze_resume_checked(vacancy_description: str, resume_text: str,
+                                 system_prompt: str = None,
+                                 model: str = None,
+                                 temperature: float = 0.7,
+                                 resume_hash: str = None) -> Tuple[CandidateAnalysisResult, bool]:
+    """
+    analyze_resume() that also returns whether the result is a real analysis
+    (False for the placeholder produced on API errors).
+    """
+    cache_model = "GigaChat" if _uses_gigachat(model) else model
+    # The key holds the untrimmed inputs, so it also records how they are trimmed
+    cache_key = analysis_cache.make_key(
+        cache_model, system_prompt, vacancy_description, resume_text, temperature,
+        resume_hash=resume_hash, prompt_version=analysis_prompt_version(),
+    )
+    cached = await analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached, True
+
+    result, cacheable, used_model = await _analyze_resume_uncached(
+        vacancy_description, resume_text, system_prompt, model, temperature
+    )
+    # Placeholder results produced on API errors are never cached
+    if cacheable:
+        if used_model != cache_model:
+            # GigaChat failed and the OpenRouter fallback answered: not a GigaChat result
+            cache_key = analysis_cache.make_key(
+                used_model, system_prompt, vacancy_description, resume_text, temperature,
+                resume_hash=resume_hash, prompt_version=analysis_prompt_version(),
+            )
+        await analysis_cache.put(cache_key, result, model=used_model)
+    return result, cacheable
+
+async def _analyze_resume_uncached(vacancy_description: str, resume_text: str,
+                                   system_prompt: str = None,
+                                   model: str = None,
+                                   temperature: float = 0.7) -> Tuple[CandidateAnalysisResult, bool, str]:
+    """
+    Calls the model. Returns the result, whether it is a real analysis
+    (False for error fallbacks) and the model that produced it.
+    """
+    # Fit the vacancy and resume into the prompt token budget
+    reserved_tokens = estimate_tokens(
+        (system_prompt or DEFAULT_SYSTEM_PROMPT) + ANALYSIS_PROMPT.format(vacancy_description="", resume_text=""),
+        model,
+    )
+    vacancy_description, resume_text = fit_analysis_inputs(
+        vacancy_description, resume_text, "GigaChat" if _uses_gigachat(model) else model, reserved_tokens
+    )
+
+    # Handle GigaChat
+    if _uses_gigachat(model):
+        try:
+            from app.services.gigachat import gigachat_service
+            analysis = await gigachat_service.analyze_candidate(vacancy_description, resume_text, system_prompt)
+            
+            # Ensure all required fields are present for CandidateAnalysisResult
+            return CandidateAnalysisResult(
+                score=float(analysis.get("score", 0.7)),
+                skills_match=analysis.get("skills_match", []),
+                missing_skills=analysis.get("missing_skills", []),
+                summary=analysis.get("summary", "Resume analysis completed via GigaChat."),
+                recommendation=analysis.get("recommendation", "Consider for interview"),
+                screening_questions=analysis.get("screening_questions", ["Расскажите подробнее о вашем опыте работы?"])
+            ), "error" not in analysis, "GigaChat"
+        except Exception as e:
+            print(f"GigaChat Analysis Error: {e}")
+            # Fallback will continue to OpenRouter below
+            model = 'nex-agi/deepseek-v3.1-nex-n1:free'
+    
+    # Default system prompt if none provided
+    if not system_prompt:
+        system_prompt = DEFAULT_SYSTEM_PROMPT
+
+    prompt = ANALYSIS_PROMPT.format(vacancy_description=vacancy_description, resume_text=resume_text)
+
     headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
         "HTTP-Referer": "http://localhost:3000",
         "X-Title": settings.PROJECT_NAME,
-        "Content-Type": "application/json"
     }
     
-    data = {
-        "model": model, 
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": temperature
-    }
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ]
     
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30
+        content = await llm_gateway.openrouter_chat(
+            messages,
+            model=model,
+            temperature=temperature,
+            extra_headers=headers
         )
-        response.raise_for_status()
-        
-        result_json = response.json()
-        content = result_json["choices"][0]["message"]["content"]
         
         # Cleanup
         content = content.strip()
@@ -105,7 +164,7 @@ Your role is to objectively evaluate candidates against job requirements and pro
             content = content[:-3]
             
         data = json.loads(content.strip())
-        return CandidateAnalysisResult(**data)
+        return CandidateAnalysisResult(**data), True, model
 
     except Exception as e:
         print(f"OpenRouter API Error: {e}")
@@ -121,9 +180,9 @@ Your role is to objectively evaluate candidates against job requirements and pro
                 "Как вы подходите к оптимизации SQL-запросов в приложениях с высокой нагрузкой?",
                 "В вакансии требуется опыт работы с облачными технологиями, который неявно указан в резюме. Был ли у вас такой опыт?"
             ]
-        )
+        ), False, model
 
-def generate_completion(prompt: str, system_prompt: str = None, 
+async def generate_completion(prompt: str, system_prompt: str = None, 
                         model: str = None, 
                         temperature: float = 0.7) -> str:
     """
@@ -141,7 +200,7 @@ def generate_completion(prompt: str, system_prompt: str = None,
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
-            response = get_gigachat_response(messages, temperature=temperature)
+            response = await get_gigachat_response(messages, temperature=temperature)
             if response:
                 return response
         except Exception as e:
@@ -149,31 +208,13 @@ def generate_completion(prompt: str, system_prompt: str = None,
             model = 'nex-agi/deepseek-v3.1-nex-n1:free'
 
     # OpenRouter
-    headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": prompt})
     
-    data = {
-        "model": model, 
-        "messages": messages,
-        "temperature": temperature
-    }
-    
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        return await llm_gateway.openrouter_chat(messages, model=model, temperature=temperature)
     except Exception as e:
         print(f"OpenRouter Completion Error: {e}")
         return "Извините, произошла ошибка при генерации сообщения."
@@ -0,0 +1,372 @@
+"""
+Prompt Builder
+
+Fits vacancy and resume text into a token budget before it goes to a model.
+Token counts are a local estimate (no tokenizer download): characters per
+token for Latin and Cyrillic words, per model family. Resumes are
+compressed section by section: whitespace is collapsed, repeats of running
+page headers and footers (of PDFs) and of the line just before are dropped,
+boilerplate lines are removed, and when the text is still over budget the least useful sections (hobbies, references,
+courses) give way first while skills and experience are kept.
+
+`prompt_metrics` counts the estimated tokens before and after, per call
+site; GET /analytics/prompt-budget returns them.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+# Characters per token (Latin words, Cyrillic words) by model name fragment.
+# BPE vocabularies trained mostly on English split Russian into short pieces.
+TOKENIZER_PROFILES: Tuple[Tuple[str, Tuple[float, float]], ...] = (
+    ("gigachat", (4.0, 4.0)),
+    ("gpt-4o", (4.0, 3.5)),
+    ("gpt-4", (4.0, 2.3)),
+    ("gpt-3.5", (4.0, 2.3)),
+    ("deepseek", (4.0, 3.2)),
+    ("qwen", (4.0, 3.2)),
+    ("gemini", (4.0, 3.5)),
+    ("claude", (3.8, 2.6)),
+    ("llama", (4.0, 3.0)),
+    ("mistral", (3.8, 2.6)),
+)
+DEFAULT_PROFILE = (4.0, 2.5)
+
+_PIECES = re.compile(r"[A-Za-z]+|[А-Яа-яЁё]+|\d+|\S")
+
+TRUNCATION_MARK = "[...]"
+# A section is cut only if at least this many tokens of it fit
+MIN_SECTION_TOKENS = 20
+
+# Section headings (lowercase, without the trailing colon) by kind
+SECTION_HEADINGS: Dict[str, Tuple[str, ...]] = {
+    "summary": ("summary", "profile", "about me", "about", "objective", "о себе", "обо мне", "цель",
+                "профиль"),
+    "skills": ("skills", "key skills", "technical skills", "technologies", "tech stack", "stack",
+               "навыки", "ключевые навыки", "профессиональные навыки", "технические навыки", "технологии",
+               "стек", "стек технологий", "компетенции"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "projects",
+                   "опыт работы", "опыт", "профессиональный опыт", "места работы", "проекты"),
+    "education": ("education", "образование", "высшее образование"),
+    "languages": ("languages", "language skills", "языки", "знание языков", "владение языками"),
+    "courses": ("courses", "certificates", "certifications", "trainings", "курсы", "сертификаты",
+                "повышение квалификации", "тесты, экзамены"),
+    "personal": ("hobbies", "interests", "references", "personal information", "personal details",
+                 "additional information", "хобби", "интересы", "увлечения", "рекомендации",
+                 "личная информация", "дополнительная информация", "гражданство, время в пути до работы"),
+}
+_HEADING_KINDS = {heading: kind for kind, headings in SECTION_HEADINGS.items() for heading in headings}
+# A heading alone on its line, or followed by a colon, dash or duration ("Опыт работы — 6 лет")
+_HEADING = re.compile(
+    r"^[\s•*#-]*(%s)\s*(?:$|[:—–(-]|\d)" % "|".join(
+        re.escape(h) for h in sorted(_HEADING_KINDS, key=len, reverse=True)
+    ),
+    re.IGNORECASE,
+)
+
+# Which sections keep their text when the budget runs out, most useful first
+SECTION_PRIORITY = ("skills", "experience", "summary", "header", "education", "languages", "courses",
+                    "personal")
+# Sent only when every more useful section fits whole
+OPTIONAL_SECTIONS = ("courses", "personal")
+
+PAGE_NUMBER_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"^(page|стр\.?|страница)\s*\d+(\s*(of|из|/)\s*\d+)?$",
+    r"^\d+\s*(/|of|из)\s*\d+$",
+    r"^-?\s*\d{1,3}\s*-?$",
+)]
+BOILERPLATE_PATTERNS = PAGE_NUMBER_PATTERNS + [re.compile(p, re.IGNORECASE) for p in (
+    r"^резюме обновлено\b",
+    r"^(curriculum vitae|cv|resume|резюме)$",
+    r"^references (are )?available (up)?on request",
+    r"^рекомендации (предоставляются|предоставлю) по запросу",
+    r"соглас(ен|на|ие) на обработку персональных данных",
+    r"^(confidential|конфиденциально)$",
+)]
+_BULLET_ONLY = re.compile(r"^[\W_]+$")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u3000]+")
+# Form feed: page break in text extracted from PDFs
+PAGE_BREAK = "\f"
+# Non-blank lines at the top and at the bottom of a page that can be a
+# running header or footer
+PAGE_EDGE_LINES = 2
+
+
+def tokenizer_profile(model: Optional[str]) -> Tuple[float, float]:
+    name = (model or settings.AI_MODEL_NAME or "").lower()
+    for fragment, profile in TOKENIZER_PROFILES:
+        if fragment in name:
+            return profile
+    return DEFAULT_PROFILE
+
+
+def estimate_tokens(text: Optional[str], model: Optional[str] = None) -> int:
+    """Estimated number of tokens of `text` for `model`."""
+    if not text:
+        return 0
+    latin, cyrillic = tokenizer_profile(model)
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            tokens += math.ceil(len(piece) / latin)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif first.isalpha():
+            tokens += math.ceil(len(piece) / cyrillic)
+        else:
+            tokens += 1
+    return tokens
+
+
+def _heading_kind(line: str) -> Optional[str]:
+    if len(line) > 60:
+        return None
+    match = _HEADING.match(line)
+    return _HEADING_KINDS[match.group(1).lower()] if match else None
+
+
+def _is_boilerplate(line: str) -> bool:
+    return bool(_BULLET_ONLY.match(line)) or any(p.search(line) for p in BOILERPLATE_PATTERNS)
+
+
+def _running_lines(lines: List[str]) -> Set[str]:
+    """
+    Lowercased lines found at the top or bottom of two or more pages; pages
+    end at a form feed or a page number line. Section headings are not counted.
+    """
+    pages: List[List[str]] = [[]]
+    for line in lines:
+        if line == PAGE_BREAK or any(p.match(line) for p in PAGE_NUMBER_PATTERNS):
+            pages.append([])
+        elif line:
+            pages[-1].append(line.lower())
+    counts: Counter = Counter()
+    for page in pages:
+        counts.update(set(page[:PAGE_EDGE_LINES] + page[-PAGE_EDGE_LINES:]))
+    return {line for line, count in counts.items() if count > 1 and _heading_kind(line) is None}
+
+
+def normalize_lines(text: Optional[str], drop_boilerplate: bool = False,
+                    drop_repeats: bool = False) -> List[str]:
+    """
+    Lines of `text` with runs of spaces collapsed and at most one blank line
+    in a row. `drop_repeats` also drops a line equal to the one before it and
+    all but the first copy of running page headers and footers; section
+    headings are always kept.
+    """
+    cleaned = []
+    for raw in (text or "").replace("\r", "\n").replace(PAGE_BREAK, "\n%s\n" % PAGE_BREAK).split("\n"):
+        line = _INLINE_SPACE.sub(" ", raw).strip()
+        cleaned.append(PAGE_BREAK if not line and PAGE_BREAK in raw else line)
+    running = _running_lines(cleaned) if drop_repeats else set()
+
+    lines: List[str] = []
+    previous = None
+    seen_running = set()
+    for line in cleaned:
+        if not line or line == PAGE_BREAK:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if drop_boilerplate and _is_boilerplate(line):
+            continue
+        key = line.lower()
+        if drop_repeats and _heading_kind(line) is None:
+            if key == previous or key in seen_running:
+                continue
+            if key in running:
+                seen_running.add(key)
+        previous = key
+        lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def truncate_lines(lines: List[str], max_tokens: int, model: Optional[str] = None) -> Tuple[List[str], bool]:
+    """Leading lines of `lines` within `max_tokens`; the last one may be cut at a word."""
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line, model)
+        if used + cost <= max_tokens:
+            kept.append(line)
+            used += cost
+            continue
+        words = []
+        for word in line.split(" "):
+            cost = estimate_tokens(word, model)
+            if used + cost > max_tokens:
+                break
+            words.append(word)
+            used += cost
+        if words:
+            kept.append(" ".join(words))
+        return kept, True
+    return kept, False
+
+
+def truncate_text(text: Optional[str], max_tokens: int, model: Optional[str] = None) -> str:
+    """`text` normalized and cut to `max_tokens` (0 = no limit) at a line or word boundary."""
+    lines = normalize_lines(text)
+    if max_tokens <= 0:
+        return "\n".join(lines)
+    kept, truncated = truncate_lines(lines, max_tokens, model)
+    if truncated:
+        kept, _ = truncate_lines(lines, max_tokens - estimate_tokens(TRUNCATION_MARK, model), model)
+        kept.append(TRUNCATION_MARK)
+    return "\n".join(kept)
+
+
+def split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """(kind, lines) per section; text before the first heading is the "header"."""
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in lines:
+        kind = _heading_kind(line)
+        if kind is not None:
+            sections.append((kind, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(kind, body) for kind, body in sections if any(body)]
+
+
+def compress_resume(text: Optional[str], max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Resume text within `max_tokens` (0 = no limit: whitespace is collapsed,
+    nothing is dropped). Sections are taken in SECTION_PRIORITY order and
+    printed in their original order; a section that does not fit is cut and
+    marked, or left out when there is no room for it.
+    """
+    if max_tokens <= 0:
+        return "\n".join(normalize_lines(text))
+    lines = normalize_lines(text, drop_boilerplate=True, drop_repeats=True)
+    if estimate_tokens("\n".join(lines), model) <= max_tokens:
+        return "\n".join(lines)
+
+    sections = split_sections(lines)
+    rank = {kind: i for i, kind in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(sections)), key=lambda i: rank[sections[i][0]])
+    fitted: Dict[int, List[str]] = {}
+    remaining = max_tokens
+    # Whole sections first, so a long experience section does not crowd out
+    # a short education one; then the rest is cut to what is left. Once a
+    # section has to be cut, less important ones leave room for its excerpt.
+    reserve = max(MIN_SECTION_TOKENS, max_tokens // 4)
+    pending = 0
+    for i in order:
+        if pending and sections[i][0] in OPTIONAL_SECTIONS:
+            continue
+        cost = estimate_tokens("\n".join(sections[i][1]), model)
+        if cost <= remaining - reserve * pending:
+            fitted[i] = sections[i][1]
+            remaining -= cost
+        else:
+            pending += 1
+    mark_tokens = estimate_tokens(TRUNCATION_MARK, model)
+    for i in order:
+        lines = sections[i][1]
+        if i in fitted or sections[i][0] in OPTIONAL_SECTIONS or remaining - mark_tokens < MIN_SECTION_TOKENS:
+            continue
+        kept, _ = truncate_lines(lines, remaining - mark_tokens, model)
+        if len(kept) <= 1 and _heading_kind(lines[0]):
+            continue
+        fitted[i] = kept + [TRUNCATION_MARK]
+        remaining -= estimate_tokens("\n".join(kept), model) + mark_tokens
+    return "\n".join(line for i in sorted(fitted) for line in fitted[i]).strip()
+
+
+class PromptMetrics:
+    """Estimated tokens before and after fitting, per call site."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, kind: str, original_tokens: int, sent_tokens: int):
+        with self._lock:
+            counters = self._counters.setdefault(
+                kind, {"calls": 0, "trimmed_calls": 0, "original_tokens": 0, "sent_tokens": 0}
+            )
+            counters["calls"] += 1
+            counters["trimmed_calls"] += sent_tokens < original_tokens
+            counters["original_tokens"] += original_tokens
+            counters["sent_tokens"] += sent_tokens
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            result = {}
+            for kind, counters in self._counters.items():
+                saved = counters["original_tokens"] - counters["sent_tokens"]
+                result[kind] = {
+                    **counters,
+                    "tokens_saved": saved,
+                    "saved_ratio": round(saved / counters["original_tokens"], 3) if counters["original_tokens"] else 0.0,
+                }
+            return result
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# Singleton instance
+prompt_metrics = PromptMetrics()
+
+
+# Bump when a change here alters what analysis prompts contain, so results
+# cached for the old trimming are not served for the new one
+BUILDER_VERSION = 2
+
+
+def analysis_prompt_version() -> str:
+    """Builder version and budget settings; part of the analysis cache key."""
+    return (
+        f"v{BUILDER_VERSION}:{settings.PROMPT_ANALYSIS_TOKEN_BUDGET}:"
+        f"{settings.PROMPT_VACANCY_MAX_TOKENS}:{settings.PROMPT_MIN_RESUME_TOKENS}"
+    )
+
+
+def fit_analysis_inputs(vacancy_description: Optional[str], resume_text: Optional[str],
+                        model: Optional[str] = None, reserved_tokens: int = 0,
+                        budget: Optional[int] = None) -> Tuple[str, str]:
+    """
+    Vacancy description and resume for an analysis prompt of at most `budget`
+    tokens (default PROMPT_ANALYSIS_TOKEN_BUDGET, 0 = no limit), of which
+    `reserved_tokens` go to the system prompt and the instructions.
+    """
+    budget = settings.PROMPT_ANALYSIS_TOKEN_BUDGET if budget is None else budget
+    if budget <= 0:
+        vacancy = truncate_text(vacancy_description, 0, model)
+        resume_budget = 0
+    else:
+        # The vacancy gets at most half of what is left, the resume the rest
+        available = max(0, budget - reserved_tokens)
+        vacancy_budget = min(settings.PROMPT_VACANCY_MAX_TOKENS or available, available // 2)
+        vacancy = truncate_text(vacancy_description, max(1, vacancy_budget), model)
+        resume_budget = max(settings.PROMPT_MIN_RESUME_TOKENS, available - estimate_tokens(vacancy, model))
+    resume = compress_resume(resume_text, resume_budget, model)
+    prompt_metrics.record(
+        "analysis",
+        estimate_tokens(vacancy_description, model) + estimate_tokens(resume_text, model),
+        estimate_tokens(vacancy, model) + estimate_tokens(resume, model),
+    )
+    return vacancy, resume
+
+
+def fit_chat_context(vacancy_description: Optional[str], resume_text: Optional[str], kind: str,
+                     model: Optional[str] = None) -> Tuple[str, str]:
+    """Vacancy description and resume excerpt for chat prompts (PROMPT_CHAT_* budgets)."""
+    vacancy = truncate_text(vacancy_description, settings.PROMPT_CHAT_VACANCY_TOKENS, model)
+    resume = compress_resume(resume_text, settings.PROMPT_CHAT_RESUME_TOKENS, model)
+    prompt_metrics.record(
+        kind,
+        estimate_tokens(vacancy_description, model) + estimate_tokens(resume_text, model),
+        estimate_tokens(vacancy, model) + estimate_tokens(resume, model),
+    )
+    return vacancy, resume
@@ -0,0 +1,54 @@
+"""
+Async rate limiting helpers.
+"""
+
+import asyncio
+import time
+import weakref
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for asyncio code: `rate` tokens are added per second up to
+    `capacity`; `acquire()` waits until enough tokens are available.
+    asyncio locks belong to one event loop, so each loop gets its own.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def acquire(self, tokens: float = 1.0):
+        # The lock keeps waiters in FIFO order
+        async with self._lock():
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+def per_minute_bucket(limit_per_minute: int) -> Optional[AsyncTokenBucket]:
+    """Bucket allowing `limit_per_minute` calls per minute; None when the limit is 0 (disabled)."""
+    if not limit_per_minute or limit_per_minute <= 0:
+        return None
+    rate = limit_per_minute / 60.0
+    # Allow a short burst of up to one second's worth of calls (at least 1)
+    return AsyncTokenBucket(rate=rate, capacity=max(1.0, rate))
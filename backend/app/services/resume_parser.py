@@ -2,14 +2,50 @@
 Resume Parser Service
 
 Extracts text content from various resume file formats (PDF, DOCX, TXT).
+PDF/DOCX parsing is CPU-bound, so the API runs it in a process pool
+(`resume_parser_pool`) to keep the event loop free.
 """
 
 from typing import Optional
+import asyncio
 import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
+from app.core.config import settings
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract text from PDF file."""
+logger = logging.getLogger(__name__)
+
+# Formats worth shipping to a worker process; plain text is decoded inline
+POOLED_EXTENSIONS = ('.pdf', '.docx', '.doc')
+
+
+# parse_resume() reports unreadable files with these placeholders instead of raising
+FAILED_PARSE_PREFIXES = (
+    "[PDF parsing error",
+    "[DOCX parsing error",
+    "[DOC file - unable to parse",
+    "[Text file - encoding not supported",
+    "[Unsupported file format",
+)
+
+
+class ResumeParseError(Exception):
+    pass
+
+
+def _checked(text: str) -> str:
+    """Raises ResumeParseError for a failed-parse placeholder."""
+    if text.startswith(FAILED_PARSE_PREFIXES):
+        raise ResumeParseError(text.strip("[]"))
+    return text
+
+
+def extract_text_from_pdf(file_bytes: bytes, max_pages: Optional[int] = None) -> str:
+    """Extract text from PDF file, reading at most `max_pages` pages."""
     try:
         from pypdf import PdfReader
         
@@ -17,7 +53,10 @@ def extract_text_from_pdf(file_bytes: bytes) -> str:
         reader = PdfReader(pdf_file)
         
         text_parts = []
-        for page in reader.pages:
+        for i, page in enumerate(reader.pages):
+            if max_pages is not None and i >= max_pages:
+                text_parts.append(f"[Truncated: only the first {max_pages} pages were parsed]")
+                break
             text_parts.append(page.extract_text())
         
         return "\n".join(text_parts)
@@ -50,13 +89,14 @@ def extract_text_from_docx(file_bytes: bytes) -> str:
         return f"[DOCX parsing error: {str(e)}]"
 
 
-def parse_resume(filename: str, file_bytes: bytes) -> str:
+def parse_resume(filename: str, file_bytes: bytes, max_pages: Optional[int] = None) -> str:
     """
     Universal resume parser that detects file type and extracts text.
     
     Args:
         filename: Original filename with extension
         file_bytes: Raw file bytes
+        max_pages: Page limit for PDF files (None = no limit)
         
     Returns:
         Extracted text content
@@ -65,7 +105,7 @@ def parse_resume(filename: str, file_bytes: bytes) -> str:
     
     # PDF files
     if filename_lower.endswith('.pdf'):
-        return extract_text_from_pdf(file_bytes)
+        return extract_text_from_pdf(file_bytes, max_pages=max_pages)
     
     # DOCX files
     elif filename_lower.endswith('.docx'):
@@ -103,3 +143,95 @@ def parse_resume(filename: str, file_bytes: bytes) -> str:
             return file_bytes.decode('utf-8', errors='ignore')
         except:
             return f"[Unsupported file format: {filename}. Please use PDF, DOCX, or TXT.]"
+
+
+class ResumeParserPool:
+    """
+    Bounded process pool for resume parsing with per-file timeouts and
+    size/page guards. A worker stuck on a pathological file cannot be
+    cancelled individually, so on timeout the pool is recycled; the other
+    files that were being parsed at that moment are retried on the new pool.
+    """
+
+    # Tries per file when the pool breaks under it (recycle or worker crash)
+    PARSE_ATTEMPTS = 3
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def workers(self) -> int:
+        return settings.RESUME_PARSE_WORKERS or os.cpu_count() or 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork a process that runs an event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """
+        One slot per worker: files wait here rather than in the executor queue,
+        so the timeout only runs while a worker is parsing the file.
+        """
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _recycle(self):
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # Files still running in the other workers fail with BrokenProcessPool
+        # and are retried by parse()
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+
+    async def parse(self, filename: str, file_bytes: bytes) -> str:
+        """
+        Parses a resume off the event loop. Raises ResumeParseError, also for
+        files parse_resume() could not read, so no placeholder text is stored.
+        """
+        if len(file_bytes) > settings.RESUME_MAX_BYTES:
+            raise ResumeParseError(
+                f"File is too large ({len(file_bytes)} bytes, limit {settings.RESUME_MAX_BYTES})"
+            )
+        if not filename.lower().endswith(POOLED_EXTENSIONS):
+            return _checked(parse_resume(filename, file_bytes))
+
+        loop = asyncio.get_running_loop()
+        async with self._get_slots():
+            for _ in range(self.PARSE_ATTEMPTS):
+                executor = self._get_executor()
+                try:
+                    return _checked(await asyncio.wait_for(
+                        loop.run_in_executor(executor, parse_resume, filename, file_bytes, settings.RESUME_MAX_PAGES),
+                        timeout=settings.RESUME_PARSE_TIMEOUT_SECONDS,
+                    ))
+                except asyncio.TimeoutError:
+                    logger.warning(f"Parsing {filename} timed out, recycling parser pool")
+                    if self._executor is executor:
+                        self._recycle()
+                    raise ResumeParseError(f"Parsing timed out after {settings.RESUME_PARSE_TIMEOUT_SECONDS}s")
+                except BrokenProcessPool:
+                    # Recycled for another file's timeout, or a worker crashed
+                    if self._executor is executor:
+                        self._recycle()
+            raise ResumeParseError("Resume parser worker crashed")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+resume_parser_pool = ResumeParserPool()
@@ -0,0 +1,52 @@
+"""
+Resume Store
+
+Content-addressed storage of extracted resume text. Files are identified by
+the SHA-256 of their raw bytes, so a resume uploaded to several vacancies is
+parsed and stored once and every candidate references the same row.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.resume_blob import ResumeBlob
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+async def get_hashes(db: AsyncSession, hashes: Iterable[str]) -> Set[str]:
+    """Returns the subset of `hashes` already stored (one IN query)."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return set()
+    return set(await db.scalars(select(ResumeBlob.sha256).where(ResumeBlob.sha256.in_(hashes))))
+
+
+def _insert_ignoring_duplicates(db: AsyncSession):
+    # A concurrent upload of the same file may have stored it meanwhile
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(ResumeBlob).on_conflict_do_nothing(index_elements=["sha256"])
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(ResumeBlob).on_conflict_do_nothing(index_elements=["sha256"])
+    return insert(ResumeBlob)
+
+
+async def save_texts(db: AsyncSession, blobs: Dict[str, Dict[str, object]]):
+    """
+    Stores {sha256: {"content": text, "size_bytes": n}} rows that do not
+    exist yet, in one bulk insert. Does not commit.
+    """
+    if not blobs:
+        return
+    existing = await get_hashes(db, blobs)
+    rows = [{"sha256": sha, **values} for sha, values in blobs.items() if sha not in existing]
+    if rows:
+        await db.execute(_insert_ignoring_duplicates(db), rows)
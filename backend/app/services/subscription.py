@@ -1,4 +1,7 @@
 from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.user import User
 from app.core.config import settings
 
@@ -48,9 +51,44 @@ class SubscriptionService:
         return status["can_upload"]
 
     @classmethod
-    def record_resume_usage(cls, user: User):
-        user.resumes_used_current_period += 1
+    def record_resume_usage(cls, user: User, count: int = 1):
+        user.resumes_used_current_period += count
         # In a real app, we would also check if we need to reset the period here
         # For MVP, we just increment.
 
+    @classmethod
+    async def reserve_resumes(cls, db: AsyncSession, user: User, count: int = 1) -> int:
+        """
+        Takes up to `count` resume slots from the user's quota and returns how
+        many were granted. The limit check and the increment are one UPDATE,
+        so concurrent uploads and HH syncs can neither overshoot the limit
+        nor lose increments. The grant is part of `db`'s transaction: it is
+        kept on commit and given back on rollback. A user row that no longer
+        exists gets nothing.
+        """
+        status = cls.get_subscription_status(user)
+        if status["is_expired"]:
+            return 0
+        limit = status["limit"]
+        used_column = User.resumes_used_current_period
+        while count > 0:
+            used = await db.scalar(
+                update(User)
+                .where(User.id == user.id, used_column + count <= limit)
+                .values(resumes_used_current_period=used_column + count)
+                .returning(used_column)
+                .execution_options(synchronize_session=False)
+            )
+            if used is not None:
+                set_committed_value(user, "resumes_used_current_period", used)
+                return count
+            # Not enough slots left (possibly taken concurrently): ask for what remains
+            used = await db.scalar(select(used_column).where(User.id == user.id))
+            if used is None:
+                # The user was deleted meanwhile
+                return 0
+            set_committed_value(user, "resumes_used_current_period", used)
+            count = min(count, limit - used)
+        return 0
+
 subscription_service = SubscriptionService()
@@ -0,0 +1,121 @@
+"""
+Authenticated User Cache
+
+Short-lived in-process cache behind deps.get_current_user: token subject
+(email) -> column values of the user plus their AI settings. A hit costs no
+database round trip; the request gets a User attached to its session
+without a SELECT. Entries expire after AUTH_USER_CACHE_TTL_SECONDS, the
+least recently used are dropped above AUTH_USER_CACHE_MAX_ENTRIES, and any
+ORM write to the user or their AI settings drops the entry (at flush and
+again after commit).
+
+Other processes see a change only after the TTL; quota checks re-read
+their counters (deps.refresh_quota).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.ai_settings import AISettings
+from app.models.user import User
+
+PENDING_KEY = "user_cache_invalidate"
+
+Entry = Tuple[float, Dict[str, Any], Dict[str, Any]]
+
+
+class UserCache:
+    def __init__(self):
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._emails: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(user column values, AI config) for a cached subject."""
+        if settings.AUTH_USER_CACHE_TTL_SECONDS <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(email)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, email: str, user: User, ai_config: Dict[str, Any]):
+        if settings.AUTH_USER_CACHE_TTL_SECONDS <= 0:
+            return
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            self._entries[email] = (time.monotonic() + settings.AUTH_USER_CACHE_TTL_SECONDS, values, ai_config)
+            self._entries.move_to_end(email)
+            self._emails[user.id] = email
+            while len(self._entries) > settings.AUTH_USER_CACHE_MAX_ENTRIES:
+                self._drop(next(iter(self._entries)))
+
+    def ai_config(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Cached AI config of a user, if their entry is live."""
+        with self._lock:
+            entry = self._entries.get(self._emails.get(user_id))
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[2]
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            email = self._emails.get(user_id)
+            if email is not None:
+                self._drop(email)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._emails.clear()
+
+    def _drop(self, email: str):
+        entry = self._entries.pop(email, None)
+        if entry is not None:
+            self._emails.pop(entry[1]["id"], None)
+
+
+# Invalidation on writes
+
+def _changed(mapper, connection, target):
+    user_id = target.id if isinstance(target, User) else target.user_id
+    if user_id is None:
+        return
+    user_cache.invalidate(user_id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(user_id)
+
+
+for _model in (User, AISettings):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+# Singleton instance
+user_cache = UserCache()
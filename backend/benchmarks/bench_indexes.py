@@ -0,0 +1,162 @@
+"""
+Benchmark: hot query paths with and without the composite indexes.
+
+Builds a synthetic SQLite database (default 1,000,000 candidates spread over
+10,000 vacancies, plus chat messages and activity logs), then times the
+queries behind read_candidates, get_chat_history, the vacancy list and the
+activity feed with the new indexes dropped ("before") and created ("after").
+
+Usage (from backend/):
+    python benchmarks/bench_indexes.py --candidates 1000000 --db /tmp/bench_indexes.db
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine
+
+from app.db.base import Base
+
+NEW_INDEXES = {
+    "ix_candidates_vacancy_id_score_id": "CREATE INDEX ix_candidates_vacancy_id_score_id ON candidates (vacancy_id, score DESC, id DESC)",
+    "ix_candidates_vacancy_id_status": "CREATE INDEX ix_candidates_vacancy_id_status ON candidates (vacancy_id, status)",
+    "ix_chat_messages_candidate_id_created_at": "CREATE INDEX ix_chat_messages_candidate_id_created_at ON chat_messages (candidate_id, created_at)",
+    "ix_vacancy_owner_id": "CREATE INDEX ix_vacancy_owner_id ON vacancy (owner_id)",
+    "ix_activity_logs_created_date": "CREATE INDEX ix_activity_logs_created_date ON activity_logs (created_date)",
+    "ix_activity_logs_created_by_created_date": "CREATE INDEX ix_activity_logs_created_by_created_date ON activity_logs (created_by, created_date)",
+}
+
+QUERIES = {
+    "read_candidates": (
+        "SELECT id, filename, score, status FROM candidates WHERE vacancy_id = ? AND score IS NOT NULL "
+        "ORDER BY score DESC, id DESC LIMIT 51",
+        lambda n: (random.randint(1, n["vacancies"]),),
+    ),
+    "candidate_status_counts": (
+        "SELECT status, count(id) FROM candidates WHERE vacancy_id = ? GROUP BY status",
+        lambda n: (random.randint(1, n["vacancies"]),),
+    ),
+    "get_chat_history": (
+        "SELECT id, role, content FROM chat_messages WHERE candidate_id = ? ORDER BY created_at",
+        lambda n: (random.randint(1, n["candidates"]),),
+    ),
+    "vacancies_by_owner": (
+        "SELECT id, title FROM vacancy WHERE owner_id = ?",
+        lambda n: (random.randint(1, n["users"]),),
+    ),
+    "activity_feed": (
+        "SELECT id, description FROM activity_logs ORDER BY created_date DESC LIMIT 50",
+        lambda n: (),
+    ),
+    "activity_feed_by_user": (
+        "SELECT id, description FROM activity_logs WHERE created_by = ? ORDER BY created_date DESC LIMIT 50",
+        lambda n: (f"user{random.randint(1, n['users'])}@example.com",),
+    ),
+}
+
+
+def build(path: str, sizes: dict):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO users (id, email, hashed_password, is_active, subscription_tier, resumes_used_current_period) VALUES (?, ?, 'x', 1, 'FREE', 0)",
+        ((i, f"user{i}@example.com") for i in range(1, sizes["users"] + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO vacancy (id, title, description, owner_id, created_at) VALUES (?, ?, 'desc', ?, '2024-01-01 00:00:00')",
+        ((i, f"Vacancy {i}", random.randint(1, sizes["users"])) for i in range(1, sizes["vacancies"] + 1)),
+    )
+    statuses = ["NEW", "SHORTLIST", "REJECTED", "APPROVED"]
+    conn.executemany(
+        "INSERT INTO candidates (id, vacancy_id, filename, content, score, status) VALUES (?, ?, ?, 'resume', ?, ?)",
+        (
+            (i, random.randint(1, sizes["vacancies"]), f"cv_{i}.pdf", random.random(), random.choice(statuses))
+            for i in range(1, sizes["candidates"] + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO chat_messages (candidate_id, role, content, created_at) VALUES (?, 'assistant', 'hello', ?)",
+        (
+            (random.randint(1, sizes["candidates"]), f"2024-01-{random.randint(1, 28):02d} 12:00:00")
+            for _ in range(sizes["messages"])
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO activity_logs (action_type, description, created_date, created_by) VALUES ('upload', 'Uploaded', ?, ?)",
+        (
+            (f"2024-01-{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00:00", f"user{random.randint(1, sizes['users'])}@example.com")
+            for _ in range(sizes["activities"])
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_queries(conn: sqlite3.Connection, sizes: dict, repeats: int) -> dict:
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        timings = []
+        for _ in range(repeats):
+            args = params(sizes)
+            started = time.perf_counter()
+            conn.execute(sql, args).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=1_000_000)
+    parser.add_argument("--db", default="/tmp/bench_indexes.db")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="reuse an existing benchmark database")
+    args = parser.parse_args()
+
+    sizes = {
+        "candidates": args.candidates,
+        "vacancies": max(1, args.candidates // 100),
+        "users": max(1, args.candidates // 1000),
+        "messages": args.candidates,
+        "activities": max(1, args.candidates // 2),
+    }
+    random.seed(42)
+    if not (args.reuse and os.path.exists(args.db)):
+        started = time.perf_counter()
+        build(args.db, sizes)
+        print(f"Built {args.db} with {sizes} in {time.perf_counter() - started:.1f}s")
+
+    conn = sqlite3.connect(args.db)
+    for name in NEW_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.execute("ANALYZE")
+    before = run_queries(conn, sizes, args.repeats)
+
+    for sql in NEW_INDEXES.values():
+        conn.execute(sql)
+    conn.execute("ANALYZE")
+    after = run_queries(conn, sizes, args.repeats)
+    conn.close()
+
+    print(f"\n{'query':<24} {'before ms':>10} {'after ms':>10} {'speedup':>9}")
+    for name in QUERIES:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<24} {before[name]:>10.2f} {after[name]:>10.3f} {speedup:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: login throughput, bcrypt on the shared threadpool vs. its own pool.
+
+Sends N concurrent POST /api/auth/login requests through the ASGI app
+against a throwaway SQLite file. "threadpool" verifies passwords with
+run_in_threadpool (the old login behaviour: bcrypt takes the threads every
+sync endpoint shares), "pool" uses security.password_hasher. While the burst
+runs, a prober calls the sync GET / every 20 ms and reports its latency: the
+cost of a login burst for everyone else.
+
+Usage (from backend/):
+    python benchmarks/bench_login.py --logins 200 --rounds 12
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bench_login.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.user import User
+
+USERS = 50
+PASSWORD = "Password123!"
+
+
+def seed():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    Base.metadata.create_all(bind=engine)
+    hashed = password_hasher.context.hash(PASSWORD)
+    with SessionLocal() as db:
+        db.add_all([User(email=f"user{i}@example.com", hashed_password=hashed) for i in range(USERS)])
+        db.commit()
+
+
+async def measure(label: str, logins: int):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        probes = []
+        running = True
+
+        async def prober():
+            while running:
+                started = time.perf_counter()
+                await client.get("/")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.02)
+
+        async def login(i):
+            response = await client.post(
+                f"{settings.API_V1_STR}/auth/login",
+                data={"username": f"user{i % USERS}@example.com", "password": PASSWORD},
+            )
+            assert response.status_code == 200, response.text
+
+        probe = asyncio.create_task(prober())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+        running = False
+        await probe
+
+    probes.sort()
+    print(
+        f"{label:<10} {logins} logins in {elapsed:6.2f}s  {logins / elapsed:6.1f} logins/s  "
+        f"GET / p50 {statistics.median(probes) * 1000:7.1f} ms  max {probes[-1] * 1000:7.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    settings.BCRYPT_ROUNDS = args.rounds
+    seed()
+    print(f"bcrypt rounds: {args.rounds}; hasher workers: {password_hasher.workers}")
+
+    pooled_run = password_hasher._run
+
+    async def threadpool_run(fn, *fn_args):
+        return await run_in_threadpool(fn, *fn_args)
+
+    password_hasher._run = threadpool_run
+    await measure("threadpool", args.logins)
+    password_hasher._run = pooled_run
+    await measure("pool", args.logins)
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark: concurrent resume uploads, inline parsing vs. the process pool.
+
+Simulates N concurrent uploads of multi-page PDFs. "inline" parses on the
+event loop (the old upload_candidate behaviour), "pool" awaits
+resume_parser_pool. Also reports event-loop stall: the longest gap seen by a
+ticker task that should wake every 10 ms.
+
+Usage (from backend/):
+    python benchmarks/bench_resume_parsing.py --files 32 --pages 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.resume_parser import parse_resume, resume_parser_pool
+
+
+def make_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """Builds a minimal text PDF without third-party writers."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for p in range(pages):
+        lines = "".join(
+            f"(Page {p + 1} line {i}: Python FastAPI SQL Docker Kubernetes experience) Tj T* "
+            for i in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {lines}ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+async def measure(label: str, parse, files: int, data: bytes):
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.01)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(parse(f"resume_{i}.pdf", data) for i in range(files)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+
+    assert all("Python FastAPI" in r for r in results)
+    print(f"{label:<8} {files} files in {elapsed:6.2f}s  {files / elapsed:7.1f} files/s  max loop stall {stall * 1000:7.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    data = make_pdf(args.pages)
+    print(f"PDF: {args.pages} pages, {len(data) // 1024} KiB; pool workers: {resume_parser_pool.workers}")
+
+    async def inline(filename, file_bytes):
+        return parse_resume(filename, file_bytes)
+
+    # Warm the pool so process start-up is not counted
+    await resume_parser_pool.parse("warmup.pdf", make_pdf(1))
+
+    await measure("inline", inline, args.files, data)
+    await measure("pool", resume_parser_pool.parse, args.files, data)
+    resume_parser_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Benchmark: SQLite write throughput under parallel requests.
+
+Runs N threads that each open a session and perform small write
+transactions (a chat message insert plus a candidate update, like a chat
+save) against a file database, once with the default SQLite settings and
+once with the tuned profile from app/db/session.py (WAL, synchronous=NORMAL,
+busy_timeout, mmap, cache_size, temp_store=MEMORY). Reports commits per
+second and the number of "database is locked" failures.
+
+Usage (from backend/):
+    python benchmarks/bench_sqlite_concurrency.py --threads 16 --writes 200
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.session import configure_sqlite, sqlite_pragmas
+from app.models.candidate import Candidate
+from app.models.chat import ChatMessage
+from app.models.user import User
+from app.models.vacancy import Vacancy
+
+
+def make_engine(path: str, tuned: bool):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=32)
+    if tuned:
+        configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    user = User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    vacancy = Vacancy(title="Bench", description="Bench", owner_id=user.id)
+    db.add(vacancy)
+    db.commit()
+    db.add_all([Candidate(vacancy_id=vacancy.id, filename=f"{i}.txt", content="cv") for i in range(100)])
+    db.commit()
+    db.close()
+    return engine
+
+
+def run(engine, threads: int, writes: int) -> dict:
+    Session = sessionmaker(bind=engine)
+    committed = 0
+    locked = 0
+    lock = threading.Lock()
+
+    def worker(n: int):
+        nonlocal committed, locked
+        for i in range(writes):
+            db = Session()
+            try:
+                candidate_id = (n * writes + i) % 100 + 1
+                db.add(ChatMessage(candidate_id=candidate_id, role="user", content=f"message {n}-{i}"))
+                db.execute(update(Candidate).where(Candidate.id == candidate_id).values(status="SHORTLIST"))
+                db.commit()
+                with lock:
+                    committed += 1
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    locked += 1
+            finally:
+                db.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {"committed": committed, "locked": locked, "elapsed": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--db", default="/tmp/bench_sqlite.db")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.writes} write transactions; tuned profile: {sqlite_pragmas()}\n")
+    print(f"{'profile':<8} {'commits':>8} {'locked':>7} {'seconds':>8} {'commits/s':>10}")
+    for label, tuned in (("default", False), ("tuned", True)):
+        engine = make_engine(args.db, tuned)
+        result = run(engine, args.threads, args.writes)
+        engine.dispose()
+        print(
+            f"{label:<8} {result['committed']:>8} {result['locked']:>7} {result['elapsed']:>8.2f} "
+            f"{result['committed'] / result['elapsed']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
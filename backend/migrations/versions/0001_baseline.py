@@ -0,0 +1,229 @@
+"""Baseline schema
+
+Creates the full schema on an empty database. Databases created earlier by
+Base.metadata.create_all and patched by migrate_db.py/fix_db_schema.py are
+brought to the same state: missing tables, columns and indexes are added,
+existing ones are left alone.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+metadata = sa.MetaData()
+
+users = sa.Table(
+    "users", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("email", sa.String, nullable=False),
+    sa.Column("hashed_password", sa.String, nullable=False),
+    sa.Column("full_name", sa.String, nullable=True),
+    sa.Column("is_active", sa.Boolean, server_default=sa.true()),
+    sa.Column("trial_start_date", sa.DateTime),
+    sa.Column("subscription_tier", sa.String),
+    sa.Column("subscription_end_date", sa.DateTime, nullable=True),
+    sa.Column("resumes_used_current_period", sa.Integer),
+    sa.Column("hh_access_token", sa.String, nullable=True),
+    sa.Column("hh_refresh_token", sa.String, nullable=True),
+    sa.Index("ix_users_email", "email", unique=True),
+    sa.Index("ix_users_id", "id"),
+)
+
+vacancy = sa.Table(
+    "vacancy", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("title", sa.String, nullable=False),
+    sa.Column("description", sa.Text, nullable=False),
+    sa.Column("required_skills", sa.String),
+    sa.Column("experience_level", sa.String),
+    sa.Column("salary_range", sa.String),
+    sa.Column("skill_weights", sa.Text, nullable=True),
+    sa.Column("owner_id", sa.Integer, sa.ForeignKey("users.id")),
+    sa.Column("hh_id", sa.String, nullable=True),
+    sa.Column("hh_status", sa.String, nullable=True),
+    sa.Column("created_at", sa.DateTime, nullable=False),
+    sa.Column("published_at", sa.DateTime, nullable=True),
+    sa.Index("ix_vacancy_id", "id"),
+    sa.Index("ix_vacancy_title", "title"),
+    sa.Index("ix_vacancy_hh_id", "hh_id"),
+    sa.Index("ix_vacancy_owner_id", "owner_id"),
+)
+
+resume_blob = sa.Table(
+    "resume_blob", metadata,
+    sa.Column("sha256", sa.String(64), primary_key=True),
+    sa.Column("content", sa.Text),
+    sa.Column("size_bytes", sa.Integer),
+    sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+)
+
+candidates = sa.Table(
+    "candidates", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("vacancy_id", sa.Integer, sa.ForeignKey("vacancy.id")),
+    sa.Column("filename", sa.String),
+    sa.Column("content", sa.Text),
+    sa.Column("resume_hash", sa.String(64), sa.ForeignKey("resume_blob.sha256"), nullable=True),
+    sa.Column("score", sa.Float),
+    sa.Column("skills_match", sa.JSON),
+    sa.Column("missing_skills", sa.JSON),
+    sa.Column("summary", sa.Text),
+    sa.Column("recommendation", sa.String),
+    sa.Column("status", sa.String),
+    sa.Column("hh_resume_id", sa.String, nullable=True),
+    sa.Column("screening_questions", sa.JSON, nullable=True),
+    sa.Index("ix_candidates_id", "id"),
+    sa.Index("ix_candidates_hh_resume_id", "hh_resume_id"),
+    sa.Index("ix_candidates_resume_hash", "resume_hash"),
+    sa.Index("ix_candidates_vacancy_id_score", "vacancy_id", sa.text("score DESC")),
+    sa.Index("ix_candidates_vacancy_id_status", "vacancy_id", "status"),
+)
+
+activity_logs = sa.Table(
+    "activity_logs", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("action_type", sa.String),
+    sa.Column("description", sa.String),
+    sa.Column("entity_type", sa.String, nullable=True),
+    sa.Column("entity_id", sa.String, nullable=True),
+    sa.Column("entity_name", sa.String, nullable=True),
+    sa.Column("metadata_info", sa.JSON, nullable=True),
+    sa.Column("created_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    sa.Column("created_by", sa.String, nullable=True),
+    sa.Index("ix_activity_logs_id", "id"),
+    sa.Index("ix_activity_logs_action_type", "action_type"),
+    sa.Index("ix_activity_logs_created_date", "created_date"),
+    sa.Index("ix_activity_logs_created_by_created_date", "created_by", "created_date"),
+)
+
+chat_messages = sa.Table(
+    "chat_messages", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("candidate_id", sa.Integer, sa.ForeignKey("candidates.id")),
+    sa.Column("role", sa.String),
+    sa.Column("content", sa.Text),
+    sa.Column("metadata_info", sa.JSON, nullable=True),
+    sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    sa.Index("ix_chat_messages_id", "id"),
+    sa.Index("ix_chat_messages_candidate_id_created_at", "candidate_id", "created_at"),
+)
+
+ai_settings = sa.Table(
+    "ai_settings", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), unique=True),
+    sa.Column("ai_role", sa.String),
+    sa.Column("system_prompt", sa.Text),
+    sa.Column("model_name", sa.String),
+    sa.Column("temperature", sa.Float),
+    sa.Index("ix_ai_settings_id", "id"),
+)
+
+analysis_jobs = sa.Table(
+    "analysis_jobs", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("candidate_id", sa.Integer, sa.ForeignKey("candidates.id")),
+    sa.Column("vacancy_id", sa.Integer, sa.ForeignKey("vacancy.id")),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+    sa.Column("idempotency_key", sa.String, nullable=False),
+    sa.Column("status", sa.String),
+    sa.Column("progress", sa.Integer),
+    sa.Column("attempts", sa.Integer),
+    sa.Column("error", sa.Text, nullable=True),
+    sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+    sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    sa.Index("ix_analysis_jobs_id", "id"),
+    sa.Index("ix_analysis_jobs_candidate_id", "candidate_id"),
+    sa.Index("ix_analysis_jobs_idempotency_key", "idempotency_key", unique=True),
+    sa.Index("ix_analysis_jobs_status", "status"),
+)
+
+analysis_cache = sa.Table(
+    "analysis_cache", metadata,
+    sa.Column("key", sa.String, primary_key=True),
+    sa.Column("model", sa.String, nullable=True),
+    sa.Column("result", sa.JSON, nullable=False),
+    sa.Column("hits", sa.Integer),
+    sa.Column("created_at", sa.DateTime, nullable=False),
+    sa.Column("last_accessed_at", sa.DateTime, nullable=False),
+    sa.Index("ix_analysis_cache_last_accessed_at", "last_accessed_at"),
+)
+
+hh_sync_state = sa.Table(
+    "hh_sync_state", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("vacancy_id", sa.Integer, sa.ForeignKey("vacancy.id"), nullable=False),
+    sa.Column("last_negotiation_updated_at", sa.DateTime, nullable=True),
+    sa.Column("last_negotiation_id", sa.String, nullable=True),
+    sa.Column("resume_versions", sa.JSON, nullable=True),
+    sa.Column("last_synced_at", sa.DateTime, nullable=True),
+    sa.Index("ix_hh_sync_state_id", "id"),
+    sa.Index("ix_hh_sync_state_vacancy_id", "vacancy_id", unique=True),
+)
+
+hh_sync_runs = sa.Table(
+    "hh_sync_runs", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("started_at", sa.DateTime, nullable=False),
+    sa.Column("finished_at", sa.DateTime, nullable=True),
+    sa.Column("duration_seconds", sa.Float, nullable=True),
+    sa.Column("vacancies_total", sa.Integer),
+    sa.Column("vacancies_synced", sa.Integer),
+    sa.Column("vacancies_skipped", sa.Integer),
+    sa.Column("new_candidates", sa.Integer),
+    sa.Column("api_calls", sa.Integer),
+    sa.Column("errors", sa.Integer),
+    sa.Index("ix_hh_sync_runs_id", "id"),
+    sa.Index("ix_hh_sync_runs_started_at", "started_at"),
+)
+
+scheduler_locks = sa.Table(
+    "scheduler_locks", metadata,
+    sa.Column("name", sa.String, primary_key=True),
+    sa.Column("owner", sa.String, nullable=False),
+    sa.Column("expires_at", sa.DateTime, nullable=False),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(bind)
+            continue
+
+        # Legacy database: add whatever create_all/fix scripts did not
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                server_default = column.server_default.arg if column.server_default is not None else None
+                op.add_column(table.name, sa.Column(
+                    column.name,
+                    column.type,
+                    # SQLite cannot add a foreign key to an existing table
+                    *[sa.ForeignKey(fk.target_fullname) for fk in column.foreign_keys if bind.dialect.name != "sqlite"],
+                    # SQLite cannot add a NOT NULL column without a default to a filled table
+                    nullable=column.nullable or server_default is None,
+                    server_default=server_default,
+                ))
+
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind)
+
+
+def downgrade():
+    metadata.drop_all(op.get_bind())
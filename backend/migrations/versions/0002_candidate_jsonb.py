@@ -0,0 +1,43 @@
+"""Store candidate analysis lists as JSONB on PostgreSQL
+
+No-op on SQLite, where JSON is stored as text either way.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("skills_match", "missing_skills", "screening_questions")
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            "candidates", column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            "candidates", column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
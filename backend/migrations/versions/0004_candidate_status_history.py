@@ -0,0 +1,65 @@
+"""Add candidate_status_history
+
+Existing candidates get one history row with their current status, so the
+funnel covers them from the start; time to hire counts hires made after the
+upgrade.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "candidate_status_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("candidate_id", sa.Integer(), sa.ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("vacancy_id", sa.Integer(), sa.ForeignKey("vacancy.id"), nullable=False),
+        sa.Column("from_status", sa.String(), nullable=True),
+        sa.Column("to_status", sa.String(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_candidate_status_history_id", "candidate_status_history", ["id"])
+    op.create_index("ix_candidate_status_history_candidate_id", "candidate_status_history", ["candidate_id"])
+    op.create_index(
+        "ix_candidate_status_history_vacancy_id_candidate_id",
+        "candidate_status_history",
+        ["vacancy_id", "candidate_id", "changed_at"],
+    )
+
+    candidates = sa.table(
+        "candidates", sa.column("id", sa.Integer), sa.column("vacancy_id", sa.Integer), sa.column("status", sa.String)
+    )
+    history = sa.table(
+        "candidate_status_history",
+        sa.column("candidate_id", sa.Integer), sa.column("vacancy_id", sa.Integer),
+        sa.column("from_status", sa.String), sa.column("to_status", sa.String), sa.column("changed_at", sa.DateTime),
+    )
+    op.execute(history.insert().from_select(
+        ["candidate_id", "vacancy_id", "from_status", "to_status", "changed_at"],
+        sa.select(
+            candidates.c.id,
+            candidates.c.vacancy_id,
+            sa.null(),
+            sa.func.coalesce(candidates.c.status, "NEW"),
+            sa.literal(datetime.utcnow(), sa.DateTime),
+        ).where(candidates.c.vacancy_id.isnot(None)),
+    ))
+
+
+def downgrade():
+    op.drop_index("ix_candidate_status_history_vacancy_id_candidate_id", table_name="candidate_status_history")
+    op.drop_index("ix_candidate_status_history_candidate_id", table_name="candidate_status_history")
+    op.drop_index("ix_candidate_status_history_id", table_name="candidate_status_history")
+    op.drop_table("candidate_status_history")
@@ -0,0 +1,26 @@
+"""Extend the candidate list index with id for keyset pagination
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_candidates_vacancy_id_score_id", "candidates", ["vacancy_id", sa.text("score DESC"), sa.text("id DESC")]
+    )
+    op.drop_index("ix_candidates_vacancy_id_score", table_name="candidates")
+
+
+def downgrade():
+    op.create_index("ix_candidates_vacancy_id_score", "candidates", ["vacancy_id", sa.text("score DESC")])
+    op.drop_index("ix_candidates_vacancy_id_score_id", table_name="candidates")
@@ -0,0 +1,19 @@
+"""Recompute the analytics rollup (vacancy_stats / owner_stats) from candidates."""
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.db.session import engine
+from app.db.base import Base  # noqa: F401  registers all models
+from app.services import analytics_rollup
+
+def rebuild_stats():
+    started = time.monotonic()
+    with engine.begin() as connection:
+        result = analytics_rollup.rebuild(connection)
+    print(f"✅ Analytics rollup rebuilt in {time.monotonic() - started:.2f}s")
+    print(f"   Vacancies: {result['vacancies']}")
+    print(f"   vacancy_stats rows: {result['vacancy_rows']}, owner_stats rows: {result['owner_rows']}")
+
+if __name__ == "__main__":
+    rebuild_stats()
@@ -0,0 +1,59 @@
+"""
+Test database helper.
+
+Tests run against in-memory SQLite by default. Set TEST_DATABASE_URL to run
+them against a server database instead, e.g. a throwaway local PostgreSQL
+started without Docker by `pgserver`:
+
+    python -c "import pgserver; print(pgserver.get_server('/tmp/pgdata', cleanup_mode=None).get_uri())"
+    TEST_DATABASE_URL=postgresql://postgres:@/postgres?host=/tmp/pgdata python -m pytest -q
+
+The database is wiped before every test that asks for an engine.
+"""
+
+import os
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.session import async_database_url, async_engine_options, engine_options
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def make_test_engine(create_schema: bool = True):
+    """Engine on an empty test database; with `create_schema` the tables exist."""
+    if not TEST_DATABASE_URL:
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+    else:
+        engine = create_engine(TEST_DATABASE_URL, **engine_options(TEST_DATABASE_URL))
+        with engine.begin() as connection:
+            if engine.dialect.name == "postgresql":
+                # Sessions left open by earlier tests would block the DROP
+                connection.execute(text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+                ))
+                connection.execute(text("DROP SCHEMA public CASCADE"))
+                connection.execute(text("CREATE SCHEMA public"))
+            else:
+                Base.metadata.drop_all(bind=connection)
+    if create_schema:
+        Base.metadata.create_all(bind=engine)
+    return engine
+
+
+async def make_test_async_engine(create_schema: bool = True):
+    """Async counterpart of make_test_engine() for code taking an AsyncSession."""
+    if not TEST_DATABASE_URL:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        if create_schema:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        return engine
+    make_test_engine(create_schema).dispose()
+    return create_async_engine(async_database_url(TEST_DATABASE_URL), **async_engine_options(TEST_DATABASE_URL))
@@ -0,0 +1,148 @@
+import sys
+import os
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import configure_sqlite
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.schemas.candidate import CandidateAnalysisResult
+from app.services.analysis_cache import AnalysisCache
+from db_utils import TEST_DATABASE_URL, make_test_engine
+
+def make_cache() -> AnalysisCache:
+    return AnalysisCache(session_factory=sessionmaker(bind=make_test_engine()))
+
+def make_result(score: float = 0.9) -> CandidateAnalysisResult:
+    return CandidateAnalysisResult(
+        score=score,
+        skills_match=["Python"],
+        missing_skills=[],
+        summary="ok",
+        recommendation="Interview",
+        screening_questions=["Q1"]
+    )
+
+def test_key_normalizes_whitespace():
+    print("Testing cache key normalization...")
+    a = AnalysisCache.make_key("m", "prompt", "Python  developer\n", "Resume\ttext", 0.7)
+    b = AnalysisCache.make_key("m", "prompt", "Python developer", " Resume text ", 0.70001)
+    c = AnalysisCache.make_key("m", "prompt", "Python developer", "Resume text", 0.2)
+    assert a == b
+    assert a != c
+    # A resume_blob hash replaces the resume text in the key
+    assert AnalysisCache.make_key("m", "prompt", "Python developer", "other text", 0.7, resume_hash="abc") == \
+        AnalysisCache.make_key("m", "prompt", "Python developer", None, 0.7, resume_hash="abc")
+    print("✅ Key normalization: PASS")
+
+async def _hit_miss_and_ttl():
+    cache = make_cache()
+    key = cache.make_key("m", None, "vacancy", "resume", 0.7)
+
+    assert await cache.get(key) is None
+    await cache.put(key, make_result(0.42), model="m")
+    cached = await cache.get(key)
+    assert cached is not None and cached.score == 0.42
+    assert cache.hits == 1 and cache.misses == 1
+
+    # Expire the entry
+    db = cache.session_factory()
+    entry = db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.key == key).first()
+    entry.created_at = datetime.utcnow() - timedelta(seconds=settings.ANALYSIS_CACHE_TTL_SECONDS + 1)
+    db.commit()
+    db.close()
+
+    assert await cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+def test_hit_miss_and_ttl():
+    print("\nTesting cache hits, misses and TTL...")
+    asyncio.run(_hit_miss_and_ttl())
+    print("✅ Hit/miss/TTL: PASS")
+
+async def _lru_eviction():
+    cache = make_cache()
+    original = (settings.ANALYSIS_CACHE_MAX_ENTRIES, settings.ANALYSIS_CACHE_EVICT_EVERY)
+    settings.ANALYSIS_CACHE_MAX_ENTRIES = 2
+    settings.ANALYSIS_CACHE_EVICT_EVERY = 3
+    try:
+        await cache.put("a", make_result())
+        await cache.put("b", make_result())
+        # Touch "a" so "b" becomes the least recently used entry
+        db = cache.session_factory()
+        db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.key == "b").update(
+            {"last_accessed_at": datetime.utcnow() - timedelta(minutes=5)}
+        )
+        db.commit()
+        db.close()
+        await cache.put("c", make_result())
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert await cache.get("c") is not None
+
+        # Eviction waits for the next third put: the cap is exceeded until then
+        await cache.put("d", make_result())
+        await cache.put("e", make_result())
+        assert cache.stats()["entries"] == 4
+        await cache.put("f", make_result())
+        assert cache.stats()["entries"] == 2
+    finally:
+        settings.ANALYSIS_CACHE_MAX_ENTRIES, settings.ANALYSIS_CACHE_EVICT_EVERY = original
+
+def test_lru_eviction():
+    print("\nTesting LRU eviction...")
+    asyncio.run(_lru_eviction())
+    print("✅ LRU eviction: PASS")
+
+async def _concurrent_puts_of_one_key(tmp):
+    # In-memory SQLite shares one connection; use a file so every put has its own
+    if TEST_DATABASE_URL:
+        engine = make_test_engine()
+    else:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'cache.db')}")
+        configure_sqlite(engine)
+        Base.metadata.create_all(bind=engine)
+    cache = AnalysisCache(session_factory=sessionmaker(bind=engine))
+
+    # Resumes sharing a resume_hash finish their analyses at the same time
+    await asyncio.gather(*(cache.put("shared", make_result(i / 10), model="m") for i in range(8)))
+    assert cache.stats()["entries"] == 1
+    assert (await cache.get("shared")).score in {i / 10 for i in range(8)}
+
+    # A failing cache write is logged, not raised to the analysis
+    original = cache._put
+    def broken_put(*args):
+        raise RuntimeError("database is locked")
+    cache._put = broken_put
+    try:
+        await cache.put("other", make_result())
+    finally:
+        cache._put = original
+    engine.dispose()
+
+def test_concurrent_puts_of_one_key():
+    print("\nTesting concurrent cache writes...")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_concurrent_puts_of_one_key(tmp))
+    print("✅ Concurrent cache writes: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Analysis Cache Tests\n")
+    try:
+        test_key_normalizes_whitespace()
+        test_hit_miss_and_ttl()
+        test_lru_eviction()
+        test_concurrent_puts_of_one_key()
+        print("\n🎉 All analysis cache tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,273 @@
+import sys
+import os
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.api.analytics import get_analytics
+from app.api.candidates import update_candidate_status
+from app.models.analytics import OwnerStats, VacancyStats
+from app.models.candidate import Candidate
+from app.models.candidate_history import CandidateStatusChange
+from app.models.chat import ChatMessage
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import analytics_engine, analytics_rollup
+from app.services.analysis import apply_analysis_result
+from app.schemas.candidate import CandidateAnalysisResult, CandidateStatusUpdate
+from db_utils import make_test_async_engine, make_test_engine
+
+async def seed(db):
+    owner = User(email="hr@example.com", hashed_password="x")
+    other = User(email="other@example.com", hashed_password="x")
+    newcomer = User(email="new@example.com", hashed_password="x")
+    db.add_all([owner, other, newcomer])
+    await db.commit()
+    python = Vacancy(title="Python", description="Python", owner_id=owner.id)
+    empty = Vacancy(title="Empty", description="No candidates yet", owner_id=owner.id)
+    foreign = Vacancy(title="Go", description="Go", owner_id=other.id)
+    db.add_all([python, empty, foreign])
+    await db.commit()
+    db.add_all([
+        Candidate(vacancy_id=python.id, filename="a.txt", status="NEW", score=0.5),
+        Candidate(vacancy_id=python.id, filename="b.txt", status="NEW", score=0.7, hh_resume_id="r1"),
+        Candidate(vacancy_id=python.id, filename="c.txt", status="SHORTLIST", score=0.9, hh_resume_id="r2"),
+        Candidate(vacancy_id=python.id, filename="d.txt", status="INTERVIEW", score=0.3),
+        Candidate(vacancy_id=foreign.id, filename="e.txt", status="REJECTED", score=0.1),
+    ])
+    await db.commit()
+    return owner, newcomer
+
+async def _dashboard_is_one_query():
+    analytics_engine.metrics_cache.clear()
+    engine = await make_test_async_engine()
+    db = async_sessionmaker(engine, expire_on_commit=False)()
+    owner, newcomer = await seed(db)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    await get_analytics(db=db, current_user=owner)
+    # Derived metrics are cached: repeated loads read only the rollup rows
+    statements.clear()
+    stats = await get_analytics(db=db, current_user=owner)
+    assert len(statements) == 1, statements
+
+    assert stats["active_vacancies"] == 2
+    assert stats["total_candidates"] == 4
+    assert stats["status_breakdown"] == {"NEW": 2, "SHORTLIST": 1, "INTERVIEW": 1}
+    assert stats["avg_ai_score"] == 0.6
+    assert stats["sources"] == {"hh_ru": 2, "manual": 2}
+
+    # A status change invalidates the cached metrics
+    candidate = await db.scalar(select(Candidate).where(Candidate.filename == "a.txt"))
+    await update_candidate_status(candidate.id, CandidateStatusUpdate(status="SHORTLIST"), db=db, current_user=owner)
+    statements.clear()
+    stats = await get_analytics(db=db, current_user=owner)
+    assert len(statements) > 1
+    assert stats["status_breakdown"]["SHORTLIST"] == 2
+    assert stats["metrics"]["funnel_conversion"]["new_to_screened"] == 75
+
+    empty = await get_analytics(db=db, current_user=newcomer)
+    assert empty["active_vacancies"] == 0 and empty["total_candidates"] == 0
+    assert empty["status_breakdown"] == {} and empty["avg_ai_score"] == 0.0
+    assert empty["top_skills"] == [] and empty["metrics"]["time_to_hire"] is None
+    await db.close()
+
+def test_dashboard_is_one_query():
+    print("Testing analytics aggregation...")
+    asyncio.run(_dashboard_is_one_query())
+    print("✅ Analytics aggregation: PASS")
+
+def rollup_snapshot(db):
+    vacancy_rows = {
+        (r.vacancy_id, r.owner_id, r.metric, r.key): round(r.value, 6)
+        for r in db.scalars(select(VacancyStats)) if r.value
+    }
+    owner_rows = {
+        (r.owner_id, r.metric, r.key): round(r.value, 6)
+        for r in db.scalars(select(OwnerStats).where(OwnerStats.metric != analytics_rollup.VERSION_METRIC)) if r.value
+    }
+    return vacancy_rows, owner_rows
+
+def test_rollup_tracks_candidate_writes():
+    print("\nTesting incremental analytics rollup...")
+    engine = make_test_engine()
+    db = sessionmaker(bind=engine)()
+    owner = User(email="hr@example.com", hashed_password="x")
+    db.add(owner)
+    db.commit()
+    python = Vacancy(title="Python", description="Python", owner_id=owner.id)
+    backend = Vacancy(title="Backend", description="Backend", owner_id=owner.id)
+    db.add_all([python, backend])
+    db.commit()
+
+    alice = Candidate(vacancy_id=python.id, filename="alice.txt", content="Python")
+    bob = Candidate(vacancy_id=python.id, filename="bob.txt", content="Go", hh_resume_id="r1")
+    carol = Candidate(vacancy_id=backend.id, filename="carol.txt", content="Java")
+    db.add_all([alice, bob, carol])
+    db.commit()
+
+    # Analysis completion, status change, moving and deleting candidates
+    result = CandidateAnalysisResult(
+        score=0.8, skills_match=["Python", "SQL"], missing_skills=[], summary="ok", recommendation="yes"
+    )
+    apply_analysis_result(db, alice, python, result, has_messages=True)
+    db.commit()
+    alice.status = "SHORTLIST"
+    bob.vacancy_id = backend.id
+    db.commit()
+    db.delete(carol)
+    db.commit()
+    # Core bulk inserts stage their counters explicitly
+    rows = [{"vacancy_id": backend.id, "filename": f"{i}.txt", "status": "NEW"} for i in range(3)]
+    db.execute(insert(Candidate), rows)
+    analytics_rollup.record_candidate_rows(db, rows)
+    db.commit()
+    # A rolled back write leaves the rollup untouched
+    alice.status = "REJECTED"
+    db.flush()
+    db.rollback()
+
+    incremental = rollup_snapshot(db)
+    owner_rollup = {(metric, key): value for (_, metric, key), value in incremental[1].items()}
+    assert owner_rollup[("candidates", "")] == 5
+    assert owner_rollup[("status", "SHORTLIST")] == 1 and owner_rollup[("status", "NEW")] == 4
+    assert owner_rollup[("skill", "Python")] == 1
+    assert owner_rollup[("score_sum", "")] == 0.8
+    assert owner_rollup[("source", "hh")] == 1
+
+    with engine.begin() as connection:
+        analytics_rollup.rebuild(connection)
+    db.expire_all()
+    assert rollup_snapshot(db) == incremental
+    db.close()
+    print("✅ Incremental analytics rollup: PASS")
+
+def test_rollup_lock_order_and_version():
+    print("\nTesting rollup lock order and version bumps...")
+    engine = make_test_engine()
+    db = sessionmaker(bind=engine)()
+    owner = User(email="hr@example.com", hashed_password="x")
+    db.add(owner)
+    db.commit()
+    vacancy = Vacancy(title="Python", description="Python", owner_id=owner.id)
+    db.add(vacancy)
+    db.commit()
+    version = lambda: db.scalar(select(OwnerStats.value).where(
+        OwnerStats.owner_id == owner.id, OwnerStats.metric == analytics_rollup.VERSION_METRIC
+    ))
+    before = version()
+
+    upserts = []
+    def capture(conn, statement, multiparams, params, execution_options):
+        if getattr(statement, "table", None) is OwnerStats.__table__ and multiparams:
+            upserts.append([(p["owner_id"], p["metric"], p["key"]) for p in multiparams])
+    event.listen(engine, "before_execute", capture)
+
+    # Several flushes in one transaction
+    candidate = Candidate(vacancy_id=vacancy.id, filename="a.txt", status="SHORTLIST", skills_match=["SQL", "Python"])
+    db.add(candidate)
+    db.flush()
+    candidate.status = "NEW"
+    db.flush()
+    db.add(ChatMessage(candidate_id=candidate.id, role="user", content="Hi"))
+    db.commit()
+    event.remove(engine, "before_execute", capture)
+
+    # The version goes up once per transaction, not once per flush
+    assert version() == before + 1
+    # Rows are written in (scope, metric, key) order
+    assert upserts and all(rows == sorted(rows) for rows in upserts)
+    db.close()
+    print("✅ Rollup lock order and version bumps: PASS")
+
+def test_metrics_from_status_history():
+    print("\nTesting funnel and time-to-hire metrics...")
+    analytics_engine.metrics_cache.clear()
+    engine = make_test_engine()
+    db = sessionmaker(bind=engine)()
+    owner = User(email="hr@example.com", hashed_password="x", subscription_tier="START")
+    db.add(owner)
+    db.commit()
+    vacancy = Vacancy(title="Python", description="Python", owner_id=owner.id)
+    db.add(vacancy)
+    db.commit()
+
+    # Four candidates: two hired, one rejected after screening, one untouched
+    candidates = [
+        Candidate(vacancy_id=vacancy.id, filename=f"{i}.txt", skills_match=skills)
+        for i, skills in enumerate([["Python", "SQL"], ["Python"], ["Go"], []])
+    ]
+    db.add_all(candidates)
+    db.commit()
+    hired, fast, rejected, untouched = candidates
+    for candidate, statuses in ((hired, ["SHORTLIST", "APPROVED"]), (fast, ["APPROVED"]), (rejected, ["REJECTED"])):
+        for status in statuses:
+            candidate.status = status
+            db.commit()
+    db.add_all([
+        ChatMessage(candidate_id=hired.id, role="assistant", content="Hi"),
+        ChatMessage(candidate_id=hired.id, role="user", content="Hello"),
+        ChatMessage(candidate_id=rejected.id, role="assistant", content="Hi"),
+    ])
+    db.commit()
+
+    history = db.execute(
+        select(CandidateStatusChange.candidate_id, CandidateStatusChange.from_status, CandidateStatusChange.to_status)
+        .where(CandidateStatusChange.candidate_id == hired.id).order_by(CandidateStatusChange.id)
+    ).all()
+    assert [tuple(row) for row in history] == [(hired.id, None, "NEW"), (hired.id, "NEW", "SHORTLIST"), (hired.id, "SHORTLIST", "APPROVED")]
+
+    # Spread the events over time: hires after 10 and 4 days
+    start = datetime.utcnow() - timedelta(days=12)
+    db.execute(update(CandidateStatusChange).values(changed_at=start))
+    for candidate, days in ((hired, 10), (fast, 4)):
+        db.execute(update(CandidateStatusChange).where(
+            CandidateStatusChange.candidate_id == candidate.id, CandidateStatusChange.to_status == "APPROVED"
+        ).values(changed_at=start + timedelta(days=days)))
+    db.commit()
+
+    metrics = analytics_engine.compute_metrics(db, owner.id, owner.subscription_tier)
+    assert metrics["metrics"]["funnel_conversion"] == {
+        "new_to_screened": 75, "screened_to_interview": 67, "interview_to_offer": 100,
+    }
+    assert metrics["metrics"]["time_to_hire"] == 7.0
+    assert metrics["metrics"]["hires"] == 2
+    assert metrics["metrics"]["cost_per_hire"] == 7500
+    assert metrics["metrics"]["response_rate"] == 50
+    assert metrics["top_skills"][:1] == ["Python"] and set(metrics["top_skills"]) == {"Python", "SQL", "Go"}
+
+    # Chat messages bump the owner's version, so cached metrics are refreshed
+    version = lambda: db.scalar(select(OwnerStats.value).where(
+        OwnerStats.owner_id == owner.id, OwnerStats.metric == analytics_rollup.VERSION_METRIC
+    ))
+    before = version()
+    db.add(ChatMessage(candidate_id=rejected.id, role="user", content="Thanks"))
+    db.commit()
+    assert version() > before
+
+    # Deleting a candidate takes its history along
+    db.delete(untouched)
+    db.commit()
+    assert db.scalar(select(CandidateStatusChange.id).where(CandidateStatusChange.candidate_id == untouched.id)) is None
+    db.close()
+    print("✅ Funnel and time-to-hire metrics: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Analytics Tests\n")
+    try:
+        test_dashboard_is_one_query()
+        test_rollup_tracks_candidate_writes()
+        test_rollup_lock_order_and_version()
+        test_metrics_from_status_history()
+        print("\n🎉 All analytics tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,128 @@
+import sys
+import os
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.candidate import Candidate
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.schemas.candidate import CandidateAnalysisResult
+from app.services import analysis
+from app.services.analysis import BatchAnalysisRunner, analyze_batch
+from db_utils import make_test_async_engine
+
+AI_CONFIG = {"system_prompt": None, "model": "openai/gpt-4", "temperature": 0.2}
+
+def make_result(score: float) -> CandidateAnalysisResult:
+    return CandidateAnalysisResult(
+        score=score, skills_match=["Python"], missing_skills=[], summary="ok",
+        recommendation="Interview", screening_questions=[],
+    )
+
+async def make_vacancy(count: int):
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        user = User(email="hr@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        vacancy = Vacancy(title="Python", description="Python developer", owner_id=user.id)
+        db.add(vacancy)
+        await db.commit()
+        db.add_all([
+            Candidate(vacancy_id=vacancy.id, filename=f"{i}.txt", content=f"Resume {i}", score=None)
+            for i in range(count)
+        ])
+        await db.commit()
+    return engine, factory, vacancy.id
+
+class FakeModel:
+    """Stands in for the model: counts calls in flight, fails on 'Resume 3'."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, vacancy_description, resume_text, system_prompt=None, model=None,
+                       temperature=0.7, resume_hash=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            # A placeholder produced because the API failed
+            if resume_text == "Resume 3":
+                return make_result(0.85), False
+            return make_result(0.5), True
+        finally:
+            self.in_flight -= 1
+
+async def _bounded_and_batched():
+    engine, factory, vacancy_id = await make_vacancy(10)
+    model = FakeModel()
+    original = analysis.analyze_resume_checked
+    analysis.analyze_resume_checked = model
+    try:
+        async with factory() as db:
+            commits = []
+            event.listen(db.sync_session, "after_commit", lambda session: commits.append(1))
+            vacancy = await db.get(Vacancy, vacancy_id)
+            candidates = list(await db.scalars(select(Candidate).where(Candidate.vacancy_id == vacancy_id)))
+            stats = await analyze_batch(db, vacancy, candidates, AI_CONFIG, concurrency=3, commit_batch=4)
+    finally:
+        analysis.analyze_resume_checked = original
+
+    assert model.max_in_flight == 3
+    assert (stats["selected"], stats["analyzed"], stats["failed"]) == (10, 9, 1)
+    # 9 results in batches of 4: two full batches and the rest
+    assert len(commits) == 3
+    async with factory() as db:
+        scores = {c.content: c.score for c in await db.scalars(select(Candidate))}
+    # The placeholder is not stored as a score: the candidate stays unscored
+    assert not scores.pop("Resume 3")
+    assert set(scores.values()) == {0.5}
+    await engine.dispose()
+
+def test_bounded_and_batched():
+    print("Testing bulk analysis concurrency and commits...")
+    asyncio.run(_bounded_and_batched())
+    print("✅ Bulk analysis concurrency and commits: PASS")
+
+async def _runner_reports_status():
+    engine, factory, vacancy_id = await make_vacancy(5)
+    original = analysis.analyze_resume_checked
+    analysis.analyze_resume_checked = FakeModel()
+    runner = BatchAnalysisRunner(session_factory=factory)
+    try:
+        async with factory() as db:
+            ids = list(await db.scalars(select(Candidate.id)))
+        started = runner.start(vacancy_id, ids, AI_CONFIG, concurrency=2)
+        assert started["status"] == "running" and runner.is_running(vacancy_id)
+        while runner.is_running(vacancy_id):
+            await asyncio.sleep(0.01)
+    finally:
+        analysis.analyze_resume_checked = original
+
+    status = runner.status(vacancy_id)
+    assert status["status"] == "done" and (status["analyzed"], status["failed"]) == (4, 1)
+    await runner.stop()
+    await engine.dispose()
+
+def test_runner_reports_status():
+    print("\nTesting background bulk analysis...")
+    asyncio.run(_runner_reports_status())
+    print("✅ Background bulk analysis: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Bulk Analysis Tests\n")
+    try:
+        test_bounded_and_batched()
+        test_runner_reports_status()
+        print("\n🎉 All bulk analysis tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
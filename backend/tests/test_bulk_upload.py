@@ -0,0 +1,213 @@
+import sys
+import os
+import io
+import asyncio
+import zipfile
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.candidate import Candidate
+from app.models.resume_blob import ResumeBlob
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import bulk_upload
+from app.services.bulk_upload import BulkUploadError, import_resumes
+from app.services.resume_parser import ResumeParseError
+from db_utils import make_test_async_engine
+
+async def make_db():
+    db = async_sessionmaker(await make_test_async_engine(), expire_on_commit=False)()
+    user = User(email="hr@example.com", hashed_password="x", subscription_tier="FREE", resumes_used_current_period=0)
+    db.add(user)
+    await db.commit()
+    vacancy = Vacancy(title="Python", description="Python developer", owner_id=user.id)
+    db.add(vacancy)
+    await db.commit()
+    return db, user, vacancy
+
+def make_zip(entries) -> UploadFile:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    buf.seek(0)
+    return UploadFile(file=buf, filename="batch.zip")
+
+def test_zip_and_files_are_deduplicated_and_bulk_inserted():
+    print("Testing bulk upload...")
+    asyncio.run(_zip_and_files_are_deduplicated_and_bulk_inserted())
+    print("✅ Bulk upload: PASS")
+
+async def _zip_and_files_are_deduplicated_and_bulk_inserted():
+    db, user, vacancy = await make_db()
+    files = [
+        make_zip([
+            ("cvs/a.txt", b"Resume A"),
+            ("cvs/b.txt", b"Resume B"),
+            ("cvs/copy_of_a.txt", b"Resume A"),
+            ("__MACOSX/._a.txt", b"junk"),
+            ("notes.md", b"not a resume"),
+        ]),
+        UploadFile(file=io.BytesIO(b"Resume C"), filename="c.txt"),
+    ]
+    result = await import_resumes(db, vacancy, user, files)
+
+    assert result["created"] == 3
+    assert result["duplicates"] == 1
+    assert result["failed"] == []
+    candidates = await db.scalars(
+        select(Candidate).where(Candidate.vacancy_id == vacancy.id).options(selectinload(Candidate.resume_blob))
+    )
+    assert sorted(c.resume_text for c in candidates) == ["Resume A", "Resume B", "Resume C"]
+    assert user.resumes_used_current_period == 3
+    await db.close()
+
+def test_reupload_reuses_stored_resume_text():
+    print("\nTesting resume blob reuse...")
+    asyncio.run(_reupload_reuses_stored_resume_text())
+    print("✅ Resume blob reuse: PASS")
+
+async def _reupload_reuses_stored_resume_text():
+    db, user, vacancy = await make_db()
+    other = Vacancy(title="Backend", description="Backend developer", owner_id=user.id)
+    db.add(other)
+    await db.commit()
+    await import_resumes(db, vacancy, user, [UploadFile(file=io.BytesIO(b"Resume A"), filename="a.txt")])
+
+    original_parse = bulk_upload.resume_parser_pool.parse
+    parsed = []
+    async def counting_parse(filename, data):
+        parsed.append(filename)
+        return await original_parse(filename, data)
+    bulk_upload.resume_parser_pool.parse = counting_parse
+    try:
+        files = [
+            UploadFile(file=io.BytesIO(b"Resume A"), filename="a_again.txt"),
+            UploadFile(file=io.BytesIO(b"Resume B"), filename="b.txt"),
+        ]
+        result = await import_resumes(db, other, user, files)
+    finally:
+        bulk_upload.resume_parser_pool.parse = original_parse
+
+    assert result["created"] == 2
+    assert parsed == ["b.txt"]
+    assert await db.scalar(select(func.count()).select_from(ResumeBlob)) == 2
+    reused = await db.scalar(
+        select(Candidate).where(Candidate.filename == "a_again.txt").options(selectinload(Candidate.resume_blob))
+    )
+    assert reused.resume_text == "Resume A" and reused.content is None
+    await db.close()
+
+def test_quota_and_size_limits():
+    print("\nTesting bulk upload limits...")
+    asyncio.run(_quota_and_size_limits())
+    print("✅ Bulk upload limits: PASS")
+
+async def _quota_and_size_limits():
+    db, user, vacancy = await make_db()
+    limit = settings.SUBSCRIPTION_TIERS["FREE"]["resume_limit"]
+    user.resumes_used_current_period = limit - 2
+    await db.commit()
+
+    original = settings.RESUME_MAX_BYTES
+    settings.RESUME_MAX_BYTES = 20
+    try:
+        files = [make_zip([(f"{i}.txt", f"Resume {i}".encode()) for i in range(4)] + [("big.txt", b"x" * 21)])]
+        result = await import_resumes(db, vacancy, user, files)
+    finally:
+        settings.RESUME_MAX_BYTES = original
+
+    assert result["created"] == 2
+    assert result["skipped_quota"] == 2
+    assert [f["filename"] for f in result["failed"]] == ["big.txt"]
+    assert user.resumes_used_current_period == limit
+    await db.close()
+
+def test_failed_parses_use_no_quota():
+    print("\nTesting quota with failed parses...")
+    asyncio.run(_failed_parses_use_no_quota())
+    print("✅ Quota with failed parses: PASS")
+
+async def _failed_parses_use_no_quota():
+    db, user, vacancy = await make_db()
+    limit = settings.SUBSCRIPTION_TIERS["FREE"]["resume_limit"]
+    user.resumes_used_current_period = limit - 2
+    await db.commit()
+
+    async def failing_parse(filename, data):
+        if filename.startswith("broken"):
+            raise ResumeParseError("Unreadable file")
+        return data.decode()
+
+    original_parse = bulk_upload.resume_parser_pool.parse
+    bulk_upload.resume_parser_pool.parse = failing_parse
+    try:
+        files = [make_zip([
+            ("broken1.txt", b"Broken 1"), ("broken2.txt", b"Broken 2"),
+            ("a.txt", b"Resume A"), ("b.txt", b"Resume B"), ("c.txt", b"Resume C"),
+        ])]
+        result = await import_resumes(db, vacancy, user, files)
+    finally:
+        bulk_upload.resume_parser_pool.parse = original_parse
+
+    # The two broken files leave their slots to the next resumes
+    assert result["created"] == 2
+    assert result["skipped_quota"] == 1
+    assert [f["filename"] for f in result["failed"]] == ["broken1.txt", "broken2.txt"]
+    assert user.resumes_used_current_period == limit
+    await db.close()
+
+def test_too_many_files_cancels_parses():
+    print("\nTesting file count limit...")
+    asyncio.run(_too_many_files_cancels_parses())
+    print("✅ File count limit: PASS")
+
+async def _too_many_files_cancels_parses():
+    db, user, vacancy = await make_db()
+    cancelled = []
+
+    async def slow_parse(filename, data):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(filename)
+            raise
+
+    original = (bulk_upload.resume_parser_pool.parse, settings.BULK_UPLOAD_MAX_FILES)
+    bulk_upload.resume_parser_pool.parse = slow_parse
+    # One full parse batch is started before the limit is hit
+    settings.BULK_UPLOAD_MAX_FILES = 2 * bulk_upload.resume_parser_pool.workers
+    try:
+        files = [make_zip([(f"{i}.txt", f"Resume {i}".encode()) for i in range(settings.BULK_UPLOAD_MAX_FILES + 1)])]
+        try:
+            await import_resumes(db, vacancy, user, files)
+            assert False, "expected BulkUploadError"
+        except BulkUploadError:
+            pass
+    finally:
+        bulk_upload.resume_parser_pool.parse, settings.BULK_UPLOAD_MAX_FILES = original
+
+    # The parses started before the limit was hit do not outlive the request
+    assert cancelled
+    assert all(task is asyncio.current_task() or task.done() for task in asyncio.all_tasks())
+    await db.close()
+
+if __name__ == "__main__":
+    print("🚀 Running Bulk Upload Tests\n")
+    try:
+        test_zip_and_files_are_deduplicated_and_bulk_inserted()
+        test_reupload_reuses_stored_resume_text()
+        test_quota_and_size_limits()
+        test_failed_parses_use_no_quota()
+        test_too_many_files_cancels_parses()
+        print("\n🎉 All bulk upload tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
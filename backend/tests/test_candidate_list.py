@@ -0,0 +1,92 @@
+import sys
+import os
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.candidates import read_candidates
+from app.models.candidate import Candidate
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.schemas.candidate import CandidatePage
+from db_utils import make_test_async_engine
+
+SCORES = [0.9, 0.5, 0.5, 0.5, None, 0.7, 0.1, None, 0.5, 0.0]
+
+async def seed(db):
+    owner = User(email="hr@example.com", hashed_password="x")
+    db.add(owner)
+    await db.commit()
+    vacancy = Vacancy(title="Python", description="Python", owner_id=owner.id)
+    db.add(vacancy)
+    await db.commit()
+    candidates = [
+        Candidate(vacancy_id=vacancy.id, filename=f"{i}.pdf", content="resume " * 1000, score=score,
+                  status="SHORTLIST" if i % 3 == 0 else "NEW", screening_questions=["Why?"])
+        for i, score in enumerate(SCORES)
+    ]
+    db.add_all(candidates)
+    await db.commit()
+    return owner, vacancy, candidates
+
+async def walk(db, owner, vacancy, limit, **filters):
+    items, cursor, pages = [], None, 0
+    while True:
+        page = CandidatePage.model_validate(await read_candidates(
+            vacancy_id=vacancy.id, cursor=cursor, limit=limit, db=db, current_user=owner,
+            **{"status": None, "min_score": None, "max_score": None, **filters},
+        ))
+        items += page.items
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            return items, pages
+
+async def _keyset_pages():
+    engine = await make_test_async_engine()
+    db = async_sessionmaker(engine, expire_on_commit=False)()
+    owner, vacancy, candidates = await seed(db)
+    db.expunge_all()
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    items, pages = await walk(db, owner, vacancy, limit=3)
+    # Pages follow (score desc, id desc) with unscored candidates last
+    scored = sorted((c for c in candidates if c.score is not None), key=lambda c: (c.score, c.id), reverse=True)
+    unscored = sorted((c for c in candidates if c.score is None), key=lambda c: c.id, reverse=True)
+    assert [i.id for i in items] == [c.id for c in scored + unscored]
+    assert pages == 4
+    # The list never reads resume text
+    assert not any("content" in s or "resume_blob" in s for s in statements), statements
+
+    shortlisted, _ = await walk(db, owner, vacancy, limit=2, status="SHORTLIST")
+    assert {i.id for i in shortlisted} == {c.id for c in candidates if c.status == "SHORTLIST"}
+    in_range, _ = await walk(db, owner, vacancy, limit=2, min_score=0.4, max_score=0.8)
+    assert [i.score for i in in_range] == [0.7, 0.5, 0.5, 0.5, 0.5]
+
+    try:
+        await read_candidates(vacancy_id=vacancy.id, cursor="not-a-cursor", limit=3, status=None,
+                              min_score=None, max_score=None, db=db, current_user=owner)
+        assert False, "invalid cursor accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+    await db.close()
+
+def test_keyset_pages():
+    print("Testing candidate list pagination...")
+    asyncio.run(_keyset_pages())
+    print("✅ Candidate list pagination: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Candidate List Tests\n")
+    try:
+        test_keyset_pages()
+        print("\n🎉 All candidate list tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,119 @@
+import sys
+import os
+import json
+import time
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api import chat
+from app.models.candidate import Candidate
+from app.models.chat import ChatMessage
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from db_utils import make_test_async_engine
+
+class FakeRequest:
+    def __init__(self, disconnected: bool = False):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+class FakeModel:
+    """Replaces _stream_ai_reply: yields `deltas`, then fails or hangs if asked to."""
+
+    def __init__(self, deltas, fail: bool = False, hang: bool = False):
+        self.deltas = deltas
+        self.fail = fail
+        self.hang = hang
+        self.closed = False
+
+    async def __call__(self, *args, **kwargs):
+        try:
+            for delta in self.deltas:
+                yield delta
+            if self.fail:
+                raise RuntimeError("upstream reset")
+            if self.hang:
+                await asyncio.sleep(30)
+        finally:
+            self.closed = True
+
+def parse(events):
+    return [(e.split("\n")[0][len("event: "):], json.loads(e.split("data: ", 1)[1])) for e in events]
+
+async def run_stream(model: FakeModel, request: FakeRequest):
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        user = User(email="hr@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        vacancy = Vacancy(title="Python", description="Python developer", owner_id=user.id)
+        db.add(vacancy)
+        await db.commit()
+        candidate = Candidate(vacancy_id=vacancy.id, filename="cv.txt", content="Python, FastAPI")
+        db.add(candidate)
+        await db.commit()
+
+    original = (chat._stream_ai_reply, chat.AsyncSessionLocal, chat.DISCONNECT_POLL_SECONDS)
+    chat._stream_ai_reply = model
+    chat.AsyncSessionLocal = factory
+    chat.DISCONNECT_POLL_SECONDS = 0.05
+    try:
+        async with factory() as db:
+            response = await chat.stream_chat_message(
+                chat.ChatMessageCreate(candidate_id=candidate.id, role="user", content="Здравствуйте"),
+                request, db=db, current_user=user,
+            )
+            events = [event async for event in response.body_iterator]
+        async with factory() as db:
+            saved = list(await db.scalars(select(ChatMessage.role).order_by(ChatMessage.id)))
+    finally:
+        chat._stream_ai_reply, chat.AsyncSessionLocal, chat.DISCONNECT_POLL_SECONDS = original
+    await engine.dispose()
+    return parse(events), saved
+
+def test_reply_is_streamed_and_saved():
+    print("Testing streamed chat reply...")
+    model = FakeModel(["При", "вет"])
+    events, saved = asyncio.run(run_stream(model, FakeRequest()))
+    assert [name for name, _ in events] == ["delta", "delta", "done"]
+    assert events[-1][1]["content"] == "Привет" and events[-1][1]["role"] == "assistant"
+    assert saved == ["user", "assistant"] and model.closed
+    print("✅ Streamed chat reply: PASS")
+
+def test_interrupted_reply_is_not_saved():
+    print("\nTesting interrupted chat reply...")
+    model = FakeModel(["При"], fail=True)
+    events, saved = asyncio.run(run_stream(model, FakeRequest()))
+    assert events == [("delta", {"content": "При"}), ("error", {"detail": chat.AI_INTERRUPTED})]
+    # Only the candidate's message is in the history
+    assert saved == ["user"] and model.closed
+    print("✅ Interrupted chat reply: PASS")
+
+def test_disconnect_cancels_silent_model():
+    print("\nTesting disconnect while the model is silent...")
+    model = FakeModel([], hang=True)
+    started = time.perf_counter()
+    events, saved = asyncio.run(run_stream(model, FakeRequest(disconnected=True)))
+    # Noticed by the poll, not after the model's 30 s silence
+    assert time.perf_counter() - started < 5
+    assert events == [] and saved == ["user"] and model.closed
+    print("✅ Disconnect while the model is silent: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Chat Stream Tests\n")
+    try:
+        test_reply_is_streamed_and_saved()
+        test_interrupted_reply_is_not_saved()
+        test_disconnect_cancels_silent_model()
+        print("\n🎉 All chat stream tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,164 @@
+import sys
+import os
+import io
+import csv
+import asyncio
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.candidate import Candidate
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import candidate_export
+from db_utils import make_test_async_engine
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+async def seed():
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        owner = User(email="hr@example.com", hashed_password="x")
+        other = User(email="other@example.com", hashed_password="x")
+        db.add_all([owner, other])
+        await db.commit()
+        python = Vacancy(title="Python", description="Python", owner_id=owner.id)
+        backend = Vacancy(title="Бэкенд", description="Go", owner_id=owner.id)
+        foreign = Vacancy(title="Foreign", description="Go", owner_id=other.id)
+        db.add_all([python, backend, foreign])
+        await db.commit()
+        rows = [
+            {"vacancy_id": python.id, "filename": f"{i}.pdf", "status": "NEW", "score": i / 100,
+             "skills_match": ["Python", "SQL"], "missing_skills": [], "hh_resume_id": "r1" if i % 2 else None}
+            for i in range(23)
+        ]
+        rows.append({"vacancy_id": backend.id, "filename": "<ivan> & co.pdf", "status": "SHORTLIST", "score": 0.9})
+        rows.append({"vacancy_id": foreign.id, "filename": "secret.pdf", "status": "NEW", "score": 0.5})
+        await db.execute(insert(Candidate), rows)
+        await db.commit()
+    return engine, factory, owner.id, python.id
+
+async def collect(factory, owner_id, fmt, vacancy_id=None, engine=None):
+    statements = []
+    if engine is not None:
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    chunks = []
+    async for chunk in candidate_export.stream_export(owner_id, fmt, vacancy_id, session_factory=factory):
+        if not chunks:
+            # The first bytes go out before the database is queried
+            assert statements == []
+        chunks.append(chunk)
+    return chunks
+
+async def _csv_export_streams_in_batches():
+    engine, factory, owner_id, python_id = await seed()
+    original = settings.EXPORT_BATCH_SIZE
+    settings.EXPORT_BATCH_SIZE = 10
+    try:
+        chunks = await collect(factory, owner_id, "csv", engine=engine)
+        # header + three batches of up to 10 rows
+        assert len(chunks) >= 4, len(chunks)
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+        assert len(rows) == 24
+        assert "secret.pdf" not in {r["filename"] for r in rows}
+        assert rows[0]["skills_match"] == "Python; SQL" and rows[0]["source"] == "manual"
+        assert rows[1]["source"] == "hh"
+        assert rows[-1]["vacancy"] == "Бэкенд" and rows[-1]["status"] == "SHORTLIST"
+
+        only_python = await collect(factory, owner_id, "csv", vacancy_id=python_id)
+        assert len(list(csv.DictReader(io.StringIO(b"".join(only_python).decode("utf-8-sig"))))) == 23
+    finally:
+        settings.EXPORT_BATCH_SIZE = original
+    await engine.dispose()
+
+def test_csv_export_streams_in_batches():
+    print("Testing streaming CSV export...")
+    asyncio.run(_csv_export_streams_in_batches())
+    print("✅ Streaming CSV export: PASS")
+
+async def _csv_cells_are_not_formulas():
+    engine, factory, owner_id, python_id = await seed()
+    async with factory() as db:
+        await db.execute(insert(Candidate), [{
+            "vacancy_id": python_id, "filename": "=HYPERLINK(\"http://evil\")", "status": "NEW", "score": 0.1,
+            "skills_match": ["@SUM(A1)", "C++"], "missing_skills": ["-2+3"],
+        }])
+        await db.commit()
+    rows = list(csv.DictReader(io.StringIO(
+        b"".join(await collect(factory, owner_id, "csv", vacancy_id=python_id)).decode("utf-8-sig")
+    )))
+    injected = next(r for r in rows if "HYPERLINK" in r["filename"])
+    assert injected["filename"] == "'=HYPERLINK(\"http://evil\")"
+    assert injected["skills_match"] == "'@SUM(A1); C++" and injected["missing_skills"] == "'-2+3"
+    # Numbers and plain text are unchanged
+    assert rows[0]["filename"] == "0.pdf" and rows[0]["score"] == "0.0"
+    await engine.dispose()
+
+def test_csv_cells_are_not_formulas():
+    print("\nTesting CSV formula escaping...")
+    asyncio.run(_csv_cells_are_not_formulas())
+    print("✅ CSV formula escaping: PASS")
+
+async def _xlsx_export_splits_sheets():
+    engine, factory, owner_id, _ = await seed()
+    original = candidate_export.XlsxWriter.max_sheet_rows
+    candidate_export.XlsxWriter.max_sheet_rows = 11
+    try:
+        data = b"".join(await collect(factory, owner_id, "xlsx"))
+    finally:
+        candidate_export.XlsxWriter.max_sheet_rows = original
+
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    assert len(workbook.findall("s:sheets/s:sheet", SHEET_NS)) == 3
+    values = []
+    for n in (1, 2, 3):
+        sheet = ET.fromstring(archive.read(f"xl/worksheets/sheet{n}.xml"))
+        rows = sheet.findall("s:sheetData/s:row", SHEET_NS)
+        # Every sheet repeats the header
+        assert "".join(rows[0].itertext()).startswith("idvacancy_id")
+        values.extend(rows[1:])
+    assert len(values) == 24
+    assert "<ivan> & co.pdf" in "".join(values[-1].itertext())
+    await engine.dispose()
+
+def test_xlsx_export_splits_sheets():
+    print("\nTesting streaming XLSX export...")
+    asyncio.run(_xlsx_export_splits_sheets())
+    print("✅ Streaming XLSX export: PASS")
+
+async def _parquet_export():
+    import pyarrow.parquet as pq
+
+    engine, factory, owner_id, _ = await seed()
+    table = pq.read_table(io.BytesIO(b"".join(await collect(factory, owner_id, "parquet"))))
+    assert table.num_rows == 24
+    assert table.column("skills_match")[0].as_py() == ["Python", "SQL"]
+    await engine.dispose()
+
+def test_parquet_export():
+    print("\nTesting Parquet export...")
+    if not candidate_export.is_available("parquet"):
+        print("⚠️  pyarrow is not installed, skipping")
+        return
+    asyncio.run(_parquet_export())
+    print("✅ Parquet export: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Export Tests\n")
+    try:
+        test_csv_export_streams_in_batches()
+        test_csv_cells_are_not_formulas()
+        test_xlsx_export_splits_sheets()
+        test_parquet_export()
+        print("\n🎉 All export tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,130 @@
+import sys
+import os
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime
+
+import httpx
+
+from app.services.hh import HHService, hh_service, parse_hh_datetime
+
+PAGES = 3
+PER_PAGE = 4
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/negotiations":
+        page = int(request.url.params["page"])
+        items = [
+            {
+                "id": f"n{page * PER_PAGE + i}",
+                # Newest first: n0 is the most recently updated negotiation
+                "updated_at": f"2024-05-01T12:{59 - page * PER_PAGE - i:02d}:00+0300",
+                "resume": {"id": f"r{page * PER_PAGE + i}", "first_name": "Ivan", "last_name": str(i), "title": "Dev"},
+            }
+            for i in range(PER_PAGE)
+        ]
+        return httpx.Response(200, json={"items": items, "pages": PAGES, "page": page})
+    if request.url.path.startswith("/resumes/"):
+        resume_id = request.url.path.rsplit("/", 1)[-1]
+        etag = f'"v-{resume_id}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": etag}, json={
+            "title": f"Python {resume_id}",
+            "skill_set": [{"name": "Python"}],
+            "experience": [{"company": "Acme", "position": "Dev", "description": "APIs"}],
+        })
+    return httpx.Response(404)
+
+async def fetch_with_mock_transport(transport_handler=handler, **kwargs):
+    service = HHService(mock_mode=False)
+    service._client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(transport_handler))
+    service._client_loop = asyncio.get_running_loop()
+    try:
+        return await service.get_responses("42", token="token", **kwargs)
+    finally:
+        await service.aclose()
+
+def test_get_responses_reads_all_pages():
+    print("Testing paginated, concurrent HH responses...")
+    responses = asyncio.run(fetch_with_mock_transport())
+
+    ids = sorted(r["hh_resume_id"] for r in responses)
+    assert len(ids) == PAGES * PER_PAGE
+    assert ids == sorted(f"r{i}" for i in range(PAGES * PER_PAGE))
+    sample = next(r for r in responses if r["hh_resume_id"] == "r5")
+    assert sample["full_name"] == "Ivan 1"
+    assert sample["content"].startswith("Title: Python r5\nSkills: Python\n")
+    assert "- Acme: Dev (APIs)" in sample["content"]
+    print("✅ Paginated responses: PASS")
+
+def test_incremental_fetch_skips_seen_negotiations_and_resumes():
+    print("\nTesting incremental HH responses...")
+    # A previous sync imported up to n5; its second (12:54) is read again, since
+    # another negotiation may have been updated in it after that sync
+    since = parse_hh_datetime("2024-05-01T12:54:00+0300")
+    responses = asyncio.run(fetch_with_mock_transport(since=since))
+    assert sorted(r["hh_resume_id"] for r in responses) == ["r0", "r1", "r2", "r3", "r4", "r5"]
+    assert all(r["resume_version"] == f'"v-{r["hh_resume_id"]}"' for r in responses)
+
+    # Unchanged resumes answer 304 to the stored ETag and are skipped
+    versions = {"r0": '"v-r0"', "r1": '"old"'}
+    responses = asyncio.run(fetch_with_mock_transport(since=since, resume_versions=versions))
+    assert sorted(r["hh_resume_id"] for r in responses) == ["r1", "r2", "r3", "r4", "r5"]
+    assert parse_hh_datetime("2024-05-01T12:54:00+0300") == datetime(2024, 5, 1, 9, 54)
+    print("✅ Incremental responses: PASS")
+
+def test_api_calls_counted_per_sync():
+    print("\nTesting per-sync API call counts...")
+
+    async def counted(**kwargs):
+        with hh_service.count_calls() as calls:
+            await fetch_with_mock_transport(**kwargs)
+        return calls.calls
+
+    async def concurrent_syncs():
+        return await asyncio.gather(counted(), counted(since=parse_hh_datetime("2024-05-01T12:54:00+0300")))
+
+    full, incremental = asyncio.run(concurrent_syncs())
+    # All pages and resumes vs. pages up to the first stale one and six resumes
+    assert full == PAGES + PAGES * PER_PAGE
+    assert incremental == 3 + 6
+    print("✅ Per-sync API call counts: PASS")
+
+def test_failed_resume_fetch_is_not_a_change():
+    print("\nTesting failed resume fetch...")
+
+    def flaky_handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/resumes/r2":
+            return httpx.Response(503)
+        return handler(request)
+
+    responses = asyncio.run(fetch_with_mock_transport(flaky_handler))
+    failed = [r for r in responses if r.get("fetch_failed")]
+    assert [r["hh_resume_id"] for r in failed] == ["r2"]
+    # Kept with its negotiation so the sync does not move its cursor past it
+    assert failed[0]["negotiation_id"] == "n2" and "content" not in failed[0]
+    assert len(responses) == PAGES * PER_PAGE
+    print("✅ Failed resume fetch: PASS")
+
+def test_mock_mode_without_token():
+    print("\nTesting mock responses...")
+    responses = asyncio.run(HHService(mock_mode=True).get_responses("42"))
+    assert responses[0]["hh_resume_id"] == "mock_resume_123"
+    print("✅ Mock responses: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running HH Responses Tests\n")
+    try:
+        test_get_responses_reads_all_pages()
+        test_incremental_fetch_skips_seen_negotiations_and_resumes()
+        test_api_calls_counted_per_sync()
+        test_failed_resume_fetch_is_not_a_change()
+        test_mock_mode_without_token()
+        print("\n🎉 All HH responses tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,133 @@
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.candidate import Candidate
+from app.models.hh_sync import HHSyncState
+from app.models.scheduler import SchedulerLock
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services import hh_sync
+from app.services.hh import hh_service
+from app.services.hh_scheduler import HHSyncScheduler, acquire_lock, release_lock
+from db_utils import make_test_async_engine
+
+async def make_session_factory():
+    return async_sessionmaker(await make_test_async_engine(), expire_on_commit=False)
+
+def test_leader_lock():
+    print("Testing scheduler leader election...")
+    asyncio.run(_leader_lock())
+    print("✅ Leader election: PASS")
+
+async def _leader_lock():
+    db = (await make_session_factory())()
+    assert await acquire_lock(db, "hh_sync", "worker-a", 60)
+    assert not await acquire_lock(db, "hh_sync", "worker-b", 60)
+    # The leader renews its own lease
+    assert await acquire_lock(db, "hh_sync", "worker-a", 60)
+
+    # An expired lease can be taken over
+    await db.execute(update(SchedulerLock).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    await db.commit()
+    assert await acquire_lock(db, "hh_sync", "worker-b", 60)
+    assert not await acquire_lock(db, "hh_sync", "worker-a", 60)
+
+    await release_lock(db, "hh_sync", "worker-b")
+    assert await acquire_lock(db, "hh_sync", "worker-a", 60)
+    await db.close()
+
+def test_run_once_records_metrics():
+    print("\nTesting scheduled sync run...")
+    asyncio.run(_run_once_records_metrics())
+    print("✅ Scheduled sync run: PASS")
+
+async def _run_once_records_metrics():
+    session_factory = await make_session_factory()
+    db = session_factory()
+    with_token = User(email="a@b.com", hashed_password="x", hh_access_token="token-a", resumes_used_current_period=0)
+    rate_limited = User(email="c@d.com", hashed_password="x", hh_access_token="token-b", resumes_used_current_period=0)
+    no_token = User(email="e@f.com", hashed_password="x", resumes_used_current_period=0)
+    db.add_all([with_token, rate_limited, no_token])
+    await db.commit()
+    db.add_all([
+        Vacancy(title="Py", description="Python", owner_id=with_token.id, hh_id="1"),
+        Vacancy(title="Go", description="Go", owner_id=rate_limited.id, hh_id="2"),
+        Vacancy(title="Js", description="JS", owner_id=no_token.id, hh_id="3"),
+        Vacancy(title="Draft", description="Not published", owner_id=with_token.id),
+    ])
+    await db.commit()
+    await db.close()
+
+    hh_service._record_rate_limited("token-b", "60")
+    try:
+        run = await HHSyncScheduler(session_factory=session_factory).run_once()
+    finally:
+        hh_service._backoff.clear()
+
+    assert run.vacancies_total == 2
+    assert run.vacancies_synced == 1
+    assert run.vacancies_skipped == 1
+    assert run.new_candidates == 1
+    assert run.errors == 0
+    assert run.finished_at is not None and run.duration_seconds >= 0
+
+    async with session_factory() as db:
+        imported = await db.scalar(
+            select(func.count()).select_from(Candidate).where(Candidate.hh_resume_id == "mock_resume_123")
+        )
+    assert imported == 1
+
+def test_sync_prunes_resume_versions():
+    print("\nTesting resume version pruning...")
+    asyncio.run(_sync_prunes_resume_versions())
+    print("✅ Resume version pruning: PASS")
+
+async def _sync_prunes_resume_versions():
+    session_factory = await make_session_factory()
+    async with session_factory() as db:
+        user = User(email="a@b.com", hashed_password="x", hh_access_token="token-a", resumes_used_current_period=0)
+        db.add(user)
+        await db.commit()
+        vacancy = Vacancy(title="Py", description="Python", owner_id=user.id, hh_id="1")
+        db.add(vacancy)
+        await db.commit()
+        db.add(Candidate(vacancy_id=vacancy.id, filename="HH_Resume_r1.txt", content="Python", hh_resume_id="r1"))
+        # "gone" was imported once and its candidate deleted since
+        db.add(HHSyncState(vacancy_id=vacancy.id, resume_versions={"r1": "v1", "gone": "v0"}))
+        await db.commit()
+
+    async def get_responses(hh_vacancy_id, token=None, since=None, resume_versions=None):
+        return [{
+            "hh_resume_id": "r2", "full_name": "Ivan", "email": None, "content": "Go",
+            "negotiation_id": "n2", "negotiation_updated_at": "2024-05-01T12:00:00+0300", "resume_version": "v2",
+        }]
+
+    original = hh_service.get_responses
+    hh_service.get_responses = get_responses
+    try:
+        async with session_factory() as db:
+            created = await hh_sync.sync_vacancy(db, await db.get(Vacancy, vacancy.id), await db.get(User, user.id))
+            assert [c.hh_resume_id for c in created] == ["r2"]
+            state = await hh_sync.get_sync_state(db, vacancy.id)
+            assert state.resume_versions == {"r1": "v1", "r2": "v2"}
+    finally:
+        hh_service.get_responses = original
+
+if __name__ == "__main__":
+    print("🚀 Running HH Sync Scheduler Tests\n")
+    try:
+        test_leader_lock()
+        test_run_once_records_metrics()
+        test_sync_prunes_resume_versions()
+        print("\n🎉 All HH sync scheduler tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
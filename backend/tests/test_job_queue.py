@@ -0,0 +1,244 @@
+import sys
+import os
+import json
+import asyncio
+from datetime import datetime, timedelta
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api import jobs
+from app.core.config import settings
+from app.models.candidate import Candidate
+from app.models.chat import ChatMessage
+from app.models.job import AnalysisJob
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.schemas.candidate import CandidateAnalysisResult
+from app.services import analysis
+from app.services.job_queue import AnalysisJobQueue
+from db_utils import make_test_async_engine
+
+AI_CONFIG = {"system_prompt": None, "model": "openai/gpt-4", "temperature": 0.2}
+
+RESULT = CandidateAnalysisResult(
+    score=0.9, skills_match=["Python"], missing_skills=[], summary="ok",
+    recommendation="Interview", screening_questions=["Расскажите о FastAPI"],
+)
+
+async def make_queue():
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        user = User(email="hr@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        vacancy = Vacancy(title="Python", description="Python developer", owner_id=user.id)
+        db.add(vacancy)
+        await db.commit()
+        candidate = Candidate(vacancy_id=vacancy.id, filename="cv.txt", content="Python, FastAPI")
+        db.add(candidate)
+        await db.commit()
+    return engine, factory, AnalysisJobQueue(session_factory=factory), user.id, vacancy.id, candidate.id
+
+async def enqueue(queue, factory, user_id, vacancy_id, candidate_id, ai_config=AI_CONFIG):
+    async with factory() as db:
+        candidate = await db.get(Candidate, candidate_id)
+        vacancy = await db.get(Vacancy, vacancy_id)
+        return await queue.enqueue(db, candidate, vacancy, user_id, ai_config)
+
+async def process_one(queue, factory):
+    async with factory() as db:
+        job_id = await queue._claim_next(db)
+        if job_id is not None:
+            await queue._run_job(db, job_id)
+        return job_id
+
+async def read_job(factory, job_id) -> AnalysisJob:
+    async with factory() as db:
+        return await db.get(AnalysisJob, job_id)
+
+async def _enqueue_is_idempotent():
+    engine, factory, queue, user_id, vacancy_id, candidate_id = await make_queue()
+    first = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+    again = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+    assert first.id == again.id and again.status == "queued"
+
+    # Other settings: another job
+    other = await enqueue(queue, factory, user_id, vacancy_id, candidate_id, {**AI_CONFIG, "temperature": 0.9})
+    assert other.id != first.id
+
+    # A finished job is queued again when asked for
+    async with factory() as db:
+        await db.execute(update(AnalysisJob).values(status="done", progress=100, attempts=1))
+        await db.commit()
+    rerun = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+    assert rerun.id == first.id and rerun.status == "queued" and rerun.attempts == 0
+
+    # A changed resume is a different analysis
+    async with factory() as db:
+        (await db.get(Candidate, candidate_id)).content = "Go, Kubernetes"
+        await db.commit()
+    changed = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+    assert changed.id not in (first.id, other.id)
+    await engine.dispose()
+
+def test_enqueue_is_idempotent():
+    print("Testing job enqueue idempotency...")
+    asyncio.run(_enqueue_is_idempotent())
+    print("✅ Job enqueue idempotency: PASS")
+
+async def _claim_retry_and_max_attempts():
+    engine, factory, queue, user_id, vacancy_id, candidate_id = await make_queue()
+    calls = []
+
+    async def flaky_analysis(vacancy_description, resume_text, ai_config, resume_hash=None):
+        calls.append(resume_text)
+        if len(calls) < 3:
+            raise RuntimeError("model unavailable")
+        return RESULT
+
+    original = (analysis.run_analysis, settings.JOB_MAX_ATTEMPTS)
+    analysis.run_analysis = flaky_analysis
+    settings.JOB_MAX_ATTEMPTS = 2
+    try:
+        job = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+
+        # Failed attempt goes back to the queue, the last one fails the job
+        assert await process_one(queue, factory) == job.id
+        retried = await read_job(factory, job.id)
+        assert (retried.status, retried.attempts, retried.error) == ("queued", 1, "model unavailable")
+        assert await process_one(queue, factory) == job.id
+        failed = await read_job(factory, job.id)
+        assert (failed.status, failed.attempts) == ("failed", 2) and failed.finished_at is not None
+        assert await process_one(queue, factory) is None
+
+        # Enqueued again, it succeeds and posts the first screening question once
+        await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+        assert await process_one(queue, factory) == job.id
+        done = await read_job(factory, job.id)
+        assert (done.status, done.progress, done.attempts, done.error) == ("done", 100, 1, None)
+        assert calls == ["Python, FastAPI"] * 3
+        async with factory() as db:
+            assert (await db.get(Candidate, candidate_id)).score == 0.9
+            messages = list(await db.scalars(select(ChatMessage).where(ChatMessage.candidate_id == candidate_id)))
+            assert len(messages) == 1 and "FastAPI" in messages[0].content
+    finally:
+        analysis.run_analysis, settings.JOB_MAX_ATTEMPTS = original
+    await engine.dispose()
+
+def test_claim_retry_and_max_attempts():
+    print("\nTesting job claim and retries...")
+    asyncio.run(_claim_retry_and_max_attempts())
+    print("✅ Job claim and retries: PASS")
+
+async def _stale_jobs_are_requeued():
+    engine, factory, queue, user_id, vacancy_id, candidate_id = await make_queue()
+    original = settings.JOB_MAX_ATTEMPTS
+    settings.JOB_MAX_ATTEMPTS = 2
+    try:
+        job = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+        stale = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS + 60)
+        async with factory() as db:
+            await db.execute(update(AnalysisJob).values(status="running", started_at=stale, attempts=1))
+            await db.commit()
+            await queue._requeue_stale(db)
+        assert (await read_job(factory, job.id)).status == "queued"
+
+        async with factory() as db:
+            await db.execute(update(AnalysisJob).values(status="running", started_at=stale, attempts=2))
+            await db.commit()
+            await queue._requeue_stale(db)
+        assert (await read_job(factory, job.id)).status == "failed"
+    finally:
+        settings.JOB_MAX_ATTEMPTS = original
+    await engine.dispose()
+
+def test_stale_jobs_are_requeued():
+    print("\nTesting stale job recovery...")
+    asyncio.run(_stale_jobs_are_requeued())
+    print("✅ Stale job recovery: PASS")
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+async def _job_events_stream():
+    engine, factory, queue, user_id, vacancy_id, candidate_id = await make_queue()
+
+    async def slow_analysis(*args, **kwargs):
+        await asyncio.sleep(0.7)
+        return RESULT
+
+    original = (analysis.run_analysis, jobs.AsyncSessionLocal)
+    analysis.run_analysis = slow_analysis
+    jobs.AsyncSessionLocal = factory
+    try:
+        job = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+        async with factory() as db:
+            response = await jobs.stream_job_events(
+                job.id, ConnectedRequest(), db=db, current_user=User(id=user_id)
+            )
+        worker = asyncio.create_task(process_one(queue, factory))
+        events = [chunk async for chunk in response.body_iterator]
+        await worker
+    finally:
+        analysis.run_analysis, jobs.AsyncSessionLocal = original
+
+    assert response.media_type == "text/event-stream"
+    assert all(event.startswith("event: progress\ndata: ") for event in events)
+    statuses = [json.loads(event.split("data: ", 1)[1])["status"] for event in events]
+    # Each state change is sent once, and the stream ends with the job
+    assert statuses[-1] == "done" and "running" in statuses
+    assert len(statuses) == len(set(statuses))
+    await engine.dispose()
+
+def test_job_events_stream():
+    print("\nTesting job progress events...")
+    asyncio.run(_job_events_stream())
+    print("✅ Job progress events: PASS")
+
+async def _job_deleted_mid_stream():
+    engine, factory, queue, user_id, vacancy_id, candidate_id = await make_queue()
+    original = jobs.AsyncSessionLocal
+    jobs.AsyncSessionLocal = factory
+    try:
+        job = await enqueue(queue, factory, user_id, vacancy_id, candidate_id)
+        async with factory() as db:
+            response = await jobs.stream_job_events(
+                job.id, ConnectedRequest(), db=db, current_user=User(id=user_id)
+            )
+        events = response.body_iterator
+        first = await events.__anext__()
+        async with factory() as db:
+            await db.delete(await db.get(AnalysisJob, job.id))
+            await db.commit()
+        rest = [chunk async for chunk in events]
+    finally:
+        jobs.AsyncSessionLocal = original
+
+    assert first.startswith("event: progress\n")
+    # The stream ends with an error event instead of raising after the 200
+    assert rest == ['event: error\ndata: {"detail": "Job not found"}\n\n']
+    await engine.dispose()
+
+def test_job_deleted_mid_stream():
+    print("\nTesting job deleted during event stream...")
+    asyncio.run(_job_deleted_mid_stream())
+    print("✅ Job deleted during event stream: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Analysis Job Queue Tests\n")
+    try:
+        test_enqueue_is_idempotent()
+        test_claim_retry_and_max_attempts()
+        test_stale_jobs_are_requeued()
+        test_job_events_stream()
+        test_job_deleted_mid_stream()
+        print("\n🎉 All job queue tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
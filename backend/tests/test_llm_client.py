@@ -0,0 +1,148 @@
+import sys
+import os
+import json
+import time
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+
+from app.services import gigachat
+from app.services.gigachat import GigaChatService
+from app.services.llm_client import LLMGateway
+from app.services.rate_limit import AsyncTokenBucket, per_minute_bucket
+
+def completion(request):
+    if json.loads(request.content).get("stream"):
+        body = (
+            'data: {"choices": [{"delta": {"content": "При"}}]}\n\n'
+            ': OPENROUTER PROCESSING\n\n'
+            'data: {"choices": [{"delta": {"content": "вет"}}]}\n\n'
+            'data: [DONE]\n\n'
+        )
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+    return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+def make_gateway(handler=completion) -> LLMGateway:
+    gateway = LLMGateway()
+    gateway._build_client = lambda provider: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return gateway
+
+def test_clients_pooled_per_loop():
+    print("Testing pooled clients per event loop...")
+    gateway = make_gateway()
+
+    async def clients():
+        first = gateway.client("openrouter")
+        assert gateway.client("openrouter") is first
+        assert gateway.client("gigachat") is not first
+        assert await gateway.openrouter_chat([{"role": "user", "content": "hi"}], model="m") == "ok"
+        return first, gateway.client("gigachat")
+
+    first_run = asyncio.run(clients())
+    # asyncio.run() closed the clients of its loop before closing the loop
+    assert all(client.is_closed for client in first_run)
+    assert gateway._clients == {} and gateway._loop_guards == {}
+
+    second_run = asyncio.run(clients())
+    assert second_run[0] is not first_run[0] and second_run[0].is_closed
+
+    async def closed_in_lifespan():
+        client = gateway.client("openrouter")
+        await gateway.aclose()
+        assert client.is_closed
+        # A later call on the same loop opens a new pool
+        assert gateway.client("openrouter") is not client
+    asyncio.run(closed_in_lifespan())
+    assert gateway._clients == {}
+    print("✅ Pooled clients per event loop: PASS")
+
+def test_rate_limit():
+    print("\nTesting provider rate limit...")
+    assert per_minute_bucket(0) is None
+    gateway = make_gateway()
+
+    async def burst():
+        gateway._limiters[asyncio.get_running_loop()] = {"openrouter": AsyncTokenBucket(rate=20, capacity=1)}
+        started = time.perf_counter()
+        replies = await asyncio.gather(*(
+            gateway.openrouter_chat([{"role": "user", "content": "hi"}], model="m") for _ in range(5)
+        ))
+        return replies, time.perf_counter() - started
+
+    replies, elapsed = asyncio.run(burst())
+    assert replies == ["ok"] * 5
+    # One call at once, then one every 50 ms
+    assert elapsed >= 0.18, elapsed
+    assert gateway._limiters == {}
+    print("✅ Provider rate limit: PASS")
+
+def test_limits_usable_from_several_loops():
+    print("\nTesting rate limit locks across event loops...")
+    bucket = AsyncTokenBucket(rate=1000, capacity=1)
+
+    async def contend():
+        # Waiters queue on the lock, which binds it to the running loop
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+
+    asyncio.run(contend())
+    asyncio.run(contend())
+    print("✅ Rate limit locks across event loops: PASS")
+
+def test_gigachat_token_refreshed_once():
+    print("\nTesting GigaChat token refresh under concurrency...")
+    service = GigaChatService()
+    oauth_calls = []
+
+    async def fake_post(provider, url, **kwargs):
+        oauth_calls.append(url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={
+            "access_token": f"token-{len(oauth_calls)}",
+            "expires_at": int((time.time() + 1800) * 1000),
+        })
+
+    async def concurrent(rejected=None):
+        return await asyncio.gather(*(service.get_access_token(rejected=rejected) for _ in range(5)))
+
+    original_post = gigachat.llm_gateway.post
+    gigachat.llm_gateway.post = fake_post
+    try:
+        assert asyncio.run(concurrent()) == ["token-1"] * 5
+        assert len(oauth_calls) == 1
+        # Every caller saw token-1 rejected: still a single refresh
+        assert asyncio.run(concurrent(rejected="token-1")) == ["token-2"] * 5
+        assert len(oauth_calls) == 2
+
+        # A token close to expiry is refreshed before use
+        service.token_expires_at = time.time() + 10
+        assert asyncio.run(concurrent()) == ["token-3"] * 5
+        assert len(oauth_calls) == 3
+    finally:
+        gigachat.llm_gateway.post = original_post
+    print("✅ GigaChat token refresh under concurrency: PASS")
+
+def test_stream_chat_deltas():
+    print("\nTesting streamed chat deltas...")
+    gateway = make_gateway()
+
+    async def collect():
+        return [delta async for delta in gateway.openrouter_stream([{"role": "user", "content": "hi"}], model="m")]
+
+    assert asyncio.run(collect()) == ["При", "вет"]
+    print("✅ Streamed chat deltas: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running LLM Gateway Tests\n")
+    try:
+        test_clients_pooled_per_loop()
+        test_rate_limit()
+        test_limits_usable_from_several_loops()
+        test_gigachat_token_refreshed_once()
+        test_stream_chat_deltas()
+        print("\n🎉 All LLM gateway tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
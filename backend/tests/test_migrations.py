@@ -0,0 +1,108 @@
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+import sqlalchemy as sa
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+
+from app.db.base import Base
+from app.db.init_db import alembic_config, init_db
+from app.services import analytics_rollup
+from db_utils import make_test_engine
+
+def test_migrations_match_models():
+    print("Testing migrations against the models...")
+    engine = make_test_engine(create_schema=False)
+    with engine.begin() as connection:
+        init_db(connection)
+    with engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diff == [], diff
+    print("✅ Migrations match models: PASS")
+
+def test_baseline_upgrades_legacy_schema():
+    print("\nTesting baseline on a legacy database...")
+    engine = make_test_engine(create_schema=False)
+    with engine.begin() as connection:
+        # Schema as created by the old create_all, before resume blobs and HH sync state
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL, hashed_password VARCHAR NOT NULL)"))
+        connection.execute(text("CREATE TABLE vacancy (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description TEXT NOT NULL, owner_id INTEGER)"))
+        connection.execute(text("CREATE TABLE candidates (id INTEGER PRIMARY KEY, vacancy_id INTEGER, filename VARCHAR, content TEXT, score FLOAT)"))
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@b.com', 'x')"))
+        connection.execute(text("INSERT INTO vacancy (id, title, description, owner_id) VALUES (1, 'Py', 'Python', 1)"))
+        connection.execute(text("INSERT INTO candidates (id, vacancy_id, filename, score) VALUES (1, 1, 'a.txt', 0.5)"))
+        init_db(connection)
+
+    inspector = inspect(engine)
+    assert "resume_blob" in inspector.get_table_names()
+    assert "hh_access_token" in {c["name"] for c in inspector.get_columns("users")}
+    assert "created_at" in {c["name"] for c in inspector.get_columns("vacancy")}
+    assert "ix_candidates_vacancy_id_score_id" in {i["name"] for i in inspector.get_indexes("candidates")}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT title FROM vacancy")).scalar() == "Py"
+        # The analytics rollup is filled from existing rows
+        rollup = dict(connection.execute(text("SELECT metric, value FROM owner_stats WHERE key = '' AND metric NOT IN ('status', 'version')")).all())
+        assert rollup == {"vacancies": 1, "candidates": 1, "score_sum": 0.5, "score_count": 1}
+        # ... and existing candidates start their status history
+        history = connection.execute(text("SELECT candidate_id, from_status, to_status FROM candidate_status_history")).all()
+        assert [tuple(row) for row in history] == [(1, None, "NEW")]
+    print("✅ Legacy upgrade: PASS")
+
+def stats(connection):
+    vacancy_rows = connection.execute(text("SELECT vacancy_id, owner_id, metric, key, value FROM vacancy_stats")).all()
+    owner_rows = connection.execute(text("SELECT owner_id, metric, key, value FROM owner_stats WHERE metric <> 'version'")).all()
+    return sorted(tuple(row) for row in vacancy_rows), sorted(tuple(row) for row in owner_rows)
+
+def test_rollup_backfill_matches_rebuild():
+    print("\nTesting analytics rollup backfill...")
+    engine = make_test_engine(create_schema=False)
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), "0002")
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@b.com', 'x'), (2, 'c@d.com', 'x')"))
+        connection.execute(text(
+            "INSERT INTO vacancy (id, title, description, owner_id, created_at) VALUES "
+            "(1, 'Py', 'Python', 1, :now), (2, 'Go', 'Go', 1, :now), (3, 'Ops', 'Ops', 2, :now), (4, 'Orphan', 'None', NULL, :now)"
+        ), {"now": datetime.utcnow()})
+        candidates = sa.table(
+            "candidates", sa.column("vacancy_id", sa.Integer), sa.column("filename", sa.String),
+            sa.column("status", sa.String), sa.column("score", sa.Float), sa.column("hh_resume_id", sa.String),
+            sa.column("skills_match", sa.JSON().with_variant(postgresql.JSONB(), "postgresql")),
+        )
+        connection.execute(candidates.insert(), [
+            {"vacancy_id": 1, "filename": "a", "status": "NEW", "score": 0.5, "hh_resume_id": None,
+             "skills_match": ["Python", " SQL ", "Python", ""]},
+            {"vacancy_id": 1, "filename": "b", "status": None, "score": None, "hh_resume_id": "r1",
+             "skills_match": None},
+            {"vacancy_id": 2, "filename": "c", "status": "SHORTLIST", "score": 0.0, "hh_resume_id": None,
+             "skills_match": ["Go"]},
+            {"vacancy_id": 3, "filename": "d", "status": "NEW", "score": 0.9, "hh_resume_id": None,
+             "skills_match": ["x" * 300]},
+            {"vacancy_id": 4, "filename": "e", "status": "NEW", "score": 0.1, "hh_resume_id": None,
+             "skills_match": []},
+        ])
+        command.upgrade(alembic_config(connection), "0003")
+        backfilled = stats(connection)
+        versions = connection.execute(text("SELECT owner_id, value FROM owner_stats WHERE metric = 'version'")).all()
+
+        analytics_rollup.rebuild(connection)
+        assert backfilled == stats(connection), backfilled
+        assert sorted(tuple(row) for row in versions) == [(1, 1.0), (2, 1.0)]
+    print("✅ Rollup backfill: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Migration Tests\n")
+    try:
+        test_migrations_match_models()
+        test_baseline_upgrades_legacy_schema()
+        test_rollup_backfill_matches_rebuild()
+        print("\n🎉 All migration tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
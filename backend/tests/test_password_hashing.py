@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.auth import login_access_token
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.models.user import User
+from db_utils import make_test_async_engine
+
+async def login(db, password):
+    return await login_access_token(db=db, form_data=SimpleNamespace(username="hr@example.com", password=password))
+
+async def _rehash_on_login():
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    original = settings.BCRYPT_ROUNDS
+    settings.BCRYPT_ROUNDS = 4
+    try:
+        async with factory() as db:
+            user = User(email="hr@example.com", hashed_password=await password_hasher.hash("secret"))
+            db.add(user)
+            await db.commit()
+        assert user.hashed_password.startswith("$2b$04$")
+
+        # Same cost: the stored hash is kept
+        async with factory() as db:
+            assert (await login(db, "secret"))["access_token"]
+            assert (await db.get(User, user.id)).hashed_password == user.hashed_password
+
+        # Raised cost: a wrong password changes nothing, the right one upgrades the hash
+        settings.BCRYPT_ROUNDS = 5
+        async with factory() as db:
+            try:
+                await login(db, "wrong")
+                assert False, "wrong password accepted"
+            except HTTPException as e:
+                assert e.status_code == 400
+            assert (await db.get(User, user.id)).hashed_password == user.hashed_password
+        async with factory() as db:
+            assert (await login(db, "secret"))["access_token"]
+        async with factory() as db:
+            upgraded = (await db.get(User, user.id)).hashed_password
+            assert upgraded.startswith("$2b$05$")
+            assert (await login(db, "secret"))["access_token"]
+    finally:
+        settings.BCRYPT_ROUNDS = original
+    await engine.dispose()
+
+def test_rehash_on_login():
+    print("Testing bcrypt rehash on login...")
+    asyncio.run(_rehash_on_login())
+    print("✅ bcrypt rehash on login: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Password Hashing Tests\n")
+    try:
+        test_rehash_on_login()
+        print("\n🎉 All password hashing tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,222 @@
+import sys
+import os
+import json
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.services import openrouter, prompt_builder
+from app.services.analysis_cache import AnalysisCache
+from app.services.llm_client import llm_gateway
+from app.services.prompt_builder import compress_resume, estimate_tokens, fit_analysis_inputs, prompt_metrics
+from db_utils import make_test_engine
+
+EXPERIENCE = "\n".join(f"Поддерживал сервис {i} на FastAPI, писал тесты на pytest." for i in range(300))
+
+RESUME = f"""Иванов Иван
+Python-разработчик
+Страница 1 из 3
+
+О себе
+Люблю   писать    код.
+
+КЛЮЧЕВЫЕ НАВЫКИ
+Python, FastAPI, PostgreSQL, Docker
+
+Опыт работы — 6 лет 2 месяца
+{EXPERIENCE}
+Иванов Иван
+Страница 2 из 3
+
+Образование
+МГУ, 2015
+
+Хобби
+Шахматы, бег, путешествия по горам и долинам.
+Рекомендации предоставляются по запросу
+Резюме обновлено 12 мая 2024 в 10:00
+"""
+
+def test_token_estimate_per_model():
+    print("Testing token estimate...")
+    assert estimate_tokens("") == 0
+    russian = "Опыт разработки высоконагруженных сервисов"
+    # Tokenizers trained on Russian need fewer tokens for it
+    assert estimate_tokens(russian, "openai/gpt-4") > estimate_tokens(russian, "GigaChat")
+    assert estimate_tokens("Python developer", "openai/gpt-4") == estimate_tokens("Python developer", "GigaChat")
+    print("✅ Token estimate: PASS")
+
+def test_resume_compression():
+    print("\nTesting section-aware resume compression...")
+    # No limit: only whitespace is collapsed
+    whole = compress_resume(RESUME, 0)
+    assert "Страница 2 из 3" in whole and whole.count("Иванов Иван") == 2
+    assert "Люблю писать код." in whole
+
+    # Within budget: boilerplate and the repeated page header go, nothing else
+    cleaned = compress_resume(RESUME, 100000)
+    assert "Страница" not in cleaned and "Резюме обновлено" not in cleaned
+    assert "по запросу" not in cleaned
+    assert cleaned.count("Иванов Иван") == 1
+    assert "Люблю писать код." in cleaned
+    assert cleaned.count("Поддерживал сервис") == 300
+
+    # Over budget: skills, short sections and the start of the experience stay
+    compressed = compress_resume(RESUME, 400)
+    assert estimate_tokens(compressed) <= 400
+    assert "Python, FastAPI, PostgreSQL, Docker" in compressed
+    assert "Поддерживал сервис 0 " in compressed and "Поддерживал сервис 299 " not in compressed
+    assert "МГУ, 2015" in compressed and prompt_builder.TRUNCATION_MARK in compressed
+    # Sections keep their original order
+    assert compressed.index("КЛЮЧЕВЫЕ НАВЫКИ") < compressed.index("Опыт работы") < compressed.index("Образование")
+
+    # Very tight: hobbies give way before experience
+    tight = compress_resume(RESUME, 90)
+    assert estimate_tokens(tight) <= 90
+    assert "Шахматы" not in tight and "Поддерживал сервис 0" in tight
+    print("✅ Resume compression: PASS")
+
+def test_repeated_lines():
+    print("\nTesting repeated resume lines...")
+    resume = (
+        "Петров Пётр\nBackend-разработчик\n\nОпыт работы\n"
+        "ООО Ромашка\n- Писал тесты на pytest\n- Писал тесты на pytest\n- Настроил CI\nСтек: Django\n\f"
+        "Петров Пётр\nBackend-разработчик\nООО Лютик\n- Писал тесты на pytest\n- Вёл код-ревью\nСтек: Go\n"
+    )
+    cleaned = compress_resume(resume, 100000)
+    # The same bullet under another job stays; its copy on the next line and
+    # the running header after the page break go
+    assert cleaned.count("- Писал тесты на pytest") == 2
+    assert cleaned.count("Петров Пётр") == 1 and cleaned.count("Backend-разработчик") == 1
+    assert "ООО Лютик" in cleaned and "- Вёл код-ревью" in cleaned
+
+    # A budget of 0 sends both texts whole
+    vacancy = "Ищем Python-разработчика. " * 1000
+    fitted_vacancy, fitted_resume = fit_analysis_inputs(vacancy, resume, budget=0)
+    assert fitted_vacancy == vacancy.strip()
+    assert fitted_resume.count("- Писал тесты на pytest") == 3
+    print("✅ Repeated resume lines: PASS")
+
+async def _analysis_prompt_within_budget():
+    sent = []
+
+    async def fake_chat(messages, **kwargs):
+        sent.append(messages)
+        return json.dumps({
+            "score": 0.8, "skills_match": ["Python"], "missing_skills": [], "summary": "ok",
+            "recommendation": "Interview", "screening_questions": ["?"],
+        })
+
+    original = (llm_gateway.openrouter_chat, settings.USE_GIGACHAT, settings.PROMPT_ANALYSIS_TOKEN_BUDGET)
+    llm_gateway.openrouter_chat = fake_chat
+    settings.USE_GIGACHAT = False
+    settings.PROMPT_ANALYSIS_TOKEN_BUDGET = 2000
+    prompt_metrics.clear()
+    try:
+        vacancy = "Ищем Python-разработчика. " * 1000
+        result, cacheable, _ = await openrouter._analyze_resume_uncached(vacancy, RESUME, None, "openai/gpt-4", 0.2)
+        assert cacheable and result.score == 0.8
+    finally:
+        llm_gateway.openrouter_chat, settings.USE_GIGACHAT, settings.PROMPT_ANALYSIS_TOKEN_BUDGET = original
+
+    system, user = sent[0]
+    assert estimate_tokens(system["content"] + user["content"], "openai/gpt-4") <= 2000 + 10
+    assert "Python, FastAPI, PostgreSQL, Docker" in user["content"]
+    stats = prompt_metrics.stats()["analysis"]
+    assert stats["calls"] == 1 and stats["trimmed_calls"] == 1
+    assert stats["tokens_saved"] == stats["original_tokens"] - stats["sent_tokens"] > 0
+
+def test_analysis_prompt_within_budget():
+    print("\nTesting analysis prompt budget...")
+    asyncio.run(_analysis_prompt_within_budget())
+    print("✅ Analysis prompt budget: PASS")
+
+async def _cache_key_follows_budget():
+    calls = []
+
+    async def fake_chat(messages, **kwargs):
+        calls.append(messages)
+        return json.dumps({
+            "score": 0.8, "skills_match": ["Python"], "missing_skills": [], "summary": "ok",
+            "recommendation": "Interview", "screening_questions": ["?"],
+        })
+
+    original = (llm_gateway.openrouter_chat, openrouter.analysis_cache, settings.USE_GIGACHAT,
+                settings.ANALYSIS_CACHE_ENABLED, settings.PROMPT_ANALYSIS_TOKEN_BUDGET)
+    llm_gateway.openrouter_chat = fake_chat
+    openrouter.analysis_cache = AnalysisCache(session_factory=sessionmaker(bind=make_test_engine()))
+    settings.USE_GIGACHAT = False
+    settings.ANALYSIS_CACHE_ENABLED = True
+    try:
+        for budget in (2000, 2000, 1000):
+            settings.PROMPT_ANALYSIS_TOKEN_BUDGET = budget
+            await openrouter.analyze_resume_checked("Python developer", RESUME, None, "openai/gpt-4", 0.2)
+    finally:
+        (llm_gateway.openrouter_chat, openrouter.analysis_cache, settings.USE_GIGACHAT,
+         settings.ANALYSIS_CACHE_ENABLED, settings.PROMPT_ANALYSIS_TOKEN_BUDGET) = original
+
+    # Same budget: served from the cache; a new budget trims differently
+    assert len(calls) == 2
+
+def test_cache_key_follows_budget():
+    print("\nTesting analysis cache key and prompt budget...")
+    asyncio.run(_cache_key_follows_budget())
+    print("✅ Cache key follows the budget: PASS")
+
+async def _gigachat_fallback_not_cached_as_gigachat():
+    from app.services.gigachat import gigachat_service
+    gigachat_calls, openrouter_models = [], []
+
+    async def failing_gigachat(*args, **kwargs):
+        gigachat_calls.append(1)
+        raise RuntimeError("GigaChat unavailable")
+
+    async def fake_chat(messages, model=None, **kwargs):
+        openrouter_models.append(model)
+        return json.dumps({
+            "score": 0.8, "skills_match": ["Python"], "missing_skills": [], "summary": "ok",
+            "recommendation": "Interview", "screening_questions": ["?"],
+        })
+
+    original = (gigachat_service.analyze_candidate, llm_gateway.openrouter_chat, openrouter.analysis_cache,
+                settings.ANALYSIS_CACHE_ENABLED, settings.USE_GIGACHAT)
+    gigachat_service.analyze_candidate = failing_gigachat
+    settings.USE_GIGACHAT = False
+    llm_gateway.openrouter_chat = fake_chat
+    openrouter.analysis_cache = AnalysisCache(session_factory=sessionmaker(bind=make_test_engine()))
+    settings.ANALYSIS_CACHE_ENABLED = True
+    try:
+        for _ in range(2):
+            await openrouter.analyze_resume_checked("Python developer", RESUME, None, "GigaChat", 0.2)
+        fallback = openrouter_models[0]
+        # The fallback's answer is cached as that model's result
+        await openrouter.analyze_resume_checked("Python developer", RESUME, None, fallback, 0.2)
+    finally:
+        (gigachat_service.analyze_candidate, llm_gateway.openrouter_chat, openrouter.analysis_cache,
+         settings.ANALYSIS_CACHE_ENABLED, settings.USE_GIGACHAT) = original
+
+    # GigaChat is asked again rather than served the fallback's answer
+    assert len(gigachat_calls) == 2 and len(openrouter_models) == 2
+
+def test_gigachat_fallback_not_cached_as_gigachat():
+    print("\nTesting cached GigaChat fallbacks...")
+    asyncio.run(_gigachat_fallback_not_cached_as_gigachat())
+    print("✅ GigaChat fallback cache key: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Prompt Builder Tests\n")
+    try:
+        test_token_estimate_per_model()
+        test_resume_compression()
+        test_repeated_lines()
+        test_analysis_prompt_within_budget()
+        test_cache_key_follows_budget()
+        test_gigachat_fallback_not_cached_as_gigachat()
+        print("\n🎉 All prompt builder tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
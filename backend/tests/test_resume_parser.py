@@ -0,0 +1,98 @@
+import sys
+import os
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from bench_resume_parsing import make_pdf
+
+from app.core.config import settings
+from app.services.resume_parser import ResumeParseError, ResumeParserPool, parse_resume
+
+def test_pdf_page_guard():
+    print("Testing PDF page guard...")
+    text = parse_resume("cv.pdf", make_pdf(5), max_pages=2)
+    assert "Page 2 line 0" in text
+    assert "Page 3 line 0" not in text
+    assert "Truncated" in text
+    print("✅ Page guard: PASS")
+
+async def parse_in_pool(pool, *files):
+    try:
+        return await asyncio.gather(*(pool.parse(name, data) for name, data in files))
+    finally:
+        pool.shutdown()
+
+def test_pool_parses_off_loop():
+    print("\nTesting process pool parsing...")
+    pool = ResumeParserPool()
+    pdf_text, txt_text = asyncio.run(parse_in_pool(
+        pool, ("cv.pdf", make_pdf(2)), ("cv.txt", "Опыт Python".encode("utf-8"))
+    ))
+    assert "Page 2 line 0" in pdf_text
+    assert txt_text == "Опыт Python"
+    print("✅ Pool parsing: PASS")
+
+async def _recycle_retries_other_files(pool):
+    async def recycled_for_another_timeout():
+        # What a timeout on some other user's file does to the pool
+        await asyncio.sleep(0.3)
+        pool._recycle()
+
+    try:
+        texts = await asyncio.gather(
+            pool.parse("a.pdf", make_pdf(20)), pool.parse("b.pdf", make_pdf(2)), recycled_for_another_timeout()
+        )
+    finally:
+        pool.shutdown()
+    return texts[:2]
+
+def test_recycle_retries_other_files():
+    print("\nTesting pool recycle isolation...")
+    original = settings.RESUME_PARSE_WORKERS
+    settings.RESUME_PARSE_WORKERS = 2
+    try:
+        first, second = asyncio.run(_recycle_retries_other_files(ResumeParserPool()))
+    finally:
+        settings.RESUME_PARSE_WORKERS = original
+    # Files in flight during the recycle are parsed again on the new pool
+    assert "Page 20 line 0" in first
+    assert "Page 2 line 0" in second
+    print("✅ Pool recycle isolation: PASS")
+
+def test_size_guard():
+    print("\nTesting size guard...")
+    original = settings.RESUME_MAX_BYTES
+    settings.RESUME_MAX_BYTES = 10
+    try:
+        asyncio.run(ResumeParserPool().parse("cv.txt", b"x" * 11))
+        assert False, "oversized file was parsed"
+    except ResumeParseError:
+        pass
+    finally:
+        settings.RESUME_MAX_BYTES = original
+    print("✅ Size guard: PASS")
+
+def test_unreadable_file_is_an_error():
+    print("\nTesting unreadable files...")
+    try:
+        asyncio.run(parse_in_pool(ResumeParserPool(), ("cv.pdf", b"not a pdf")))
+        assert False, "placeholder text was returned"
+    except ResumeParseError as e:
+        assert str(e).startswith("PDF parsing error")
+    print("✅ Unreadable files: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running Resume Parser Tests\n")
+    try:
+        test_pdf_page_guard()
+        test_pool_parses_off_loop()
+        test_recycle_retries_other_files()
+        test_size_guard()
+        test_unreadable_file_is_an_error()
+        print("\n🎉 All resume parser tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,47 @@
+import sys
+import os
+import tempfile
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db.session import configure_sqlite, sqlite_pragmas
+
+def test_pragmas_applied_on_connect():
+    print("Testing SQLite connection profile...")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = configure_sqlite(create_engine(f"sqlite:///{os.path.join(tmp, 'profile.db')}"))
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar().upper() == "WAL"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1 # NORMAL
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+            assert connection.execute(text("PRAGMA cache_size")).scalar() == settings.SQLITE_CACHE_SIZE
+            assert connection.execute(text("PRAGMA temp_store")).scalar() == 2 # MEMORY
+        engine.dispose()
+    print("✅ SQLite profile: PASS")
+
+def test_invalid_profile_rejected():
+    print("\nTesting SQLite profile validation...")
+    original = settings.SQLITE_JOURNAL_MODE
+    settings.SQLITE_JOURNAL_MODE = "WAL; DROP TABLE users"
+    try:
+        sqlite_pragmas()
+        assert False, "invalid journal mode accepted"
+    except ValueError:
+        pass
+    finally:
+        settings.SQLITE_JOURNAL_MODE = original
+    print("✅ SQLite profile validation: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running SQLite Profile Tests\n")
+    try:
+        test_pragmas_applied_on_connect()
+        test_invalid_profile_rejected()
+        print("\n🎉 All SQLite profile tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
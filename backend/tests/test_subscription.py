@@ -1,5 +1,7 @@
 import sys
 import os
+import asyncio
+import tempfile
 from datetime import datetime, timedelta
 
 # Add parent directory to sys.path
@@ -10,6 +12,10 @@ from app.models.user import User
 from app.models.ai_settings import AISettings
 from app.services.subscription import subscription_service
 from app.core.config import settings
+from app.db.base import Base
+from app.db.session import configure_sqlite
+from db_utils import TEST_DATABASE_URL, make_test_async_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 def test_trial_period():
     print("Testing Trial Period...")
@@ -89,11 +95,67 @@ def test_resume_limits():
     assert status["can_upload"] == True
     print("✅ PRO unlimited: PASS")
 
+async def concurrent_engine(tmp):
+    # In-memory SQLite shares one connection; use a file so every session has its own
+    if TEST_DATABASE_URL:
+        return await make_test_async_engine()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'quota.db')}")
+    configure_sqlite(engine.sync_engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return engine
+
+async def _concurrent_reservations(tmp):
+    engine = await concurrent_engine(tmp)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        user = User(email="hr@example.com", hashed_password="x", trial_start_date=datetime.utcnow(),
+                    subscription_tier="START", resumes_used_current_period=90)
+        db.add(user)
+        await db.commit()
+
+    async def upload(count):
+        async with factory() as db:
+            current = await db.get(User, user.id)
+            granted = await subscription_service.reserve_resumes(db, current, count)
+            await asyncio.sleep(0.01)
+            await db.commit()
+            return granted
+
+    # 20 uploads of 3 resumes race for the last 10 slots
+    grants = await asyncio.gather(*(upload(3) for _ in range(20)))
+    assert sum(grants) == 10, grants
+    assert all(0 <= g <= 3 for g in grants)
+    async with factory() as db:
+        current = await db.get(User, user.id)
+        assert current.resumes_used_current_period == 100
+
+        # A rolled back reservation gives its slots back
+        current.resumes_used_current_period = 98
+        await db.commit()
+        assert await subscription_service.reserve_resumes(db, current, 5) == 2
+        assert current.resumes_used_current_period == 100
+        await db.rollback()
+        assert (await db.get(User, user.id, populate_existing=True)).resumes_used_current_period == 98
+
+        # A user deleted meanwhile gets no slots
+        await db.delete(current)
+        await db.commit()
+        assert await subscription_service.reserve_resumes(db, current, 5) == 0
+    await engine.dispose()
+
+def test_concurrent_reservations():
+    print("\nTesting concurrent quota reservations...")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_concurrent_reservations(tmp))
+    print("✅ No quota overshoot: PASS")
+
 if __name__ == "__main__":
     print("🚀 Running Subscription Tests\n")
     try:
         test_trial_period()
         test_resume_limits()
+        test_concurrent_reservations()
         print("\n🎉 All subscription tests passed!")
     except AssertionError as e:
         print(f"\n❌ Test failed: {e}")
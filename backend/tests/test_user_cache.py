@@ -0,0 +1,116 @@
+import sys
+import os
+import asyncio
+
+# Add parent directory to sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api import deps
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.ai_settings import AISettings
+from app.models.user import User
+from app.services.user_cache import user_cache
+from db_utils import make_test_async_engine
+
+async def _cached_user_resolution():
+    user_cache.clear()
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        user = User(email="hr@example.com", hashed_password="x", resumes_used_current_period=3)
+        db.add(user)
+        await db.commit()
+        db.add(AISettings(user_id=user.id, model_name="model-a", temperature=0.2))
+        await db.commit()
+    token = create_access_token(user.email)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    # First request: one joined query for the user and their AI settings
+    async with factory() as db:
+        await deps.get_current_user(db=db, token=token)
+    assert len(statements) == 1, statements
+
+    # Following requests: no query for the user or the AI settings
+    statements.clear()
+    async with factory() as db:
+        current = await deps.get_current_user(db=db, token=token)
+        ai_config = await deps.get_ai_config(db, current.id)
+        assert statements == []
+        assert current.email == "hr@example.com" and current in db
+        assert ai_config["model"] == "model-a" and ai_config["temperature"] == 0.2
+
+        # The cached user is attached to the session and can be written
+        current.full_name = "HR"
+        await db.commit()
+    async with factory() as db:
+        assert (await db.get(User, user.id)).full_name == "HR"
+        # ... and the write dropped the cache entry
+        statements.clear()
+        assert (await deps.get_current_user(db=db, token=token)).full_name == "HR"
+        assert len(statements) == 1
+
+    # Updating the AI settings drops it too
+    async with factory() as db:
+        ai_settings = await db.scalar(select(AISettings).where(AISettings.user_id == user.id))
+        ai_settings.model_name = "model-b"
+        await db.commit()
+    async with factory() as db:
+        current = await deps.get_current_user(db=db, token=token)
+        assert (await deps.get_ai_config(db, current.id))["model"] == "model-b"
+
+    # Quota checks re-read counters another process may have changed
+    async with factory() as db:
+        await db.execute(update(User).where(User.id == user.id).values(resumes_used_current_period=10))
+        await db.commit()
+    async with factory() as db:
+        current = await deps.get_current_user(db=db, token=token)
+        assert current.resumes_used_current_period == 3
+        await deps.refresh_quota(db, current)
+        assert current.resumes_used_current_period == 10
+    await engine.dispose()
+
+def test_cached_user_resolution():
+    print("Testing cached user resolution...")
+    asyncio.run(_cached_user_resolution())
+    print("✅ Cached user resolution: PASS")
+
+async def _cache_is_bounded():
+    user_cache.clear()
+    engine = await make_test_async_engine()
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    original = settings.AUTH_USER_CACHE_MAX_ENTRIES
+    settings.AUTH_USER_CACHE_MAX_ENTRIES = 2
+    try:
+        async with factory() as db:
+            db.add_all([User(email=f"user{i}@example.com", hashed_password="x") for i in range(3)])
+            await db.commit()
+            for i in (0, 1, 0, 2):
+                await deps.get_current_user(db=db, token=create_access_token(f"user{i}@example.com"))
+        # user1 was the least recently used
+        assert user_cache.get("user1@example.com") is None
+        assert user_cache.get("user0@example.com") is not None
+        assert user_cache.get("user2@example.com") is not None
+    finally:
+        settings.AUTH_USER_CACHE_MAX_ENTRIES = original
+    await engine.dispose()
+
+def test_cache_is_bounded():
+    print("\nTesting user cache size bound...")
+    asyncio.run(_cache_is_bounded())
+    print("✅ User cache size bound: PASS")
+
+if __name__ == "__main__":
+    print("🚀 Running User Cache Tests\n")
+    try:
+        test_cached_user_resolution()
+        test_cache_is_bounded()
+        print("\n🎉 All user cache tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
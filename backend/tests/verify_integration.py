@@ -4,6 +4,7 @@ Quick verification script to test OpenRouter API and DeepSeek model integration.
 
 import sys
 import os
+import asyncio
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from app.services.openrouter import analyze_resume
@@ -55,10 +56,10 @@ def test_openrouter_api():
         print(f"Model: {settings.AI_MODEL_NAME}")
         print(f"API Key configured: {'Yes' if settings.OPENROUTER_API_KEY else 'No'}")
         
-        result = analyze_resume(
+        result = asyncio.run(analyze_resume(
             vacancy_description=vacancy_desc,
             resume_text=resume_text
-        )
+        ))
         
         print(f"\n✅ Analysis successful!")
         print(f"\n📈 Score: {result.score * 100:.0f}%")
@@ -20,7 +20,9 @@ async function loadAnalytics() {
 
         // New Metrics
         if (data.metrics) {
-            document.getElementById('time-to-hire').textContent = data.metrics.time_to_hire + ' days';
+            // null until the first candidate is approved
+            const timeToHire = data.metrics.time_to_hire;
+            document.getElementById('time-to-hire').textContent = timeToHire === null ? '—' : timeToHire + ' days';
         }
 
         // 2. Prepare Chart Data from Backend Response
@@ -128,17 +130,8 @@ function renderCharts({ statusData, funnelData }) {
     });
 }
 
-function exportData() {
-    // Basic CSV export
-    Api.get('/candidates/').then(data => {
-        const headers = ['ID', 'Name', 'Email', 'Status', 'AI Score'];
-        const rows = data.map(c => [c.id, c.full_name, c.email, c.status, c.ai_score].join(','));
-        const csvContent = "data:text/csv;charset=utf-8," + [headers.join(','), ...rows].join('\n');
-        const encodedUri = encodeURI(csvContent);
-        const link = document.createElement("a");
-        link.setAttribute("href", encodedUri);
-        link.setAttribute("download", "candidates_export.csv");
-        document.body.appendChild(link);
-        link.click();
-    });
+function exportData(format = 'csv') {
+    // Streamed by the backend: scores, skills and statuses of all candidates
+    Api.download(`/analytics/export?format=${format}`, `candidates_export.${format}`)
+        .catch(err => console.error('Export failed:', err));
 }
@@ -15,6 +15,19 @@ class Api {
         window.location.href = "login.html";
     }
 
+    // Expired session: log out (on protected pages) and fail the call
+    static handleUnauthorized() {
+        // Only logout if we're on a protected page AND token exists
+        const path = window.location.pathname;
+        const isProtectedPage = !path.includes("login.html") && !path.includes("register.html") && !path.includes("index.html") && path !== "/";
+
+        if (isProtectedPage && this.token) {
+            console.warn("Сессия истекла. Пожалуйста, войдите снова.");
+            this.logout();
+        }
+        throw new Error("Unauthorized");
+    }
+
     static async request(endpoint, method = "GET", body = null, isFile = false) {
         const headers = {};
         if (this.token) {
@@ -40,15 +53,7 @@ class Api {
             const response = await fetch(`${API_URL}${endpoint}`, fetchOptions);
 
             if (response.status === 401) {
-                // Only logout if we're on a protected page AND token exists
-                const path = window.location.pathname;
-                const isProtectedPage = !path.includes("login.html") && !path.includes("register.html") && !path.includes("index.html") && path !== "/";
-
-                if (isProtectedPage && this.token) {
-                    console.warn("Сессия истекла. Пожалуйста, войдите снова.");
-                    this.logout();
-                }
-                throw new Error("Unauthorized");
+                this.handleUnauthorized();
             }
 
             if (!response.ok) {
@@ -93,6 +98,71 @@ class Api {
     static upload(endpoint, formData) {
         return this.request(endpoint, "POST", formData, true);
     }
+
+    // GET a file attachment and hand it to the browser as a download
+    static async download(endpoint, filename) {
+        const headers = {};
+        if (this.token) {
+            headers["Authorization"] = `Bearer ${this.token}`;
+        }
+
+        const response = await fetch(`${API_URL}${endpoint}`, { headers });
+        if (!response.ok) {
+            throw new Error(response.statusText || "API Request Failed");
+        }
+
+        const url = URL.createObjectURL(await response.blob());
+        const link = document.createElement("a");
+        link.href = url;
+        link.download = filename;
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+        URL.revokeObjectURL(url);
+    }
+
+    // POST with a Server-Sent Events response; calls onEvent(event, data) per event
+    static async stream(endpoint, body, onEvent) {
+        const headers = { "Content-Type": "application/json" };
+        if (this.token) {
+            headers["Authorization"] = `Bearer ${this.token}`;
+        }
+
+        const response = await fetch(`${API_URL}${endpoint}`, {
+            method: "POST",
+            headers,
+            body: JSON.stringify(body),
+        });
+        if (response.status === 401) {
+            this.handleUnauthorized();
+        }
+        if (!response.ok || !response.body) {
+            throw new Error(response.statusText || "API Request Failed");
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const raw = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = "message";
+                let data = "";
+                raw.split("\n").forEach(line => {
+                    if (line.startsWith("event:")) event = line.slice(6).trim();
+                    else if (line.startsWith("data:")) data += line.slice(5).trim();
+                });
+                if (data) onEvent(event, JSON.parse(data));
+            }
+        }
+    }
 }
 
 
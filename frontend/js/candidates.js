@@ -92,7 +92,14 @@ async function runAnalysis() {
     if (btn) { btn.disabled = true; btn.textContent = 'Analyzing...'; }
 
     try {
-        const result = await Api.post(`/candidates/${candidateId}/analyze`);
+        // Analysis runs as a background job; poll until it finishes
+        let job = await Api.post(`/candidates/${candidateId}/analyze`);
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            job = await Api.get(`/jobs/${job.id}`);
+        }
+        if (job.status === 'failed') throw new Error(job.error || 'Analysis failed');
+
         if (window.UI) UI.notify('Анализ завершен!', 'success');
         location.reload();
     } catch (e) {
@@ -139,43 +146,27 @@ async function sendChatMessage() {
     input.value = '';
 
     try {
-        await Api.post('/chat/', {
+        // Stream the AI reply into a new message card as it is generated
+        let body = null;
+        await Api.stream('/chat/stream', {
             candidate_id: candidateId,
             role: 'user',
             content: content
-        });
-
-        // Show typing indicator
-        const chatContainer = document.getElementById('chat-messages');
-        const typingDiv = document.createElement('div');
-        typingDiv.id = 'typing-indicator';
-        typingDiv.style.padding = '0.5rem';
-        typingDiv.style.fontStyle = 'italic';
-        typingDiv.style.color = '#94A3B8';
-        typingDiv.textContent = 'AI печатает...';
-        chatContainer.appendChild(typingDiv);
-        chatContainer.scrollTop = chatContainer.scrollHeight;
-
-        // Wait a moment and fetch new messages (AI should have responded)
-        setTimeout(async () => {
-            const messages = await Api.get(`/chat/${candidateId}`);
-            const typingIndicator = document.getElementById('typing-indicator');
-            if (typingIndicator) typingIndicator.remove();
-
-            // Find and append only the new AI message
-            const lastMessage = messages[messages.length - 1];
-            if (lastMessage && lastMessage.role === 'assistant') {
-                // Check if it's not already displayed
-                const existingMessages = chatContainer.querySelectorAll('div[data-role="assistant"]');
-                const alreadyDisplayed = Array.from(existingMessages).some(
-                    el => el.textContent.includes(lastMessage.content.substring(0, 50))
-                );
-
-                if (!alreadyDisplayed) {
-                    appendMessage('assistant', lastMessage.content);
-                }
+        }, (event, data) => {
+            if (event === 'delta') {
+                if (!body) body = appendMessage('assistant', '');
+                body.textContent += data.content;
+                const chatContainer = document.getElementById('chat-messages');
+                chatContainer.scrollTop = chatContainer.scrollHeight;
+            } else if (event === 'done' && data.role === 'assistant') {
+                if (!body) body = appendMessage('assistant', '');
+                body.innerHTML = data.content.replace(/\n/g, '<br>');
+            } else if (event === 'error') {
+                // A reply cut off mid-way is not saved; say so under the partial text
+                if (body) body.textContent += ` ⚠️ ${data.detail}`;
+                console.error("Chat stream error", data.detail);
             }
-        }, 2000); // 2 second delay for AI to respond
+        });
 
     } catch (e) {
         alert('Failed to send message');
@@ -207,6 +198,7 @@ function appendMessage(role, content) {
     `;
     container.appendChild(card);
     container.scrollTop = container.scrollHeight;
+    return card.querySelector('.chat-card-body');
 }
 
 // Outreach Logic
@@ -269,11 +261,27 @@ if (uploadForm) {
             return;
         }
 
+        const files = Array.from(fileInput.files);
+        const isBulk = files.length > 1 || files[0].name.toLowerCase().endsWith('.zip');
         const formData = new FormData();
-        formData.append('file', fileInput.files[0]);
+        if (isBulk) {
+            files.forEach(f => formData.append('files', f));
+        } else {
+            formData.append('file', files[0]);
+        }
 
         try {
             if (spinner) spinner.style.display = 'block';
+            if (isBulk) {
+                const result = await Api.upload(`/candidates/upload-bulk?vacancy_id=${vacancyId}`, formData);
+                let message = `Загружено резюме: ${result.created}`;
+                if (result.duplicates) message += `\nДубликатов пропущено: ${result.duplicates}`;
+                if (result.skipped_quota) message += `\nПропущено из-за лимита тарифа: ${result.skipped_quota}`;
+                if (result.failed.length) message += `\nОшибки: ${result.failed.map(f => f.filename).join(', ')}`;
+                alert(message);
+                window.location.href = `vacancy-view.html?id=${vacancyId}`;
+                return;
+            }
             const candidate = await Api.upload(`/candidates/upload?vacancy_id=${vacancyId}`, formData);
             alert('Candidate uploaded successfully!');
             window.location.href = `candidate-view.html?id=${candidate.id}`;
@@ -308,16 +316,27 @@ async function sendHRChatMessage() {
     container.scrollTop = container.scrollHeight;
 
     try {
-        const responseText = await Api.post('/chat/hr_ask', {
+        let bubble = null;
+        await Api.stream('/chat/hr_ask/stream', {
             candidate_id: candidateId,
             question: content
+        }, (event, data) => {
+            if (event === 'delta') {
+                // Remove typing indicator on the first token
+                if (document.getElementById('hr-typing')) document.getElementById('hr-typing').remove();
+                if (!bubble) bubble = appendHRMessage('ai', '');
+                bubble.textContent += data.content;
+                container.scrollTop = container.scrollHeight;
+            } else if (event === 'done') {
+                if (!bubble) bubble = appendHRMessage('ai', '');
+                bubble.innerHTML = data.content.replace(/\n/g, '<br>');
+            } else if (event === 'error') {
+                throw new Error(data.detail);
+            }
         });
 
-        // Remove typing indicator
         if (document.getElementById('hr-typing')) document.getElementById('hr-typing').remove();
 
-        appendHRMessage('ai', responseText);
-
     } catch (e) {
         if (document.getElementById('hr-typing')) document.getElementById('hr-typing').remove();
         console.error("HR Chat error", e);
@@ -352,4 +371,5 @@ function appendHRMessage(role, content) {
     `;
     container.appendChild(div);
     container.scrollTop = container.scrollHeight;
+    return div.querySelector('p');
 }
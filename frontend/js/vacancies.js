@@ -72,20 +72,21 @@ async function loadVacancy(id) {
     }
 }
 
-async function loadCandidates(vacancyId) {
+async function loadCandidates(vacancyId, cursor = null) {
     // This function will be shared or called here
     // For MVP simplicity, implementing here or in candidates.js
     // Assuming simple separation: vacancies.js handles Vacancy View Page which has a list of candidates
 
     try {
-        const candidates = await Api.get(`/candidates/?vacancy_id=${vacancyId}`);
+        // Pages come ranked by score; "Показать ещё" appends the next one
+        const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+        const page = await Api.get(`/candidates/?vacancy_id=${vacancyId}${query}`);
         const tbody = document.querySelector("#candidates-table tbody");
-        tbody.innerHTML = "";
+        if (!cursor) tbody.innerHTML = "";
+        const offset = tbody.children.length;
 
-        // Sort by score (Ranking)
-        candidates.sort((a, b) => (b.score || 0) - (a.score || 0));
-
-        candidates.forEach((c, index) => {
+        page.items.forEach((c, pageIndex) => {
+            const index = offset + pageIndex;
             const tr = document.createElement("tr");
             let scoreClass = "status-new"; // neutral
             const scoreVal = (c.score || 0) * 100;
@@ -115,11 +116,38 @@ async function loadCandidates(vacancyId) {
             tbody.appendChild(tr);
         });
 
+        const moreBtn = document.getElementById("load-more-candidates");
+        moreBtn.classList.toggle("hidden", !page.next_cursor);
+        moreBtn.onclick = () => loadCandidates(vacancyId, page.next_cursor);
+
     } catch (err) {
         console.error("Error loading candidates", err);
     }
 }
 
+async function analyzeAllCandidates() {
+    const id = new URLSearchParams(window.location.search).get("id");
+    const btn = document.getElementById("analyze-all-btn");
+    if (btn) { btn.disabled = true; btn.textContent = "Analyzing..."; }
+
+    try {
+        // The batch runs in the background; poll until it finishes
+        let result = await Api.post(`/vacancies/${id}/analyze-all`);
+        while (result.status === "running") {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            result = await Api.get(`/vacancies/${id}/analyze-all`);
+        }
+        if (result.status === "failed") throw new Error(result.error);
+        alert(`Проанализировано: ${result.analyzed} из ${result.selected} (${result.candidates_per_minute} кандидатов/мин)`);
+        loadCandidates(id);
+    } catch (err) {
+        console.error("Bulk analysis error", err);
+        alert("Ошибка анализа: " + err.message);
+    } finally {
+        if (btn) { btn.disabled = false; btn.textContent = "⚡ AI Analyze All"; }
+    }
+}
+
 async function viewChatHistory(candidateId) {
     const modal = document.getElementById('chatModal');
     const content = document.getElementById('modal-chat-content');
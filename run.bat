@@ -33,7 +33,7 @@ if %errorlevel% neq 0 (
 )
 
 echo [4/4] Starting Services...
-start "Nexus AI Backend" cmd /k "cd backend && call venv\Scripts\activate && uvicorn app.main:app --reload --port 8000"
+start "Nexus AI Backend" cmd /k "cd backend && call venv\Scripts\activate && alembic upgrade head && uvicorn app.main:app --reload --port 8000"
 start "Nexus AI Frontend" cmd /k "npx -y http-server frontend -p 3000 --cors -c-1"
 
 echo.
@@ -28,11 +28,13 @@ if ($LASTEXITCODE -eq 0) {
 
 # Применение миграций
 Write-Host "[3/5] Применение миграций базы данных..." -ForegroundColor Yellow
-python migrate_db.py
+Push-Location (Join-Path $projectPath "backend")
+alembic upgrade head
+Pop-Location
 if ($LASTEXITCODE -eq 0) {
     Write-Host "  ✓ Миграции применены" -ForegroundColor Green
 } else {
-    Write-Host "  ⚠ Ошибка при применении миграций (возможно, уже применены)" -ForegroundColor Yellow
+    Write-Host "  ⚠ Ошибка при применении миграций" -ForegroundColor Yellow
 }
 
 # Запуск Backend
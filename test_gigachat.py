@@ -5,6 +5,7 @@
 
 import sys
 import os
+import asyncio
 
 # Добавляем backend в путь
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
@@ -34,7 +35,7 @@ def test_gigachat_connection():
     # Тест получения access token
     print("2️⃣ Получение OAuth access token...")
     try:
-        token = gigachat_service.get_access_token()
+        token = asyncio.run(gigachat_service.get_access_token())
         if token:
             print(f"   ✅ Access token получен успешно")
             print(f"   📝 Токен (первые 20 символов): {token[:20]}...")
@@ -58,7 +59,7 @@ def test_gigachat_connection():
             {"role": "user", "content": "Привет! Ответь одним предложением."}
         ]
         
-        response = gigachat_service.chat_completion(messages, temperature=0.7)
+        response = asyncio.run(gigachat_service.chat_completion(messages, temperature=0.7))
         
         if response:
             print(f"   ✅ Ответ получен успешно")